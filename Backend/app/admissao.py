@@ -0,0 +1,226 @@
+import asyncio
+import logging
+import math
+import random
+import time
+from typing import Dict, Optional
+import httpx
+from fastapi import HTTPException, status
+
+logger = logging.getLogger(__name__)
+
+# Respostas que indicam Supabase degradado (e não erro da consulta)
+STATUS_DEGRADADO = {429, 502, 503, 504}
+METODOS_IDEMPOTENTES = {"GET", "HEAD"}
+
+
+class UpstreamIndisponivel(HTTPException):
+    """Supabase lento, saturado ou fora do ar: a requisição falha rápido, com Retry-After.
+
+    É uma HTTPException para atravessar os ``except HTTPException: raise`` dos routers.
+    """
+
+    def __init__(self, detail: str, retry_after: float, status_code: int = status.HTTP_503_SERVICE_UNAVAILABLE):
+        super().__init__(
+            status_code=status_code,
+            detail=detail,
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+        )
+        self.retry_after = retry_after
+
+
+def indisponibilidade(erro: Optional[BaseException]) -> Optional[UpstreamIndisponivel]:
+    """UpstreamIndisponivel na cadeia do erro (o gotrue embrulha as exceções do cliente HTTP)."""
+    while erro is not None:
+        if isinstance(erro, UpstreamIndisponivel):
+            return erro
+        erro = erro.__cause__ or erro.__context__
+    return None
+
+
+class Disjuntor:
+    """Circuit breaker por serviço (PostgREST, Auth).
+
+    Após ``limiar`` falhas seguidas o circuito abre e as chamadas falham na hora
+    por ``espera`` segundos; depois disso uma única chamada de sondagem passa:
+    sucesso fecha o circuito, falha o reabre.
+    """
+
+    FECHADO, ABERTO, MEIO_ABERTO = "fechado", "aberto", "meio_aberto"
+
+    def __init__(self, nome: str, limiar: int, espera: float):
+        self.nome = nome
+        self.limiar = limiar
+        self.espera = espera
+        self.estado = self.FECHADO
+        self.falhas = 0
+        self.aberto_em = 0.0
+        self.aberturas = 0
+        self.rejeitadas = 0
+
+    def permitir(self) -> None:
+        if self.estado == self.FECHADO:
+            return
+        restante = self.aberto_em + self.espera - time.monotonic()
+        if self.estado == self.ABERTO and restante <= 0:
+            self.estado = self.MEIO_ABERTO
+            return
+        self.rejeitadas += 1
+        raise UpstreamIndisponivel(
+            f"Supabase ({self.nome}) indisponível; tente novamente em instantes",
+            restante if restante > 0 else 1,
+        )
+
+    def sucesso(self) -> None:
+        if self.estado != self.FECHADO:
+            logger.warning("Circuito do Supabase (%s) fechado", self.nome)
+        self.estado = self.FECHADO
+        self.falhas = 0
+
+    def falha(self) -> None:
+        self.falhas += 1
+        if self.estado == self.MEIO_ABERTO or (self.estado == self.FECHADO and self.falhas >= self.limiar):
+            if self.estado == self.FECHADO:
+                self.aberturas += 1
+                logger.warning("Circuito do Supabase (%s) aberto após %d falhas seguidas", self.nome, self.falhas)
+            self.estado = self.ABERTO
+            self.aberto_em = time.monotonic()
+
+    def interrompida(self) -> None:
+        """Chamada que terminou sem resposta nem falha do Supabase (fila, cancelamento).
+
+        Se era a sondagem, o circuito volta a aberto com nova espera; sem isso ficaria
+        meio aberto, rejeitando tudo, sem nenhuma sondagem em andamento.
+        """
+        if self.estado == self.MEIO_ABERTO:
+            self.estado = self.ABERTO
+            self.aberto_em = time.monotonic()
+
+
+class TransporteControlado(httpx.AsyncBaseTransport):
+    """Controle de admissão das chamadas ao Supabase.
+
+    - no máximo ``limite`` chamadas simultâneas; quem esperar mais que
+      ``espera_fila`` segundos por uma vaga recebe 503 em vez de empilhar;
+    - ``timeout`` limita a duração total de cada chamada (o httpx só limita cada fase);
+    - GET/HEAD com falha de rede ou status de degradação são repetidos até
+      ``retentativas`` vezes, com backoff exponencial e jitter;
+    - um circuit breaker por serviço corta as chamadas enquanto o Supabase falha.
+
+    A resposta é lida por inteiro dentro da vaga, que só é liberada ao final.
+    """
+
+    def __init__(
+        self,
+        transport: httpx.AsyncBaseTransport,
+        limite: int,
+        espera_fila: float,
+        timeout: float,
+        retentativas: int,
+        backoff: float,
+        limiar_falhas: int,
+        espera_circuito: float,
+    ):
+        self.transport = transport
+        self.limite = limite
+        self.espera_fila = espera_fila
+        self.timeout = timeout or None
+        self.retentativas = retentativas
+        self.backoff = backoff
+        self.disjuntores = {
+            nome: Disjuntor(nome, limiar_falhas, espera_circuito) for nome in ("rest", "auth")
+        }
+        self._vagas = asyncio.Semaphore(limite)
+        self.em_andamento = 0
+        self.aguardando = 0
+        self.rejeitadas_fila = 0
+        self.timeouts = 0
+        self.retentativas_feitas = 0
+
+    def _disjuntor(self, request: httpx.Request) -> Disjuntor:
+        return self.disjuntores["auth" if request.url.path.startswith("/auth/v1") else "rest"]
+
+    async def _chamar(self, request: httpx.Request) -> httpx.Response:
+        response = await self.transport.handle_async_request(request)
+        try:
+            await response.aread()
+        except BaseException:
+            await response.aclose()
+            raise
+        return response
+
+    async def _enviar(self, request: httpx.Request) -> httpx.Response:
+        self.aguardando += 1
+        try:
+            await asyncio.wait_for(self._vagas.acquire(), self.espera_fila)
+        except asyncio.TimeoutError:
+            self.rejeitadas_fila += 1
+            raise UpstreamIndisponivel("Muitas chamadas ao Supabase em andamento; tente novamente", 1)
+        finally:
+            self.aguardando -= 1
+        self.em_andamento += 1
+        try:
+            return await asyncio.wait_for(self._chamar(request), self.timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise httpx.ReadTimeout("Supabase não respondeu a tempo", request=request)
+        finally:
+            self.em_andamento -= 1
+            self._vagas.release()
+
+    async def _esperar(self, tentativa: int) -> None:
+        self.retentativas_feitas += 1
+        await asyncio.sleep(random.uniform(0, self.backoff * 2 ** tentativa))
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        disjuntor = self._disjuntor(request)
+        tentativas = 1 + (self.retentativas if request.method in METODOS_IDEMPOTENTES else 0)
+        for tentativa in range(tentativas):
+            disjuntor.permitir()
+            try:
+                response = await self._enviar(request)
+            except httpx.TransportError as e:
+                disjuntor.falha()
+                if tentativa + 1 < tentativas:
+                    await self._esperar(tentativa)
+                    continue
+                if isinstance(e, httpx.TimeoutException):
+                    raise UpstreamIndisponivel(
+                        "Supabase não respondeu a tempo", disjuntor.espera, status.HTTP_504_GATEWAY_TIMEOUT
+                    ) from e
+                raise UpstreamIndisponivel("Falha de conexão com o Supabase", disjuntor.espera) from e
+            except BaseException:
+                # Sem vaga na fila, cancelada ou erro inesperado: não diz nada sobre o Supabase
+                disjuntor.interrompida()
+                raise
+
+            if response.status_code not in STATUS_DEGRADADO:
+                disjuntor.sucesso()
+                return response
+            disjuntor.falha()
+            if tentativa + 1 < tentativas:
+                await self._esperar(tentativa)
+                continue
+            retry_after = response.headers.get("Retry-After", "")
+            raise UpstreamIndisponivel(
+                "Limite de requisições do Supabase atingido" if response.status_code == 429
+                else f"Supabase indisponível (HTTP {response.status_code})",
+                float(retry_after) if retry_after.isdigit() else disjuntor.espera,
+            )
+
+    def estado(self) -> Dict[str, object]:
+        return {
+            "limite": self.limite,
+            "em_andamento": self.em_andamento,
+            "aguardando": self.aguardando,
+            "rejeitadas_fila": self.rejeitadas_fila,
+            "timeouts": self.timeouts,
+            "retentativas": self.retentativas_feitas,
+            "circuitos": {
+                nome: {"estado": d.estado, "falhas": d.falhas, "aberturas": d.aberturas, "rejeitadas": d.rejeitadas}
+                for nome, d in self.disjuntores.items()
+            },
+        }
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
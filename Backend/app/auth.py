@@ -1,13 +1,39 @@
-from datetime import datetime, timedelta
+import asyncio
+import hashlib
+import logging
+import time
+from datetime import datetime, timedelta, timezone
 from typing import Optional
+import httpx
 from jose import JWTError, jwt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from gotrue.types import User, UserResponse
+from app.admissao import indisponibilidade
+from app.cache import TTLCache
+from app import singleflight
 from app.config import settings
-from app.database import supabase
+from app.database import get_db
 
 security = HTTPBearer()
 
+logger = logging.getLogger(__name__)
+
+# Algoritmos aceitos na verificação local (nunca "none")
+ALGORITMOS_ASSIMETRICOS = {"RS256", "ES256"}
+
+# Tokens já validados, indexados pelo hash do token
+_token_cache = TTLCache(maxsize=settings.AUTH_TOKEN_CACHE_SIZE, ttl=settings.AUTH_TOKEN_CACHE_TTL)
+_verificacoes = singleflight.grupo("tokens")
+
+_jwks_lock = asyncio.Lock()
+_jwks = {"keys": {}, "fetched_at": 0.0}
+
+
+class ChaveIndisponivel(Exception):
+    """Não há segredo/JWKS para validar o token localmente."""
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -18,24 +44,130 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
-def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
-    token = credentials.credentials
+
+async def _carregar_jwks(force: bool = False) -> dict:
+    async with _jwks_lock:
+        expirado = time.monotonic() - _jwks["fetched_at"] > settings.JWKS_CACHE_TTL
+        if force or expirado or not _jwks["keys"]:
+            if not settings.SUPABASE_JWKS_URL:
+                raise ChaveIndisponivel("JWKS não configurado")
+            try:
+                response = await get_db().http.get(settings.SUPABASE_JWKS_URL, timeout=5)
+                response.raise_for_status()
+                keys = response.json().get("keys", [])
+            except (httpx.HTTPError, ValueError) as e:
+                raise ChaveIndisponivel(str(e))
+            _jwks["keys"] = {k.get("kid"): k for k in keys}
+            _jwks["fetched_at"] = time.monotonic()
+        return _jwks["keys"]
+
+
+async def precarregar_chaves() -> None:
+    """Executada na inicialização: confere o segredo e carrega o JWKS."""
+    if settings.AUTH_VERIFY_MODE != "local":
+        return
+    if not settings.SUPABASE_JWT_SECRET and not settings.SUPABASE_JWKS_URL:
+        logger.warning("Sem SUPABASE_JWT_SECRET nem JWKS: tokens não poderão ser validados localmente")
+        return
+    if settings.AUTH_PRELOAD_JWKS and settings.SUPABASE_JWKS_URL:
+        try:
+            await _carregar_jwks()
+        except ChaveIndisponivel as e:
+            logger.warning("JWKS não carregado na inicialização: %s", e)
+
+
+async def _chave_para(header: dict):
+    alg = header.get("alg")
+    if alg == "HS256":
+        if not settings.SUPABASE_JWT_SECRET:
+            raise ChaveIndisponivel("SUPABASE_JWT_SECRET não configurado")
+        return settings.SUPABASE_JWT_SECRET
+    if alg in ALGORITMOS_ASSIMETRICOS:
+        kid = header.get("kid")
+        keys = await _carregar_jwks()
+        if kid not in keys:
+            # Chave rotacionada: recarregar o JWKS uma vez antes de desistir
+            keys = await _carregar_jwks(force=True)
+        if kid not in keys:
+            raise ChaveIndisponivel(f"Chave {kid} não encontrada no JWKS")
+        return keys[kid]
+    raise JWTError(f"Algoritmo não suportado: {alg}")
+
+
+def _usuario_das_claims(claims: dict) -> UserResponse:
+    # O JWT não traz created_at; usamos o iat para manter o mesmo formato de User
+    return UserResponse(user=User(
+        id=claims["sub"],
+        aud=claims.get("aud") if isinstance(claims.get("aud"), str) else settings.SUPABASE_JWT_AUDIENCE,
+        email=claims.get("email"),
+        phone=claims.get("phone"),
+        role=claims.get("role"),
+        app_metadata=claims.get("app_metadata") or {},
+        user_metadata=claims.get("user_metadata") or {},
+        is_anonymous=claims.get("is_anonymous", False),
+        created_at=datetime.fromtimestamp(claims.get("iat", 0), tz=timezone.utc),
+    ))
+
+
+async def verificar_token_local(token: str) -> tuple:
+    """Valida assinatura, exp, aud e iss sem chamar o Supabase Auth."""
+    header = jwt.get_unverified_header(token)
+    claims = jwt.decode(
+        token,
+        await _chave_para(header),
+        algorithms=[header.get("alg")],
+        audience=settings.SUPABASE_JWT_AUDIENCE,
+        issuer=settings.SUPABASE_JWT_ISSUER,
+    )
+    if not claims.get("sub"):
+        raise JWTError("Token sem sub")
+    return _usuario_das_claims(claims), claims["exp"]
+
+
+async def verificar_token_remoto(token: str):
+    user = await get_db().auth.get_user(token)
+    if not user:
+        raise JWTError("Token inválido")
+    return user, None
+
+
+async def _validar(token: str):
+    if settings.AUTH_VERIFY_MODE == "remote":
+        return await verificar_token_remoto(token)
     try:
-        # Verificar o token com o Supabase
-        user = supabase.auth.get_user(token)
-        if not user:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Token inválido",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
+        return await verificar_token_local(token)
+    except ChaveIndisponivel:
+        if not settings.AUTH_REMOTE_FALLBACK:
+            raise
+        return await verificar_token_remoto(token)
+
+
+async def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    token = credentials.credentials
+    cache_key = hashlib.sha256(token.encode()).hexdigest()
+    user = _token_cache.get(cache_key)
+    if user is not None:
         return user
-    except Exception:
+    try:
+        # Requisições paralelas com o mesmo token novo validam uma única vez
+        user, exp = await _verificacoes.executar(cache_key, lambda: _validar(token))
+    except Exception as e:
+        # Sem como validar agora (Auth/JWKS indisponível): 503, não 401 que desloga o usuário
+        erro = indisponibilidade(e)
+        if erro:
+            raise erro
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Token inválido ou expirado",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    # Nunca manter no cache além da expiração do próprio token
+    ttl = settings.AUTH_TOKEN_CACHE_TTL
+    if exp is not None:
+        ttl = min(ttl, exp - time.time())
+    _token_cache.set(cache_key, user, ttl=ttl)
+    return user
+
 
 def get_current_user(user_data = Depends(verify_token)):
-    return user_data.user
\ No newline at end of file
+    return user_data.user
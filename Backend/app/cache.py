@@ -0,0 +1,107 @@
+import sys
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Hashable, Optional
+
+
+def _tamanho(value: Any) -> int:
+    if isinstance(value, (bytes, bytearray, str)):
+        return len(value)
+    return sys.getsizeof(value)
+
+
+class TTLCache:
+    """Cache LRU limitado por tamanho (e opcionalmente por bytes), com expiração por entrada."""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 300, maxbytes: Optional[int] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.maxbytes = maxbytes
+        self.bytes = 0
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            value, expires_at, _ = item
+            if expires_at <= time.monotonic():
+                self._remover(key)
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0 or self.maxsize <= 0:
+            return
+        tamanho = _tamanho(value)
+        if self.maxbytes is not None and tamanho > self.maxbytes:
+            return
+        with self._lock:
+            self._remover(key)
+            self._data[key] = (value, time.monotonic() + ttl, tamanho)
+            self.bytes += tamanho
+            # Remove as entradas menos usadas até caber nos limites
+            while len(self._data) > self.maxsize or (self.maxbytes is not None and self.bytes > self.maxbytes):
+                _, (_, _, removido) = self._data.popitem(last=False)
+                self.bytes -= removido
+
+    def _remover(self, key: Hashable):
+        item = self._data.pop(key, None)
+        if item is not None:
+            self.bytes -= item[2]
+        return item
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            item = self._remover(key)
+        return default if item is None else item[0]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class CacheBackend(ABC):
+    """Armazenamento do cache de leituras.
+
+    Os valores são sempre ``bytes``, para que um backend compartilhado entre
+    workers (Redis, Memcached) possa substituir o de memória sem mudanças.
+    """
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[bytes]:
+        ...
+
+    @abstractmethod
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        ...
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        ...
+
+
+class MemoryBackend(CacheBackend):
+    """Backend local ao processo, sobre ``TTLCache``."""
+
+    def __init__(self, maxsize: int, maxbytes: int):
+        self._cache = TTLCache(maxsize=maxsize, ttl=0, maxbytes=maxbytes)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return self._cache.get(key)
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        self._cache.set(key, value, ttl=ttl)
+
+    async def delete(self, key: str) -> None:
+        self._cache.pop(key)
@@ -6,9 +6,108 @@ load_dotenv()
 class Settings:
     SUPABASE_URL: str = os.getenv("SUPABASE_URL")
     SUPABASE_ANON_KEY: str = os.getenv("SUPABASE_ANON_KEY")
+    # Chave service_role: usada só nas funções que o SQL restringe a ela
+    # (resumo_reconstruir e historico_registrar)
+    SUPABASE_SERVICE_KEY: str = os.getenv("SUPABASE_SERVICE_KEY")
     SECRET_KEY: str = os.getenv("SECRET_KEY", "change-this-in-production")
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60
     ENVIRONMENT: str = os.getenv("ENVIRONMENT", "development")
 
+    # Pool de conexões HTTP com o Supabase (PostgREST + Auth)
+    DB_POOL_MAX_CONNECTIONS: int = int(os.getenv("DB_POOL_MAX_CONNECTIONS", "100"))
+    DB_POOL_MAX_KEEPALIVE: int = int(os.getenv("DB_POOL_MAX_KEEPALIVE", "20"))
+    DB_POOL_KEEPALIVE_EXPIRY: float = float(os.getenv("DB_POOL_KEEPALIVE_EXPIRY", "30"))
+    DB_TIMEOUT: float = float(os.getenv("DB_TIMEOUT", "10"))
+    DB_CONNECT_TIMEOUT: float = float(os.getenv("DB_CONNECT_TIMEOUT", "5"))
+    DB_HTTP2: bool = os.getenv("DB_HTTP2", "true").lower() == "true"
+    # Conexões abertas na inicialização, antes da primeira requisição (0 desliga)
+    DB_WARMUP_CONNECTIONS: int = int(os.getenv("DB_WARMUP_CONNECTIONS", "2"))
+    # /ready: validade do resultado da verificação do Supabase e timeout de cada checagem
+    READY_CACHE_TTL: float = float(os.getenv("READY_CACHE_TTL", "5"))
+    READY_TIMEOUT: float = float(os.getenv("READY_TIMEOUT", "2"))
+    # Controle de admissão das chamadas ao Supabase (app/admissao.py)
+    UPSTREAM_MAX_CONCURRENCY: int = int(os.getenv("UPSTREAM_MAX_CONCURRENCY", "100"))
+    UPSTREAM_QUEUE_TIMEOUT: float = float(os.getenv("UPSTREAM_QUEUE_TIMEOUT", "2"))
+    # Duração máxima de uma chamada, incluindo a leitura da resposta (0 desliga)
+    UPSTREAM_CALL_TIMEOUT: float = float(os.getenv("UPSTREAM_CALL_TIMEOUT", "15"))
+    # Repetições de GET/HEAD após falha de rede ou 429/502/503/504, com backoff em segundos
+    UPSTREAM_RETRIES: int = int(os.getenv("UPSTREAM_RETRIES", "2"))
+    UPSTREAM_RETRY_BACKOFF: float = float(os.getenv("UPSTREAM_RETRY_BACKOFF", "0.1"))
+    # Circuit breaker: falhas seguidas até abrir e segundos aberto antes de sondar de novo
+    CIRCUIT_FAILURE_THRESHOLD: int = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+    CIRCUIT_OPEN_SECONDS: float = float(os.getenv("CIRCUIT_OPEN_SECONDS", "30"))
+    # Escritas com o JWT do usuário: as políticas RLS garantem a posse do registro
+    # e cada alteração vira um único comando (sem consulta prévia de verificação)
+    DB_RLS_WRITES: bool = os.getenv("DB_RLS_WRITES", "false").lower() == "true"
+
+    # Máximo de itens por requisição nos endpoints de lote
+    BULK_MAX_ITENS: int = int(os.getenv("BULK_MAX_ITENS", "500"))
+    # Exportação/importação da carteira completa
+    EXPORT_CHUNK_SIZE: int = int(os.getenv("EXPORT_CHUNK_SIZE", "200"))
+    IMPORT_BATCH_SIZE: int = int(os.getenv("IMPORT_BATCH_SIZE", "500"))
+
+    # Projeção de objetivos (Monte Carlo): premissas por tipo em JSON, sobrepondo as padrão
+    # (ex.: '{"acoes": {"retorno_anual": 0.12, "volatilidade_anual": 0.22}}')
+    PROJECTION_ASSUMPTIONS: str = os.getenv("PROJECTION_ASSUMPTIONS", "")
+    PROJECTION_MAX_SIMULATIONS: int = int(os.getenv("PROJECTION_MAX_SIMULATIONS", "5000"))
+    PROJECTION_CACHE_TTL: float = float(os.getenv("PROJECTION_CACHE_TTL", "3600"))
+    PROJECTION_CACHE_SIZE: int = int(os.getenv("PROJECTION_CACHE_SIZE", "1000"))
+
+    # Histórico de valores: máximo de pontos por consulta (sem intervalo, escolhe o menor
+    # entre dia/semana/mês que caiba) e período padrão quando não há "inicio"
+    HISTORY_MAX_POINTS: int = int(os.getenv("HISTORY_MAX_POINTS", "500"))
+    HISTORY_DEFAULT_DAYS: int = int(os.getenv("HISTORY_DEFAULT_DAYS", "365"))
+
+    # Feed de alterações (WebSocket): eventos guardados por usuário para retomar a partir
+    # de um cursor e eventos pendentes por conexão antes de desconectar um cliente lento
+    FEED_HISTORY_SIZE: int = int(os.getenv("FEED_HISTORY_SIZE", "1000"))
+    FEED_QUEUE_SIZE: int = int(os.getenv("FEED_QUEUE_SIZE", "256"))
+    # Prazo para a primeira mensagem, com o token, quando ele não vem no header Authorization
+    FEED_AUTH_TIMEOUT: float = float(os.getenv("FEED_AUTH_TIMEOUT", "10"))
+
+    # Sincronização incremental (/api/sync): o cursor fica SYNC_OVERLAP_SECONDS atrás do
+    # horário do banco (transações ainda abertas gravam updated_at no passado) e expira
+    # com os tombstones, após SYNC_TOMBSTONE_DAYS (o mesmo de sync_limpar_remocoes)
+    SYNC_OVERLAP_SECONDS: float = float(os.getenv("SYNC_OVERLAP_SECONDS", "5"))
+    SYNC_TOMBSTONE_DAYS: int = int(os.getenv("SYNC_TOMBSTONE_DAYS", "30"))
+
+    # Cache de leituras (GET) por usuário; TTL 0 desativa o cache (ETag continua ativo)
+    RESPONSE_CACHE_TTL: float = float(os.getenv("RESPONSE_CACHE_TTL", "60"))
+    RESPONSE_CACHE_MAX_ENTRIES: int = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "10000"))
+    RESPONSE_CACHE_MAX_BYTES: int = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+    # Observabilidade
+    # Requisições acima deste tempo são registradas no log com as chamadas ao Supabase
+    SLOW_REQUEST_MS: float = float(os.getenv("SLOW_REQUEST_MS", "1000"))
+    # /metrics exige "Authorization: Bearer <METRICS_TOKEN>"; sem token, responde 404.
+    # METRICS_PUBLIC=true libera sem token (só quando a porta não é exposta publicamente)
+    METRICS_TOKEN: str = os.getenv("METRICS_TOKEN")
+    METRICS_PUBLIC: bool = os.getenv("METRICS_PUBLIC", "false").lower() == "true"
+    # Perfil por amostragem: templates de rota separados por vírgula
+    # (ex.: "/api/carteiras/cliente/{cliente_id}/completa"); vazio desliga
+    PROFILE_ROUTES: list = [r.strip() for r in os.getenv("PROFILE_ROUTES", "").split(",") if r.strip()]
+    PROFILE_SAMPLE_RATE: float = float(os.getenv("PROFILE_SAMPLE_RATE", "1.0"))
+    PROFILE_INTERVAL_MS: float = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+
+    # Verificação de tokens do Supabase Auth
+    # "local": valida assinatura/exp/aud/iss no próprio backend
+    # "remote": consulta o Supabase Auth (get_user) a cada token novo
+    AUTH_VERIFY_MODE: str = os.getenv("AUTH_VERIFY_MODE", "local")
+    # Em modo local, recorre ao get_user quando não houver chave para validar o token
+    AUTH_REMOTE_FALLBACK: bool = os.getenv("AUTH_REMOTE_FALLBACK", "false").lower() == "true"
+    SUPABASE_JWT_SECRET: str = os.getenv("SUPABASE_JWT_SECRET")
+    SUPABASE_JWT_AUDIENCE: str = os.getenv("SUPABASE_JWT_AUDIENCE", "authenticated")
+    SUPABASE_JWT_ISSUER: str = os.getenv("SUPABASE_JWT_ISSUER") or (
+        f"{SUPABASE_URL}/auth/v1" if SUPABASE_URL else None
+    )
+    SUPABASE_JWKS_URL: str = os.getenv("SUPABASE_JWKS_URL") or (
+        f"{SUPABASE_URL}/auth/v1/.well-known/jwks.json" if SUPABASE_URL else None
+    )
+    JWKS_CACHE_TTL: int = int(os.getenv("JWKS_CACHE_TTL", "600"))
+    # Carrega o JWKS na inicialização, em vez de no primeiro token assimétrico
+    AUTH_PRELOAD_JWKS: bool = os.getenv("AUTH_PRELOAD_JWKS", "true").lower() == "true"
+    AUTH_TOKEN_CACHE_TTL: int = int(os.getenv("AUTH_TOKEN_CACHE_TTL", "300"))
+    AUTH_TOKEN_CACHE_SIZE: int = int(os.getenv("AUTH_TOKEN_CACHE_SIZE", "10000"))
+
 settings = Settings()
\ No newline at end of file
@@ -1,7 +1,155 @@
-from supabase import create_client, Client
+import asyncio
+from typing import Dict, Optional
+import httpx
+from gotrue import AsyncGoTrueClient
+from postgrest import AsyncRequestBuilder, AsyncRPCFilterRequestBuilder
+from app.admissao import TransporteControlado
 from app.config import settings
+from app.metrics import TransporteInstrumentado
 
-def get_supabase_client() -> Client:
-    return create_client(settings.SUPABASE_URL, settings.SUPABASE_ANON_KEY)
 
-supabase = get_supabase_client()
\ No newline at end of file
+class AuthenticatedRequestBuilder(AsyncRequestBuilder):
+    """Envia a consulta com o JWT do usuário, para que as políticas RLS se apliquem."""
+
+    def __init__(self, session: httpx.AsyncClient, path: str, token: str):
+        super().__init__(session, path)
+        self.token = token
+
+    def _com_token(self, builder):
+        builder.headers["Authorization"] = f"Bearer {self.token}"
+        return builder
+
+    def select(self, *args, **kwargs):
+        return self._com_token(super().select(*args, **kwargs))
+
+    def insert(self, *args, **kwargs):
+        return self._com_token(super().insert(*args, **kwargs))
+
+    def upsert(self, *args, **kwargs):
+        return self._com_token(super().upsert(*args, **kwargs))
+
+    def update(self, *args, **kwargs):
+        return self._com_token(super().update(*args, **kwargs))
+
+    def delete(self, *args, **kwargs):
+        return self._com_token(super().delete(*args, **kwargs))
+
+
+class Database:
+    """Acesso assíncrono ao Supabase (PostgREST + Auth) com pool de conexões compartilhado."""
+
+    def __init__(
+        self,
+        url: str,
+        key: str,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        service_key: Optional[str] = None,
+    ):
+        self.url = url
+        self.key = key
+        self.service_key = service_key
+        if transport is None:
+            transport = httpx.AsyncHTTPTransport(
+                limits=httpx.Limits(
+                    max_connections=settings.DB_POOL_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.DB_POOL_MAX_KEEPALIVE,
+                    keepalive_expiry=settings.DB_POOL_KEEPALIVE_EXPIRY,
+                ),
+                http2=settings.DB_HTTP2,
+            )
+        # Limite de concorrência, timeouts, retentativas e circuit breaker; a contagem
+        # de /metrics fica por dentro, então cada tentativa real é registrada
+        self.admissao = TransporteControlado(
+            TransporteInstrumentado(transport),
+            limite=settings.UPSTREAM_MAX_CONCURRENCY,
+            espera_fila=settings.UPSTREAM_QUEUE_TIMEOUT,
+            timeout=settings.UPSTREAM_CALL_TIMEOUT,
+            retentativas=settings.UPSTREAM_RETRIES,
+            backoff=settings.UPSTREAM_RETRY_BACKOFF,
+            limiar_falhas=settings.CIRCUIT_FAILURE_THRESHOLD,
+            espera_circuito=settings.CIRCUIT_OPEN_SECONDS,
+        )
+        self.http = httpx.AsyncClient(
+            base_url=f"{url}/rest/v1",
+            headers={
+                "apikey": key,
+                "Authorization": f"Bearer {key}",
+                "Accept-Profile": "public",
+                "Content-Profile": "public",
+            },
+            timeout=httpx.Timeout(settings.DB_TIMEOUT, connect=settings.DB_CONNECT_TIMEOUT),
+            follow_redirects=True,
+            # Toda chamada (PostgREST e Auth) passa pelo controle de admissão
+            transport=self.admissao,
+        )
+        # Cliente de Auth compartilhado: só para chamadas sem sessão (get_user com o JWT)
+        self.auth = self.auth_sessao()
+
+    def auth_sessao(self) -> AsyncGoTrueClient:
+        """Cliente de Auth descartável, sobre o mesmo pool de conexões.
+
+        sign_in/sign_up/refresh guardam a sessão no próprio cliente; com um cliente
+        por requisição, logins simultâneos não disputam (nem sobrescrevem) a sessão.
+        """
+        return AsyncGoTrueClient(
+            url=f"{self.url}/auth/v1",
+            headers={"apikey": self.key, "Authorization": f"Bearer {self.key}"},
+            http_client=self.http,
+            auto_refresh_token=False,
+            persist_session=False,
+        )
+
+    def table(self, name: str, token: Optional[str] = None) -> AsyncRequestBuilder:
+        if token:
+            return AuthenticatedRequestBuilder(self.http, f"/{name}", token)
+        return AsyncRequestBuilder(self.http, f"/{name}")
+
+    def rpc(self, func: str, params: dict, token: Optional[str] = None) -> AsyncRPCFilterRequestBuilder:
+        headers = httpx.Headers({"Authorization": f"Bearer {token}"} if token else {})
+        return AsyncRPCFilterRequestBuilder(
+            self.http, f"/rpc/{func}", "POST", headers, httpx.QueryParams(), json=params
+        )
+
+    def rpc_servico(self, func: str, params: dict) -> AsyncRPCFilterRequestBuilder:
+        """RPC com a chave service_role, para funções sem EXECUTE para anon/authenticated."""
+        if not self.service_key:
+            raise RuntimeError(f"SUPABASE_SERVICE_KEY não configurada (necessária para {func})")
+        headers = httpx.Headers({"apikey": self.service_key, "Authorization": f"Bearer {self.service_key}"})
+        return AsyncRPCFilterRequestBuilder(
+            self.http, f"/rpc/{func}", "POST", headers, httpx.QueryParams(), json=params
+        )
+
+    async def aquecer(self, conexoes: int) -> None:
+        """Abre conexões do pool (TCP + TLS) antes da primeira requisição de usuário."""
+        await asyncio.gather(*[self.http.get(f"{self.url}/auth/v1/health") for _ in range(conexoes)])
+
+    async def verificar(self, timeout: float) -> Dict[str, bool]:
+        """Auth e PostgREST respondem? (qualquer status abaixo de 500 conta como disponível)"""
+        respostas = await asyncio.gather(
+            self.http.get(f"{self.url}/auth/v1/health", timeout=timeout),
+            self.http.head("/clientes", params={"select": "id", "limit": "1"}, timeout=timeout),
+            return_exceptions=True,
+        )
+        auth, rest = [not isinstance(r, Exception) and r.status_code < 500 for r in respostas]
+        return {"auth": auth, "rest": rest}
+
+    async def aclose(self) -> None:
+        await self.http.aclose()
+
+
+# Criado no lifespan da aplicação (main.py); get_db cria sob demanda fora dele (scripts)
+db: Optional[Database] = None
+
+
+def get_db() -> Database:
+    global db
+    if db is None:
+        db = Database(settings.SUPABASE_URL, settings.SUPABASE_ANON_KEY, service_key=settings.SUPABASE_SERVICE_KEY)
+    return db
+
+
+async def encerrar() -> None:
+    global db
+    if db is not None:
+        await db.aclose()
+        db = None
@@ -0,0 +1,204 @@
+import asyncio
+import time
+import uuid
+from collections import deque
+from typing import Deque, Dict, Iterable, List, Optional, Set, Tuple
+from app.config import settings
+
+
+class Assinatura:
+    """Uma conexão do feed: fila limitada entre quem publica e o envio pelo WebSocket.
+
+    Sem ``cliente_id``, recebe as alterações de clientes; com ``cliente_id``, as da
+    carteira (o cliente, seus objetivos e os investimentos desses objetivos).
+    ``expira_em`` e ``sessao_id`` vêm do token da conexão; ``sessao_alterada`` avisa
+    quando o token é renovado ou a sessão é encerrada.
+    """
+
+    def __init__(
+        self,
+        user_id: str,
+        cliente_id: Optional[str],
+        objetivos: Iterable[str],
+        tamanho_fila: int,
+        expira_em: Optional[float] = None,
+        sessao_id: Optional[str] = None,
+    ):
+        self.user_id = user_id
+        self.cliente_id = cliente_id
+        self.objetivos: Set[str] = set(objetivos)
+        self.fila: asyncio.Queue = asyncio.Queue(tamanho_fila)
+        self.atrasada = False
+        self.expira_em = expira_em
+        self.sessao_id = sessao_id
+        self.encerrada = False
+        self.sessao_alterada = asyncio.Event()
+
+    def renovar(self, expira_em: Optional[float], sessao_id: Optional[str]) -> None:
+        self.expira_em = expira_em
+        self.sessao_id = sessao_id
+        self.sessao_alterada.set()
+
+    def encerrar(self) -> None:
+        self.encerrada = True
+        self.sessao_alterada.set()
+
+    def acompanhar(self, evento: dict) -> None:
+        # Objetivos criados/removidos na carteira mudam quais investimentos interessam
+        if self.cliente_id and evento["tabela"] == "objetivos" and evento.get("cliente_id") == self.cliente_id:
+            if evento["operacao"] == "insert":
+                self.objetivos.add(evento["id"])
+            elif evento["operacao"] == "delete":
+                self.objetivos.discard(evento["id"])
+
+    def interessa(self, evento: dict) -> bool:
+        self.acompanhar(evento)
+        if self.cliente_id is None:
+            return evento["tabela"] == "clientes"
+        if evento["tabela"] == "investimentos":
+            return evento.get("objetivo_id") in self.objetivos
+        return evento.get("cliente_id") == self.cliente_id
+
+    def entregar(self, evento: dict) -> bool:
+        """Enfileira sem bloquear quem publica; retorna False se a conexão ficou para trás."""
+        if self.atrasada:
+            return False
+        if not self.interessa(evento):
+            return True
+        try:
+            self.fila.put_nowait(evento)
+            return True
+        except asyncio.QueueFull:
+            # Consumidor lento: descarta a fila e encerra; ao reconectar com o cursor do
+            # último evento recebido, o restante vem do histórico
+            self.atrasada = True
+            while not self.fila.empty():
+                self.fila.get_nowait()
+            self.fila.put_nowait(None)
+            return False
+
+
+class CentralEventos:
+    """Fan-out das alterações de cada usuário para as conexões abertas do feed.
+
+    Cada usuário tem uma sequência e os últimos ``tamanho_historico`` eventos, usados
+    para retomar a partir de um cursor (``<epoca>:<seq>``). A época muda a cada início
+    do processo: cursores de outra época (ou já fora do histórico) pedem recarga.
+    """
+
+    def __init__(self, tamanho_historico: int, tamanho_fila: int):
+        self.epoca = uuid.uuid4().hex[:8]
+        self.tamanho_historico = tamanho_historico
+        self.tamanho_fila = tamanho_fila
+        self._seq: Dict[str, int] = {}
+        self._historico: Dict[str, Deque[Tuple[int, dict]]] = {}
+        self._assinaturas: Dict[str, Set[Assinatura]] = {}
+        self.publicados = 0
+        self.desconectadas_atraso = 0
+
+    def cursor(self, user_id: str) -> str:
+        return f"{self.epoca}:{self._seq.get(user_id, 0)}"
+
+    def _seq_do_cursor(self, user_id: str, cursor: Optional[str]) -> Optional[int]:
+        """Sequência do cursor, ou None se não for possível retomar a partir dele."""
+        if not cursor:
+            return None
+        epoca, _, seq = cursor.partition(":")
+        if epoca != self.epoca or not seq.isdigit() or int(seq) > self._seq.get(user_id, 0):
+            return None
+        historico = self._historico.get(user_id)
+        mais_antigo = historico[0][0] if historico else self._seq.get(user_id, 0) + 1
+        # O evento seguinte ao cursor precisa ainda estar no histórico
+        return int(seq) if int(seq) + 1 >= mais_antigo else None
+
+    def publicar(self, user_id: str, tabela: str, operacao: str, row: dict, campos: Optional[Iterable[str]] = None) -> None:
+        """Alteração de uma linha: ``insert`` leva a linha, ``update`` só os ``campos`` alterados e ``delete`` só o id."""
+        seq = self._seq.get(user_id, 0) + 1
+        self._seq[user_id] = seq
+        evento = {
+            "tipo": "evento",
+            "cursor": f"{self.epoca}:{seq}",
+            "tabela": tabela,
+            "operacao": operacao,
+            "id": row["id"],
+            # Ligação com a carteira, para filtrar as assinaturas
+            "cliente_id": row["id"] if tabela == "clientes" else row.get("cliente_id"),
+            "objetivo_id": row.get("objetivo_id"),
+            "dados": (
+                row if operacao == "insert"
+                else {c: row.get(c) for c in campos or ()} if operacao == "update"
+                else None
+            ),
+            "em": time.time(),
+        }
+        historico = self._historico.setdefault(user_id, deque(maxlen=self.tamanho_historico))
+        historico.append((seq, evento))
+        self.publicados += 1
+        for assinatura in list(self._assinaturas.get(user_id, ())):
+            if not assinatura.entregar(evento):
+                self.desconectadas_atraso += 1
+                self.cancelar(assinatura)
+
+    def publicar_varios(self, user_id: str, tabela: str, operacao: str, rows: Iterable[dict], campos=None) -> None:
+        """Um evento por linha (lotes, importação, cotações); ``campos``: lista comum ou função da linha."""
+        for row in rows:
+            self.publicar(user_id, tabela, operacao, row, campos(row) if callable(campos) else campos)
+
+    def assinar(
+        self,
+        user_id: str,
+        cliente_id: Optional[str],
+        objetivos: Iterable[str],
+        base: str,
+        cursor: Optional[str] = None,
+        expira_em: Optional[float] = None,
+        sessao_id: Optional[str] = None,
+    ) -> Tuple[Assinatura, Optional[List[dict]]]:
+        """Registra a conexão e retorna os eventos a reenviar desde ``cursor`` (None: recarregar).
+
+        ``objetivos`` foi lido do banco quando o cursor do usuário era ``base``; os
+        eventos publicados desde então são aplicados a ele. Não há ``await`` entre o
+        registro e o cálculo dos pendentes, então nenhum evento se perde ou se repete.
+        """
+        assinatura = Assinatura(user_id, cliente_id, objetivos, self.tamanho_fila, expira_em, sessao_id)
+        historico = self._historico.get(user_id, ())
+        seq_base = self._seq_do_cursor(user_id, base)
+        for seq, evento in historico:
+            if seq_base is not None and seq > seq_base:
+                assinatura.acompanhar(evento)
+        self._assinaturas.setdefault(user_id, set()).add(assinatura)
+
+        if not cursor:
+            return assinatura, []
+        seq_cursor = self._seq_do_cursor(user_id, cursor)
+        if seq_cursor is None:
+            return assinatura, None
+        # Reenvio com o filtro da assinatura (sem passar pela fila)
+        pendentes = [evento for seq, evento in historico if seq > seq_cursor and assinatura.interessa(evento)]
+        return assinatura, pendentes
+
+    def cancelar(self, assinatura: Assinatura) -> None:
+        assinaturas = self._assinaturas.get(assinatura.user_id)
+        if assinaturas is not None:
+            assinaturas.discard(assinatura)
+            if not assinaturas:
+                del self._assinaturas[assinatura.user_id]
+
+    def encerrar_sessao(self, user_id: str, sessao_id: Optional[str]) -> int:
+        """Logout: encerra as conexões abertas com tokens da sessão ``sessao_id``."""
+        if not sessao_id:
+            return 0
+        encerradas = [a for a in self._assinaturas.get(user_id, ()) if a.sessao_id == sessao_id]
+        for assinatura in encerradas:
+            assinatura.encerrar()
+        return len(encerradas)
+
+    def estado(self) -> Dict[str, int]:
+        return {
+            "conexoes": sum(len(a) for a in self._assinaturas.values()),
+            "publicados": self.publicados,
+            "desconectadas_atraso": self.desconectadas_atraso,
+        }
+
+
+central = CentralEventos(settings.FEED_HISTORY_SIZE, settings.FEED_QUEUE_SIZE)
@@ -0,0 +1,104 @@
+import hashlib
+import json
+import uuid
+from typing import Any, Dict, Optional
+from fastapi import Depends, Request, Response
+from app.auth import get_current_user
+from app.cache import CacheBackend, MemoryBackend
+from app import singleflight
+from app.config import settings
+from app.serializacao import serializar
+
+# A geração de um usuário muda a cada escrita; entradas de gerações antigas
+# deixam de ser encontradas e saem do cache por LRU/TTL
+GERACAO_TTL = 24 * 3600
+
+def _etag(corpo: bytes, headers: Dict[str, str]) -> str:
+    digest = hashlib.sha256(corpo)
+    for nome in sorted(headers):
+        digest.update(f"\n{nome}:{headers[nome]}".encode())
+    return f'"{digest.hexdigest()[:32]}"'
+
+
+def _etag_coincide(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match usa comparação fraca
+    return any(t.strip().removeprefix("W/") == etag for t in if_none_match.split(","))
+
+
+class RespostaCache:
+    """Cache de respostas GET por usuário, invalidado a cada escrita do usuário."""
+
+    def __init__(self, backend: CacheBackend, ttl: float):
+        self.backend = backend
+        self.ttl = ttl
+
+    async def geracao(self, user_id: str) -> str:
+        geracao = await self.backend.get(f"ger:{user_id}")
+        if geracao is None:
+            geracao = uuid.uuid4().hex.encode()
+            await self.backend.set(f"ger:{user_id}", geracao, GERACAO_TTL)
+        return geracao.decode()
+
+    async def invalidar(self, user_id: str) -> None:
+        await self.backend.set(f"ger:{user_id}", uuid.uuid4().hex.encode(), GERACAO_TTL)
+
+
+class LeituraEmCache:
+    """Cache e ETag de uma requisição GET: ``buscar`` antes da consulta, ``guardar`` depois."""
+
+    def __init__(self, cache: RespostaCache, request: Request, user_id: str):
+        self.cache = cache
+        self.request = request
+        self.user_id = user_id
+        self.chave: Optional[str] = None
+
+    def _responder(self, corpo: bytes, etag: str, headers: Dict[str, str]) -> Response:
+        headers = {**headers, "ETag": etag, "Cache-Control": "private, no-cache"}
+        if _etag_coincide(self.request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+        return Response(corpo, media_type="application/json", headers=headers)
+
+    async def buscar(self) -> Optional[Response]:
+        if self.cache.ttl <= 0:
+            return None
+        # A geração é lida antes da consulta: se houver escrita no meio,
+        # o resultado fica guardado numa geração que já não é usada
+        geracao = await self.cache.geracao(self.user_id)
+        query = "&".join(sorted(f"{k}={v}" for k, v in self.request.query_params.multi_items()))
+        self.chave = f"resp:{self.user_id}:{geracao}:{self.request.url.path}?{query}"
+        entrada = await self.cache.backend.get(self.chave)
+        if entrada is None:
+            return None
+        meta, corpo = entrada.split(b"\n", 1)
+        meta = json.loads(meta)
+        return self._responder(corpo, meta["etag"], meta["headers"])
+
+    async def guardar(self, conteudo: Any, modelo: Any = None, headers: Optional[Dict[str, str]] = None) -> Response:
+        headers = headers or {}
+        corpo = serializar(conteudo, modelo)
+        etag = _etag(corpo, headers)
+        if self.chave:
+            meta = json.dumps({"etag": etag, "headers": headers}).encode()
+            await self.cache.backend.set(self.chave, meta + b"\n" + corpo, self.cache.ttl)
+        return self._responder(corpo, etag, headers)
+
+
+cache_respostas = RespostaCache(
+    MemoryBackend(maxsize=settings.RESPONSE_CACHE_MAX_ENTRIES, maxbytes=settings.RESPONSE_CACHE_MAX_BYTES),
+    ttl=settings.RESPONSE_CACHE_TTL,
+)
+
+
+def leitura_em_cache(request: Request, current_user = Depends(get_current_user)) -> LeituraEmCache:
+    return LeituraEmCache(cache_respostas, request, current_user.id)
+
+
+async def invalidar_leituras(user_id: str) -> None:
+    """Chamada pelos endpoints de escrita após gravar dados do usuário."""
+    # Leituras já em andamento podem ter começado antes da escrita: não reaproveitá-las
+    singleflight.grupo("leituras").esquecer()
+    await cache_respostas.invalidar(user_id)
@@ -0,0 +1,264 @@
+import logging
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+import httpx
+from app import singleflight
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Buckets em segundos (latência) e em número de chamadas (upstream por requisição)
+BUCKETS_LATENCIA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BUCKETS_CHAMADAS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+MAX_DETALHES_UPSTREAM = 50
+
+
+class Histograma:
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.contagens = [0] * len(buckets)
+        self.soma = 0.0
+        self.total = 0
+
+    def observar(self, valor: float) -> None:
+        self.soma += valor
+        self.total += 1
+        for i, limite in enumerate(self.buckets):
+            if valor <= limite:
+                self.contagens[i] += 1
+
+
+class UpstreamDaRequisicao:
+    """Chamadas ao Supabase feitas durante uma requisição recebida."""
+
+    def __init__(self):
+        self.chamadas = 0
+        self.tempo = 0.0
+        self.detalhes: List[str] = []
+
+    def registrar(self, descricao: str, duracao: float) -> None:
+        self.chamadas += 1
+        self.tempo += duracao
+        if len(self.detalhes) < MAX_DETALHES_UPSTREAM:
+            self.detalhes.append(f"{descricao} {duracao * 1000:.0f}ms")
+
+
+_upstream_atual: ContextVar[Optional[UpstreamDaRequisicao]] = ContextVar("upstream_atual", default=None)
+
+
+class Metricas:
+    def __init__(self):
+        self.requisicoes: Dict[Tuple[str, str, int], int] = {}
+        self.latencias: Dict[Tuple[str, str], Histograma] = {}
+        self.upstream_por_requisicao: Dict[Tuple[str, str], Histograma] = {}
+        self.em_andamento = 0
+        self.upstream: Dict[Tuple[str, str, int], int] = {}
+        self.upstream_latencias: Dict[Tuple[str, str], Histograma] = {}
+
+    def registrar_requisicao(self, metodo: str, rota: str, status: int, duracao: float, upstream: UpstreamDaRequisicao):
+        chave = (metodo, rota)
+        self.requisicoes[(metodo, rota, status)] = self.requisicoes.get((metodo, rota, status), 0) + 1
+        self.latencias.setdefault(chave, Histograma(BUCKETS_LATENCIA)).observar(duracao)
+        self.upstream_por_requisicao.setdefault(chave, Histograma(BUCKETS_CHAMADAS)).observar(upstream.chamadas)
+
+    def registrar_upstream(self, metodo: str, caminho: str, status: int, duracao: float):
+        self.upstream[(metodo, caminho, status)] = self.upstream.get((metodo, caminho, status), 0) + 1
+        self.upstream_latencias.setdefault((metodo, caminho), Histograma(BUCKETS_LATENCIA)).observar(duracao)
+        atual = _upstream_atual.get()
+        if atual is not None:
+            atual.registrar(f"{metodo} {caminho} {status}", duracao)
+
+
+metricas = Metricas()
+
+
+class TransporteInstrumentado(httpx.AsyncBaseTransport):
+    """Conta e cronometra toda chamada ao Supabase (PostgREST e Auth), até a chegada da resposta."""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport):
+        self.transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        inicio = time.perf_counter()
+        status = 0  # erro de rede/timeout
+        try:
+            response = await self.transport.handle_async_request(request)
+            status = response.status_code
+            return response
+        finally:
+            metricas.registrar_upstream(request.method, request.url.path, status, time.perf_counter() - inicio)
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+
+class MetricasMiddleware:
+    """Latência, status e chamadas ao Supabase por rota; registra requisições lentas."""
+
+    def __init__(self, app, perfilador=None):
+        self.app = app
+        self.perfilador = perfilador
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        upstream = UpstreamDaRequisicao()
+        token = _upstream_atual.set(upstream)
+        status = 500
+        perfil = self.perfilador.iniciar(scope) if self.perfilador else None
+
+        async def send_com_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        metricas.em_andamento += 1
+        inicio = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_com_status)
+        finally:
+            duracao = time.perf_counter() - inicio
+            metricas.em_andamento -= 1
+            _upstream_atual.reset(token)
+            if perfil is not None:
+                self.perfilador.parar(perfil)
+            # O roteador do FastAPI grava a rota casada no scope: o rótulo é o template
+            # (/api/clientes/{cliente_id}), não o caminho, para não explodir a cardinalidade
+            route = scope.get("route")
+            rota = getattr(route, "path", None) or "<sem rota>"
+            metricas.registrar_requisicao(scope["method"], rota, status, duracao, upstream)
+            if duracao * 1000 >= settings.SLOW_REQUEST_MS:
+                logger.warning(
+                    "Requisição lenta: %s %s -> %d em %.0f ms; upstream: %d chamadas, %.0f ms [%s]",
+                    scope["method"], scope["path"], status, duracao * 1000,
+                    upstream.chamadas, upstream.tempo * 1000, ", ".join(upstream.detalhes),
+                )
+
+
+def _escapar(valor) -> str:
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _rotulos(**rotulos) -> str:
+    return "{" + ",".join(f'{k}="{_escapar(v)}"' for k, v in rotulos.items()) + "}"
+
+
+def _histograma(linhas: List[str], nome: str, histograma: Histograma, **rotulos) -> None:
+    for limite, contagem in zip(histograma.buckets, histograma.contagens):
+        linhas.append(f"{nome}_bucket{_rotulos(**rotulos, le=limite)} {contagem}")
+    linhas.append(f"{nome}_bucket{_rotulos(**rotulos, le='+Inf')} {histograma.total}")
+    linhas.append(f"{nome}_sum{_rotulos(**rotulos)} {histograma.soma}")
+    linhas.append(f"{nome}_count{_rotulos(**rotulos)} {histograma.total}")
+
+
+ESTADOS_CIRCUITO = {"fechado": 0, "meio_aberto": 1, "aberto": 2}
+
+
+def exposicao(admissao: Optional[dict] = None, feed: Optional[dict] = None) -> str:
+    """Métricas no formato de texto do Prometheus.
+
+    ``admissao``: TransporteControlado.estado(); ``feed``: CentralEventos.estado().
+    """
+    linhas = [
+        "# HELP http_requests_total Requisições atendidas por rota e status.",
+        "# TYPE http_requests_total counter",
+    ]
+    for (metodo, rota, status), total in sorted(metricas.requisicoes.items()):
+        linhas.append(f"http_requests_total{_rotulos(method=metodo, route=rota, status=status)} {total}")
+
+    linhas += [
+        "# HELP http_requests_in_flight Requisições em andamento.",
+        "# TYPE http_requests_in_flight gauge",
+        f"http_requests_in_flight {metricas.em_andamento}",
+        "# HELP http_request_duration_seconds Latência por rota.",
+        "# TYPE http_request_duration_seconds histogram",
+    ]
+    for (metodo, rota), histograma in sorted(metricas.latencias.items()):
+        _histograma(linhas, "http_request_duration_seconds", histograma, method=metodo, route=rota)
+
+    linhas += [
+        "# HELP http_request_upstream_calls Chamadas ao Supabase por requisição, por rota.",
+        "# TYPE http_request_upstream_calls histogram",
+    ]
+    for (metodo, rota), histograma in sorted(metricas.upstream_por_requisicao.items()):
+        _histograma(linhas, "http_request_upstream_calls", histograma, method=metodo, route=rota)
+
+    linhas += [
+        "# HELP upstream_requests_total Chamadas ao Supabase por caminho e status (0 = erro de rede).",
+        "# TYPE upstream_requests_total counter",
+    ]
+    for (metodo, caminho, status), total in sorted(metricas.upstream.items()):
+        linhas.append(f"upstream_requests_total{_rotulos(method=metodo, path=caminho, status=status)} {total}")
+
+    linhas += [
+        "# HELP upstream_request_duration_seconds Latência das chamadas ao Supabase.",
+        "# TYPE upstream_request_duration_seconds histogram",
+    ]
+    for (metodo, caminho), histograma in sorted(metricas.upstream_latencias.items()):
+        _histograma(linhas, "upstream_request_duration_seconds", histograma, method=metodo, path=caminho)
+
+    grupos = singleflight.metricas()
+    linhas += [
+        "# HELP singleflight_calls_total Execuções disparadas pelo single-flight.",
+        "# TYPE singleflight_calls_total counter",
+    ]
+    linhas += [f"singleflight_calls_total{_rotulos(group=nome)} {m['chamadas']}" for nome, m in sorted(grupos.items())]
+    linhas += [
+        "# HELP singleflight_deduplicated_total Chamadas atendidas por uma execução já em andamento.",
+        "# TYPE singleflight_deduplicated_total counter",
+    ]
+    linhas += [f"singleflight_deduplicated_total{_rotulos(group=nome)} {m['deduplicadas']}" for nome, m in sorted(grupos.items())]
+
+    if admissao is not None:
+        circuitos = sorted(admissao["circuitos"].items())
+        linhas += [
+            "# HELP upstream_admission_limit Chamadas simultâneas permitidas ao Supabase.",
+            "# TYPE upstream_admission_limit gauge",
+            f"upstream_admission_limit {admissao['limite']}",
+            "# HELP upstream_admission_in_flight Chamadas ao Supabase em andamento.",
+            "# TYPE upstream_admission_in_flight gauge",
+            f"upstream_admission_in_flight {admissao['em_andamento']}",
+            "# HELP upstream_admission_waiting Chamadas aguardando vaga.",
+            "# TYPE upstream_admission_waiting gauge",
+            f"upstream_admission_waiting {admissao['aguardando']}",
+            "# HELP upstream_admission_rejected_total Chamadas recusadas sem ir ao Supabase.",
+            "# TYPE upstream_admission_rejected_total counter",
+            f"upstream_admission_rejected_total{_rotulos(reason='fila')} {admissao['rejeitadas_fila']}",
+        ]
+        linhas += [
+            f"upstream_admission_rejected_total{_rotulos(reason='circuito', service=nome)} {c['rejeitadas']}"
+            for nome, c in circuitos
+        ]
+        linhas += [
+            "# HELP upstream_timeouts_total Chamadas interrompidas por UPSTREAM_CALL_TIMEOUT.",
+            "# TYPE upstream_timeouts_total counter",
+            f"upstream_timeouts_total {admissao['timeouts']}",
+            "# HELP upstream_retries_total Retentativas de leituras.",
+            "# TYPE upstream_retries_total counter",
+            f"upstream_retries_total {admissao['retentativas']}",
+            "# HELP upstream_circuit_state Circuit breaker por serviço (0 fechado, 1 meio aberto, 2 aberto).",
+            "# TYPE upstream_circuit_state gauge",
+        ]
+        linhas += [f"upstream_circuit_state{_rotulos(service=nome)} {ESTADOS_CIRCUITO[c['estado']]}" for nome, c in circuitos]
+        linhas += [
+            "# HELP upstream_circuit_opened_total Aberturas do circuit breaker.",
+            "# TYPE upstream_circuit_opened_total counter",
+        ]
+        linhas += [f"upstream_circuit_opened_total{_rotulos(service=nome)} {c['aberturas']}" for nome, c in circuitos]
+
+    if feed is not None:
+        linhas += [
+            "# HELP feed_connections Conexões abertas no feed de alterações.",
+            "# TYPE feed_connections gauge",
+            f"feed_connections {feed['conexoes']}",
+            "# HELP feed_events_published_total Eventos publicados no feed.",
+            "# TYPE feed_events_published_total counter",
+            f"feed_events_published_total {feed['publicados']}",
+            "# HELP feed_slow_disconnects_total Conexões encerradas por não acompanharem os eventos.",
+            "# TYPE feed_slow_disconnects_total counter",
+            f"feed_slow_disconnects_total {feed['desconectadas_atraso']}",
+        ]
+    return "\n".join(linhas) + "\n"
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr, Field
-from typing import Optional, List
+from typing import Optional, List, Dict
 from datetime import datetime
 from decimal import Decimal
 
@@ -15,8 +15,13 @@ class UserLogin(BaseModel):
 class Token(BaseModel):
     access_token: str
     token_type: str = "bearer"
+    refresh_token: Optional[str] = None
+    expires_in: Optional[int] = None
     user: dict
 
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
 class ClienteBase(BaseModel):
     nome: str
     email: EmailStr
@@ -36,6 +41,9 @@ class Cliente(ClienteBase):
     created_at: datetime
     updated_at: datetime
 
+class ClienteBusca(Cliente):
+    relevancia: float
+
 class ObjetivoBase(BaseModel):
     nome: str
     descricao: Optional[str] = None
@@ -52,6 +60,7 @@ class Objetivo(ObjetivoBase):
     id: str
     cliente_id: str
     created_at: datetime
+    updated_at: Optional[datetime] = None
 
 class InvestimentoBase(BaseModel):
     nome: str
@@ -69,13 +78,140 @@ class Investimento(InvestimentoBase):
     id: str
     objetivo_id: str
     created_at: datetime
-    
+    updated_at: Optional[datetime] = None
+
     class Config:
         json_encoders = {
             Decimal: float
         }
 
+class TotaisObjetivo(BaseModel):
+    total_investido: float
+    valor_meta: Optional[float] = None
+    progresso: Optional[float] = None
+    atingida: Optional[bool] = None
+
 class ClienteCarteira(BaseModel):
     cliente_id: str
     objetivos: List[Objetivo]
-    investimentos_por_objetivo: dict
\ No newline at end of file
+    investimentos_por_objetivo: Dict[str, List[Investimento]]
+    totais_por_objetivo: Optional[Dict[str, TotaisObjetivo]] = None
+
+# Projeção de objetivos
+class PremissaRetorno(BaseModel):
+    retorno_anual: float = Field(..., gt=-1, le=5)
+    volatilidade_anual: float = Field(..., ge=0, le=5)
+
+class ProjecaoParametros(BaseModel):
+    anos: int = Field(10, ge=1, le=30)
+    simulacoes: int = Field(2000, ge=100)
+    aporte_mensal: float = Field(0, ge=0)
+    # Sobrepõe as premissas padrão por tipo de investimento ("padrao" = sem tipo/desconhecido)
+    premissas: Optional[Dict[str, PremissaRetorno]] = None
+
+class PontoTrajetoria(BaseModel):
+    mes: int
+    p10: float
+    p25: float
+    p50: float
+    p75: float
+    p90: float
+
+class ProjecaoObjetivo(BaseModel):
+    objetivo_id: str
+    nome: Optional[str] = None
+    valor_atual: float
+    valor_meta: Optional[float] = None
+    probabilidade_meta: Optional[float] = None
+    meses_ate_meta: Optional[Dict[str, Optional[int]]] = None
+    trajetoria: List[PontoTrajetoria]
+
+class ProjecaoCliente(BaseModel):
+    cliente_id: str
+    anos: int
+    simulacoes: int
+    aporte_mensal: float
+    premissas: Dict[str, PremissaRetorno]
+    objetivos: List[ProjecaoObjetivo]
+
+# Resumo do assessor (dashboard)
+class AlocacaoTipo(BaseModel):
+    tipo: Optional[str] = None
+    total: float
+    quantidade: int
+    percentual: Optional[float] = None
+
+class ResumoCarteiras(BaseModel):
+    clientes: int = 0
+    objetivos: int = 0
+    objetivos_com_meta: int = 0
+    total_investido: float = 0
+    soma_metas: float = 0
+    meta_coberta: float = 0
+    cobertura_metas: Optional[float] = None
+    alocacao: List[AlocacaoTipo] = []
+    atualizado_em: Optional[datetime] = None
+
+# Histórico de valores
+class PontoHistorico(BaseModel):
+    data: datetime
+    valor: float
+    investimentos: int
+
+class HistoricoValores(BaseModel):
+    intervalo: str
+    inicio: datetime
+    fim: datetime
+    pontos: List[PontoHistorico]
+
+class Cotacao(BaseModel):
+    investimento_id: str
+    valor: float
+
+class CotacoesLote(BaseModel):
+    # Sem data: cotação atual (atualiza o valor do investimento); com data: carga de histórico
+    data: Optional[datetime] = None
+    itens: List[Cotacao]
+
+class ResultadoCotacoes(BaseModel):
+    registrados: int
+    nao_encontrados: List[str]
+
+# Sincronização incremental
+class RemovidosSync(BaseModel):
+    clientes: List[str] = []
+    objetivos: List[str] = []
+    investimentos: List[str] = []
+
+class AlteracoesSync(BaseModel):
+    clientes: List[Cliente]
+    objetivos: List[Objetivo]
+    investimentos: List[Investimento]
+    removidos: RemovidosSync
+    cursor: str
+    tem_mais: bool
+
+# Operações em lote
+class ClienteUpdateLote(ClienteUpdate):
+    id: str
+
+class ObjetivoUpdateLote(ObjetivoUpdate):
+    id: str
+
+class InvestimentoUpdateLote(InvestimentoUpdate):
+    id: str
+
+class RemocaoLote(BaseModel):
+    ids: List[str]
+
+class ResultadoItemLote(BaseModel):
+    indice: int
+    status: int
+    id: Optional[str] = None
+    erro: Optional[str] = None
+    dados: Optional[dict] = None
+
+class ResultadoLote(BaseModel):
+    sucesso: int
+    falhas: int
+    itens: List[ResultadoItemLote]
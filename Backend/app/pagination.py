@@ -0,0 +1,115 @@
+import base64
+import json
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+from fastapi import Query
+
+# Limite máximo de itens por página
+MAX_LIMIT = 1000
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+@dataclass
+class Paginacao:
+    """Parâmetros de paginação por cursor (keyset em ``ordem, id``)."""
+
+    limit: Optional[int] = None
+    cursor: Optional[str] = None
+    ordem: str = "created_at"
+    desc: bool = False
+    fields: Optional[List[str]] = None
+
+
+def paginacao_params(
+    limit: Optional[int] = Query(None, ge=1, le=MAX_LIMIT, description="Itens por página (sem limite, retorna tudo)"),
+    cursor: Optional[str] = Query(None, description="Valor de X-Next-Cursor da página anterior"),
+    ordem: str = Query("created_at", description="Campo de ordenação"),
+    direcao: str = Query("asc", pattern="^(asc|desc)$"),
+    fields: Optional[str] = Query(None, description="Campos a retornar, separados por vírgula"),
+) -> Paginacao:
+    return Paginacao(
+        limit=limit,
+        cursor=cursor,
+        ordem=ordem,
+        desc=direcao == "desc",
+        fields=[f.strip() for f in fields.split(",") if f.strip()] if fields else None,
+    )
+
+
+def encode_cursor(pagina: Paginacao, row: dict) -> str:
+    payload = {"o": pagina.ordem, "d": pagina.desc, "v": row[pagina.ordem], "id": row["id"]}
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode()).decode()
+
+
+def decode_cursor(pagina: Paginacao) -> Tuple[object, str]:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(pagina.cursor.encode()))
+        valor, row_id = payload["v"], payload["id"]
+    except (ValueError, KeyError, TypeError):
+        raise ValueError("Cursor inválido")
+    if payload.get("o") != pagina.ordem or payload.get("d") != pagina.desc:
+        raise ValueError("Cursor não corresponde à ordenação pedida")
+    return valor, row_id
+
+
+def _quote(valor) -> str:
+    texto = str(valor).replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{texto}"'
+
+
+def escape_prefixo(prefixo: str) -> str:
+    # Curingas digitados pelo usuário são tratados como texto
+    return prefixo.replace("*", "").replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "*"
+
+
+def colunas(pagina: Paginacao, permitidos: Iterable[str]) -> str:
+    """Projeção pedida em ``fields``; ``id`` e o campo de ordenação sempre vão junto."""
+    if not pagina.fields:
+        return "*"
+    permitidos = set(permitidos)
+    invalidos = [f for f in pagina.fields if f not in permitidos]
+    if invalidos:
+        raise ValueError(f"Campos inválidos: {', '.join(invalidos)}")
+    selecionados = list(dict.fromkeys(["id", pagina.ordem, *pagina.fields]))
+    return ",".join(selecionados)
+
+
+def _depois_do_cursor(pagina: Paginacao) -> str:
+    """Filtro ``or`` das linhas depois de ``(valor, id)`` do cursor, com NULL como o maior valor."""
+    valor, row_id = decode_cursor(pagina)
+    op = "lt" if pagina.desc else "gt"
+    coluna = pagina.ordem
+    desempate = f"id.{op}.{_quote(row_id)}"
+    if valor is None:
+        nulos = f"and({coluna}.is.null,{desempate})"
+        # No desc os NULL vêm primeiro: depois deles, todos os valores preenchidos
+        return f"{coluna}.not.is.null,{nulos}" if pagina.desc else nulos
+    filtro = f"{coluna}.{op}.{_quote(valor)},and({coluna}.eq.{_quote(valor)},{desempate})"
+    # No asc os NULL vêm por último, depois de qualquer valor preenchido
+    return filtro if pagina.desc else f"{filtro},{coluna}.is.null"
+
+
+def paginar(query, pagina: Paginacao, ordenaveis: Iterable[str]):
+    """Aplica ordenação estável, filtro de keyset e limite (com um item a mais)."""
+    if pagina.ordem not in ordenaveis:
+        raise ValueError(f"Ordenação inválida: {pagina.ordem}")
+    if pagina.cursor:
+        query = query.or_(_depois_do_cursor(pagina))
+    # NULL fica depois de qualquer valor: por último no asc e primeiro no desc
+    query = query.order(pagina.ordem, desc=pagina.desc, nullsfirst=pagina.desc).order("id", desc=pagina.desc)
+    if pagina.limit:
+        # Um item extra indica se existe próxima página
+        query = query.limit(pagina.limit + 1)
+    return query
+
+
+def proxima_pagina(rows: List[dict], pagina: Paginacao) -> Tuple[List[dict], Optional[str]]:
+    if not pagina.limit or len(rows) <= pagina.limit:
+        return rows, None
+    rows = rows[:pagina.limit]
+    return rows, encode_cursor(pagina, rows[-1])
+
+
+def cabecalhos_paginacao(next_cursor: Optional[str]) -> Dict[str, str]:
+    """Cursor da página seguinte, enviado no header ``X-Next-Cursor``."""
+    return {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else {}
@@ -0,0 +1,83 @@
+import random
+import sys
+import threading
+from collections import Counter
+from typing import Dict, Iterable, Optional
+from starlette.routing import Match
+
+
+class Perfilador:
+    """Perfil por amostragem, ligado apenas para as rotas escolhidas.
+
+    Enquanto houver uma requisição perfilada em andamento, um thread lê a pilha
+    do thread do event loop a cada ``intervalo`` segundos e acumula as pilhas no
+    formato "collapsed" (``rota;modulo:funcao;...  N``), que ferramentas de
+    flamegraph leem diretamente. Como o event loop é compartilhado, amostras de
+    outras requisições simultâneas também entram no perfil da rota.
+    """
+
+    def __init__(self, app, rotas: Iterable[str], taxa: float = 1.0, intervalo: float = 0.005):
+        self.app = app
+        self.rotas = set(rotas)
+        self.taxa = taxa
+        self.intervalo = intervalo
+        self.pilhas: Dict[str, Counter] = {}
+        self._ativas: Counter = Counter()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._alvo: Optional[int] = None
+
+    def _rota(self, scope) -> Optional[str]:
+        for route in self.app.routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return route.path
+        return None
+
+    def iniciar(self, scope) -> Optional[str]:
+        rota = self._rota(scope)
+        if rota not in self.rotas or random.random() >= self.taxa:
+            return None
+        with self._lock:
+            self._ativas[rota] += 1
+            self._alvo = threading.get_ident()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._amostrar, name="perfilador", daemon=True)
+                self._thread.start()
+        return rota
+
+    def parar(self, rota: str) -> None:
+        with self._lock:
+            self._ativas[rota] -= 1
+            if self._ativas[rota] <= 0:
+                del self._ativas[rota]
+
+    def _amostrar(self) -> None:
+        evento = threading.Event()
+        while True:
+            evento.wait(self.intervalo)
+            with self._lock:
+                if not self._ativas:
+                    self._thread = None
+                    return
+                rotas = list(self._ativas)
+            frame = sys._current_frames().get(self._alvo)
+            pilha = []
+            while frame is not None:
+                pilha.append(f"{frame.f_globals.get('__name__', '?')}:{frame.f_code.co_name}")
+                frame = frame.f_back
+            chave = ";".join(reversed(pilha))
+            with self._lock:
+                for rota in rotas:
+                    self.pilhas.setdefault(rota, Counter())[chave] += 1
+
+    def collapsed(self, limpar: bool = False) -> str:
+        with self._lock:
+            linhas = [
+                f"{rota};{pilha} {n}"
+                for rota, contagem in sorted(self.pilhas.items())
+                for pilha, n in contagem.most_common()
+            ]
+            if limpar:
+                self.pilhas.clear()
+        return "\n".join(linhas) + ("\n" if linhas else "")
@@ -0,0 +1,203 @@
+import functools
+import hashlib
+import json
+import re
+import unicodedata
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from fastapi.concurrency import run_in_threadpool
+from app import singleflight
+from app.cache import TTLCache
+from app.config import settings
+
+# Retorno esperado e volatilidade anuais por tipo de investimento; tipos sem
+# premissa (ou investimentos sem tipo) usam "padrao". O tipo do investimento é texto
+# livre: é comparado sem acentos/maiúsculas (_slug) e pelos apelidos abaixo
+PREMISSAS_PADRAO: Dict[str, Dict[str, float]] = {
+    "renda_fixa": {"retorno_anual": 0.10, "volatilidade_anual": 0.02},
+    "tesouro": {"retorno_anual": 0.10, "volatilidade_anual": 0.03},
+    "previdencia": {"retorno_anual": 0.09, "volatilidade_anual": 0.06},
+    "multimercado": {"retorno_anual": 0.11, "volatilidade_anual": 0.08},
+    "fundos_imobiliarios": {"retorno_anual": 0.11, "volatilidade_anual": 0.15},
+    "acoes": {"retorno_anual": 0.13, "volatilidade_anual": 0.25},
+    "internacional": {"retorno_anual": 0.12, "volatilidade_anual": 0.20},
+    "cripto": {"retorno_anual": 0.15, "volatilidade_anual": 0.60},
+    "padrao": {"retorno_anual": 0.08, "volatilidade_anual": 0.10},
+}
+# Nomes comuns de produtos (já em _slug) -> tipo das premissas
+APELIDOS_TIPO: Dict[str, str] = {
+    **dict.fromkeys(["cdb", "rdb", "lc", "lci", "lca", "lf", "cri", "cra", "debenture", "debentures",
+                     "poupanca", "compromissada", "rf"], "renda_fixa"),
+    **dict.fromkeys(["tesouro", "ntn", "ltn", "lft", "titulos_publicos"], "tesouro"),
+    **dict.fromkeys(["pgbl", "vgbl"], "previdencia"),
+    **dict.fromkeys(["fundo_multimercado", "fundos_multimercado"], "multimercado"),
+    **dict.fromkeys(["fii", "fiis", "fundo_imobiliario", "imobiliario"], "fundos_imobiliarios"),
+    **dict.fromkeys(["acao", "etf", "etfs", "bolsa", "stock", "stocks"], "acoes"),
+    **dict.fromkeys(["exterior", "bdr", "bdrs"], "internacional"),
+    **dict.fromkeys(["criptomoeda", "criptomoedas", "crypto", "bitcoin", "btc"], "cripto"),
+}
+
+
+@functools.lru_cache(maxsize=1024)
+def _slug(texto: str) -> str:
+    sem_acentos = unicodedata.normalize("NFKD", texto).encode("ascii", "ignore").decode()
+    return re.sub(r"[^a-z0-9]+", "_", sem_acentos.lower()).strip("_")
+
+
+def normalizar_premissas(premissas: Dict[str, dict]) -> Dict[str, dict]:
+    return {_slug(tipo): p for tipo, p in premissas.items()}
+
+
+PREMISSAS_PADRAO.update(normalizar_premissas(json.loads(settings.PROJECTION_ASSUMPTIONS or "{}")))
+
+PERCENTIS = (10, 25, 50, 75, 90)
+# Teto de elementos float64 de cada array intermediário (caminhos x meses x tipos ou
+# objetivos); os caminhos são gerados em lotes para respeitá-lo com qualquer parâmetro
+MAX_ELEMENTOS_BLOCO = 1_000_000
+# Premissas enviadas na requisição (cada uma pode virar um tipo na simulação)
+MAX_PREMISSAS = 50
+
+_memo = TTLCache(maxsize=settings.PROJECTION_CACHE_SIZE, ttl=settings.PROJECTION_CACHE_TTL)
+_projecoes = singleflight.grupo("projecoes")
+
+
+def _tipo(investimento: dict, premissas: Dict[str, dict]) -> str:
+    tipo = _slug(investimento.get("tipo") or "")
+    if tipo in premissas:
+        return tipo
+    # Apelido do tipo inteiro ou da primeira palavra ("CDB Banco X", "Tesouro IPCA+ 2035")
+    for candidato in (tipo, tipo.split("_")[0]):
+        apelido = APELIDOS_TIPO.get(candidato)
+        if apelido in premissas:
+            return apelido
+    return "padrao"
+
+
+def _chave(objetivos: List[dict], premissas: Dict[str, dict], anos: int, simulacoes: int, aporte_mensal: float) -> str:
+    """Hash da carteira (objetivos, metas e posições por tipo) e das premissas: muda a cada alteração relevante."""
+    carteira = sorted(
+        (
+            o["id"],
+            o.get("nome") or "",
+            float(o.get("valor_meta") or 0),
+            sorted((_tipo(i, premissas), float(i.get("valor") or 0)) for i in o.get("investimentos") or []),
+        )
+        for o in objetivos
+    )
+    conteudo = json.dumps([carteira, sorted(premissas.items()), anos, simulacoes, aporte_mensal], default=str)
+    return hashlib.sha256(conteudo.encode()).hexdigest()
+
+
+def _fatores(premissas: List[dict], meses: int, simulacoes: int, rng: np.random.Generator) -> Tuple[np.ndarray, np.ndarray]:
+    """Crescimento acumulado por tipo, compartilhado por todos os objetivos (mesmo cenário de mercado).
+
+    Retorna ``G[n, m, k]`` (quanto 1 real aplicado no início vale ao fim do mês m no
+    caminho n) e ``S[n, m, k]`` (quanto vale um aporte de 1 real por mês até o mês m).
+    """
+    retorno = np.array([p["retorno_anual"] for p in premissas])
+    volatilidade = np.array([p["volatilidade_anual"] for p in premissas]) / np.sqrt(12)
+    # Log-retornos mensais com média ajustada para que E[crescimento anual] = 1 + retorno
+    media = np.log1p(retorno) / 12 - volatilidade ** 2 / 2
+    log_g = np.cumsum(media + volatilidade * rng.standard_normal((simulacoes, meses, len(premissas))), axis=1)
+    g = np.exp(log_g)
+    # Aporte feito no início do mês j rende G[m] / G[j - 1]
+    anteriores = np.concatenate([np.zeros((simulacoes, 1, len(premissas))), log_g[:, :-1]], axis=1)
+    s = g * np.cumsum(np.exp(-anteriores), axis=1)
+    return g, s
+
+
+def simular(objetivos: List[dict], premissas: Dict[str, dict], anos: int, simulacoes: int,
+            aporte_mensal: float, semente: int) -> List[dict]:
+    """Monte Carlo de todos os objetivos de uma carteira, vetorizado por lotes de caminhos."""
+    tipos = sorted({_tipo(i, premissas) for o in objetivos for i in o.get("investimentos") or []} | {"padrao"})
+    indice = {t: k for k, t in enumerate(tipos)}
+    meses = anos * 12
+
+    # Posição atual por objetivo e tipo; o aporte segue a mesma composição
+    # (objetivo ainda sem investimentos aporta em "padrao")
+    posicoes = np.zeros((len(objetivos), len(tipos)))
+    for o, objetivo in enumerate(objetivos):
+        for inv in objetivo.get("investimentos") or []:
+            posicoes[o, indice[_tipo(inv, premissas)]] += float(inv.get("valor") or 0)
+    totais = posicoes.sum(axis=1)
+    pesos = np.where(totais[:, None] > 0, posicoes / np.where(totais > 0, totais, 1)[:, None], 0)
+    pesos[totais == 0, indice["padrao"]] = 1
+    aportes = aporte_mensal * pesos
+    metas = np.array([float(o.get("valor_meta") or 0) for o in objetivos])
+
+    premissas_tipos = [premissas[t] for t in tipos]
+    pontos = np.arange(11, meses, 12)  # fim de cada ano
+
+    resultados = []
+    # Objetivos em blocos (as trajetórias anuais de todos os caminhos ficam em memória)
+    # e, dentro de cada bloco, caminhos em lotes do mesmo tamanho em todos os blocos
+    bloco = max(1, MAX_ELEMENTOS_BLOCO // (simulacoes * len(pontos)))
+    lote = max(1, MAX_ELEMENTOS_BLOCO // (meses * max(len(tipos), min(bloco, len(objetivos)))))
+    for inicio in range(0, len(objetivos), bloco):
+        fatia = slice(inicio, inicio + bloco)
+        n_objetivos = len(objetivos[fatia])
+        anuais = np.empty((simulacoes, len(pontos), n_objetivos))
+        primeiro_mes = np.empty((simulacoes, n_objetivos), dtype=np.int64)
+        for c, de in enumerate(range(0, simulacoes, lote)):
+            ate = min(de + lote, simulacoes)
+            # Semente por lote: todos os blocos de objetivos veem o mesmo cenário de mercado
+            g, s = _fatores(premissas_tipos, meses, ate - de, np.random.default_rng([semente, c]))
+            # valores[n, m, o]: patrimônio do objetivo o ao fim do mês m no caminho n
+            valores = g @ posicoes[fatia].T + s @ aportes[fatia].T
+            anuais[de:ate] = valores[:, pontos, :]
+            atingiu = valores >= metas[fatia]
+            # Primeiro mês em que a meta foi atingida; caminhos que não atingiram ficam além do horizonte
+            primeiro_mes[de:ate] = np.where(atingiu.any(axis=1), atingiu.argmax(axis=1) + 1, meses + 1)
+        trajetorias = np.percentile(anuais, PERCENTIS, axis=0)
+        alcancou = primeiro_mes <= meses
+        meses_ate_meta = np.percentile(primeiro_mes, PERCENTIS, axis=0)
+
+        for j, objetivo in enumerate(objetivos[fatia]):
+            o = inicio + j
+            com_meta = metas[o] > 0
+            resultados.append({
+                "objetivo_id": objetivo["id"],
+                "nome": objetivo.get("nome"),
+                "valor_atual": float(totais[o]),
+                "valor_meta": float(metas[o]) if com_meta else None,
+                "probabilidade_meta": float(alcancou[:, j].mean()) if com_meta else None,
+                "meses_ate_meta": {
+                    f"p{p}": (int(m) if m <= meses else None)
+                    for p, m in zip(PERCENTIS, meses_ate_meta[:, j])
+                } if com_meta else None,
+                "trajetoria": [{"mes": 0, **{f"p{p}": float(totais[o]) for p in PERCENTIS}}] + [
+                    {"mes": int(mes) + 1, **{f"p{p}": float(trajetorias[i, t, j]) for i, p in enumerate(PERCENTIS)}}
+                    for t, mes in enumerate(pontos)
+                ],
+            })
+    return resultados
+
+
+async def projetar(cliente_id: str, objetivos: List[dict], premissas: Optional[Dict[str, dict]],
+                   anos: int, simulacoes: int, aporte_mensal: float) -> dict:
+    """Projeção memoizada por (hash da carteira, premissas, parâmetros).
+
+    A mesma carteira com os mesmos parâmetros devolve o resultado guardado; o
+    cálculo roda fora do event loop e requisições simultâneas iguais o compartilham.
+    """
+    premissas = {**PREMISSAS_PADRAO, **normalizar_premissas(premissas or {})}
+    chave = _chave(objetivos, premissas, anos, simulacoes, aporte_mensal)
+    resultado = _memo.get(chave)
+    if resultado is None:
+        async def calcular():
+            # Semente derivada da chave: a mesma carteira dá sempre o mesmo resultado
+            objetivos_projetados = await run_in_threadpool(
+                simular, objetivos, premissas, anos, simulacoes, aporte_mensal, int(chave[:16], 16)
+            )
+            usadas = {_tipo(i, premissas) for o in objetivos for i in o.get("investimentos") or []} | {"padrao"}
+            calculado = {
+                "anos": anos,
+                "simulacoes": simulacoes,
+                "aporte_mensal": aporte_mensal,
+                "premissas": {t: premissas[t] for t in sorted(usadas)},
+                "objetivos": objetivos_projetados,
+            }
+            _memo.set(chave, calculado)
+            return calculado
+        resultado = await _projecoes.executar(chave, calcular)
+    return {"cliente_id": cliente_id, **resultado}
@@ -0,0 +1,32 @@
+import time
+from typing import Dict, Tuple
+from app import singleflight
+from app.config import settings
+from app.database import get_db
+
+_estado = {"aquecido": False, "verificado_em": 0.0, "resultado": None}
+
+
+def marcar_aquecido() -> None:
+    _estado["aquecido"] = True
+
+
+async def _verificar_upstream() -> Dict[str, bool]:
+    resultado = await get_db().verificar(settings.READY_TIMEOUT)
+    _estado["resultado"] = resultado
+    _estado["verificado_em"] = time.monotonic()
+    return resultado
+
+
+async def verificar() -> Tuple[bool, dict]:
+    """Pronto = inicialização concluída e Supabase acessível.
+
+    O resultado fica guardado por ``READY_CACHE_TTL`` segundos e verificações
+    simultâneas compartilham a mesma chamada, para que o probe não vire carga.
+    """
+    if not _estado["aquecido"]:
+        return False, {"aquecido": False}
+    resultado = _estado["resultado"]
+    if resultado is None or time.monotonic() - _estado["verificado_em"] > settings.READY_CACHE_TTL:
+        resultado = await singleflight.grupo("prontidao").executar("upstream", _verificar_upstream)
+    return all(resultado.values()), {"aquecido": True, **resultado}
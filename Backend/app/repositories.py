@@ -0,0 +1,438 @@
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from fastapi import Depends
+from fastapi.security import HTTPAuthorizationCredentials
+from postgrest import APIError
+from app.auth import security
+from app.config import settings
+from app.database import Database, get_db
+from app.pagination import Paginacao, colunas, decode_cursor, escape_prefixo, paginar, proxima_pagina
+from app.singleflight import coalescido
+
+CAMPOS_CLIENTE = ("id", "user_id", "nome", "email", "telefone", "created_at", "updated_at")
+CAMPOS_OBJETIVO = ("id", "cliente_id", "nome", "descricao", "valor_meta", "created_at", "updated_at")
+CAMPOS_INVESTIMENTO = ("id", "objetivo_id", "nome", "valor", "tipo", "created_at", "updated_at")
+
+# Código do Postgres para violação de política RLS
+RLS_VIOLATION = "42501"
+
+
+class Repository:
+    """Base dos repositórios.
+
+    Com ``token`` (modo ``DB_RLS_WRITES``), as escritas são enviadas com o JWT do
+    usuário e o RLS garante a posse: cada alteração é um único comando e zero
+    linhas afetadas significa "não encontrado". Sem ``token``, a posse é verificada
+    com uma consulta antes da escrita.
+    """
+
+    TABELA: str = ""
+    # Colunas lidas por obter_varios quando nenhuma projeção é pedida
+    COLUNAS_ESCRITA: Tuple[str, ...] = ()
+
+    def __init__(self, db: Database, token: Optional[str] = None):
+        self.db = db
+        self.token = token
+
+    def _escrita(self, table: str):
+        return self.db.table(table, token=self.token)
+
+    async def _inserir_com_rls(self, table: str, data) -> Optional[List[dict]]:
+        try:
+            response = await self._escrita(table).insert(data).execute()
+        except APIError as e:
+            if e.code == RLS_VIOLATION:
+                return None
+            raise
+        return response.data
+
+    # Escritas em lote: um único comando para todas as linhas
+    async def inserir_varios(self, rows: List[dict]) -> List[dict]:
+        """Insere as linhas (com ``id`` já definido), ignorando ids que já existem.
+
+        Retorna apenas as linhas efetivamente inseridas, o que torna a operação
+        idempotente quando os ids são derivados de uma chave de idempotência.
+        """
+        if not rows:
+            return []
+        response = await self._escrita(self.TABELA).upsert(rows, on_conflict="id", ignore_duplicates=True).execute()
+        return response.data
+
+    async def atualizar_varios(self, user_id: str, alteracoes: Dict[str, dict]) -> List[dict]:
+        """Aplica ``{id: campos}`` num único UPDATE (lote_atualizar_*, database_lotes.sql).
+
+        Só os campos enviados mudam e o dono é filtrado no próprio comando: uma linha
+        removida no meio do caminho não volta, e edições concorrentes de outros campos
+        são preservadas. Retorna as linhas atualizadas.
+        """
+        if not alteracoes:
+            return []
+        response = await self.db.rpc(f"lote_atualizar_{self.TABELA}", {
+            "p_user_id": user_id,
+            "p_itens": [{"id": row_id, "dados": campos} for row_id, campos in alteracoes.items()],
+        }, token=self.token).execute()
+        return response.data or []
+
+    async def deletar_varios(self, ids: List[str]) -> List[dict]:
+        """Remove as linhas e retorna as removidas (para o feed saber de qual carteira eram)."""
+        if not ids:
+            return []
+        response = await self._escrita(self.TABELA).delete().in_("id", ids).execute()
+        return response.data
+
+
+class ClientesRepository(Repository):
+    TABELA = "clientes"
+    COLUNAS_ESCRITA = ("id", "user_id", "nome", "email", "telefone")
+    ORDENAVEIS = ("created_at", "nome", "email")
+
+    @coalescido("leituras")
+    async def listar(
+        self,
+        user_id: str,
+        pagina: Optional[Paginacao] = None,
+        nome: Optional[str] = None,
+        email: Optional[str] = None,
+    ) -> Tuple[List[dict], Optional[str]]:
+        pagina = pagina or Paginacao()
+        query = self.db.table("clientes").select(colunas(pagina, CAMPOS_CLIENTE)).eq("user_id", user_id)
+        if nome:
+            query = query.ilike("nome", escape_prefixo(nome))
+        if email:
+            query = query.ilike("email", escape_prefixo(email))
+        response = await paginar(query, pagina, self.ORDENAVEIS).execute()
+        return proxima_pagina(response.data, pagina)
+
+    @coalescido("leituras")
+    async def buscar(self, user_id: str, q: str, pagina: Paginacao) -> Tuple[List[dict], Optional[str]]:
+        """Busca ranqueada (database_busca.sql), paginada por keyset em ``relevancia, id``."""
+        params = {"p_user_id": user_id, "p_q": q, "p_limite": pagina.limit + 1}
+        if pagina.cursor:
+            params["p_apos_relevancia"], params["p_apos_id"] = decode_cursor(pagina)
+        response = await self.db.rpc("buscar_clientes", params).execute()
+        return proxima_pagina(response.data, pagina)
+
+    @coalescido("leituras")
+    async def obter(self, cliente_id: str, user_id: str) -> Optional[dict]:
+        response = await self.db.table("clientes").select("*").eq("id", cliente_id).eq("user_id", user_id).execute()
+        return response.data[0] if response.data else None
+
+    @coalescido("leituras")
+    async def pertence_ao_usuario(self, cliente_id: str, user_id: str) -> bool:
+        response = await self.db.table("clientes").select("id").eq("id", cliente_id).eq("user_id", user_id).execute()
+        return bool(response.data)
+
+    async def ids_do_usuario(self, ids: List[str], user_id: str) -> set:
+        response = await self.db.table("clientes").select("id").in_("id", list(ids)).eq("user_id", user_id).execute()
+        return {row["id"] for row in response.data}
+
+    async def obter_varios(self, ids: List[str], user_id: str, colunas: Optional[str] = None) -> List[dict]:
+        response = await (
+            self.db.table("clientes").select(colunas or ",".join(self.COLUNAS_ESCRITA))
+            .in_("id", list(ids)).eq("user_id", user_id).execute()
+        )
+        return response.data
+
+    @coalescido("leituras")
+    async def obter_carteira(self, cliente_id: str, user_id: str) -> Optional[dict]:
+        # Uma única consulta: cliente (filtrado pelo dono) + objetivos + investimentos embutidos
+        response = await (
+            self.db.table("clientes")
+            .select("id, objetivos(*, investimentos(*))")
+            .eq("id", cliente_id)
+            .eq("user_id", user_id)
+            .execute()
+        )
+        return response.data[0] if response.data else None
+
+    async def percorrer_carteiras(self, user_id: str, tamanho: int) -> AsyncIterator[dict]:
+        """Todos os clientes do usuário com objetivos e investimentos embutidos, em blocos por cursor."""
+        pagina = Paginacao(limit=tamanho)
+        while True:
+            query = self.db.table("clientes").select("*, objetivos(*, investimentos(*))").eq("user_id", user_id)
+            response = await paginar(query, pagina, self.ORDENAVEIS).execute()
+            rows, pagina.cursor = proxima_pagina(response.data, pagina)
+            for row in rows:
+                yield row
+            if not pagina.cursor:
+                break
+
+    async def criar(self, data: dict) -> dict:
+        response = await self._escrita("clientes").insert(data).execute()
+        return response.data[0]
+
+    # clientes tem user_id na própria linha: o filtro de posse vai no mesmo comando
+    async def atualizar(self, cliente_id: str, user_id: str, data: dict) -> Optional[dict]:
+        response = await self._escrita("clientes").update(data).eq("id", cliente_id).eq("user_id", user_id).execute()
+        return response.data[0] if response.data else None
+
+    async def deletar(self, cliente_id: str, user_id: str) -> bool:
+        response = await self._escrita("clientes").delete().eq("id", cliente_id).eq("user_id", user_id).execute()
+        return bool(response.data)
+
+
+class ObjetivosRepository(Repository):
+    TABELA = "objetivos"
+    COLUNAS_ESCRITA = ("id", "cliente_id", "nome", "descricao", "valor_meta")
+    ORDENAVEIS = ("created_at", "nome", "valor_meta")
+
+    @coalescido("leituras")
+    async def listar_por_cliente(
+        self,
+        cliente_id: str,
+        pagina: Optional[Paginacao] = None,
+        nome: Optional[str] = None,
+        valor_meta_min: Optional[float] = None,
+        valor_meta_max: Optional[float] = None,
+    ) -> Tuple[List[dict], Optional[str]]:
+        pagina = pagina or Paginacao()
+        query = self.db.table("objetivos").select(colunas(pagina, CAMPOS_OBJETIVO)).eq("cliente_id", cliente_id)
+        if nome:
+            query = query.ilike("nome", escape_prefixo(nome))
+        if valor_meta_min is not None:
+            query = query.gte("valor_meta", valor_meta_min)
+        if valor_meta_max is not None:
+            query = query.lte("valor_meta", valor_meta_max)
+        response = await paginar(query, pagina, self.ORDENAVEIS).execute()
+        return proxima_pagina(response.data, pagina)
+
+    async def ids_do_cliente(self, cliente_id: str) -> List[str]:
+        response = await self.db.table("objetivos").select("id").eq("cliente_id", cliente_id).execute()
+        return [row["id"] for row in response.data]
+
+    @coalescido("leituras")
+    async def pertence_ao_usuario(self, objetivo_id: str, user_id: str) -> bool:
+        check = await (
+            self.db.table("objetivos")
+            .select("id, clientes!inner(user_id)")
+            .eq("id", objetivo_id)
+            .eq("clientes.user_id", user_id)
+            .execute()
+        )
+        return bool(check.data)
+
+    async def ids_do_usuario(self, ids: List[str], user_id: str) -> set:
+        return {row["id"] for row in await self.obter_varios(ids, user_id, colunas="id")}
+
+    async def obter_varios(self, ids: List[str], user_id: str, colunas: Optional[str] = None) -> List[dict]:
+        response = await (
+            self.db.table("objetivos")
+            .select(f"{colunas or ','.join(self.COLUNAS_ESCRITA)}, clientes!inner(user_id)")
+            .in_("id", list(ids))
+            .eq("clientes.user_id", user_id)
+            .execute()
+        )
+        for row in response.data:
+            row.pop("clientes", None)
+        return response.data
+
+    async def criar(self, data: dict, user_id: str) -> Optional[dict]:
+        if self.token:
+            rows = await self._inserir_com_rls("objetivos", data)
+            return rows[0] if rows else None
+        if not await ClientesRepository(self.db).pertence_ao_usuario(data["cliente_id"], user_id):
+            return None
+        response = await self.db.table("objetivos").insert(data).execute()
+        return response.data[0]
+
+    async def atualizar(self, objetivo_id: str, user_id: str, data: dict) -> Optional[dict]:
+        if not self.token and not await self.pertence_ao_usuario(objetivo_id, user_id):
+            return None
+        response = await self._escrita("objetivos").update(data).eq("id", objetivo_id).execute()
+        return response.data[0] if response.data else None
+
+    async def deletar(self, objetivo_id: str, user_id: str) -> Optional[dict]:
+        if not self.token and not await self.pertence_ao_usuario(objetivo_id, user_id):
+            return None
+        response = await self._escrita("objetivos").delete().eq("id", objetivo_id).execute()
+        return response.data[0] if response.data else None
+
+
+class InvestimentosRepository(Repository):
+    TABELA = "investimentos"
+    COLUNAS_ESCRITA = ("id", "objetivo_id", "nome", "valor", "tipo")
+    ORDENAVEIS = ("created_at", "nome", "valor")
+
+    @coalescido("leituras")
+    async def listar_por_objetivo(
+        self,
+        objetivo_id: str,
+        pagina: Optional[Paginacao] = None,
+        nome: Optional[str] = None,
+        tipo: Optional[str] = None,
+        valor_min: Optional[float] = None,
+        valor_max: Optional[float] = None,
+    ) -> Tuple[List[dict], Optional[str]]:
+        pagina = pagina or Paginacao()
+        query = self.db.table("investimentos").select(colunas(pagina, CAMPOS_INVESTIMENTO)).eq("objetivo_id", objetivo_id)
+        if nome:
+            query = query.ilike("nome", escape_prefixo(nome))
+        if tipo:
+            query = query.eq("tipo", tipo)
+        if valor_min is not None:
+            query = query.gte("valor", valor_min)
+        if valor_max is not None:
+            query = query.lte("valor", valor_max)
+        response = await paginar(query, pagina, self.ORDENAVEIS).execute()
+        return proxima_pagina(response.data, pagina)
+
+    @coalescido("leituras")
+    async def pertence_ao_usuario(self, investimento_id: str, user_id: str) -> bool:
+        check = await (
+            self.db.table("investimentos")
+            .select("id, objetivos!inner(clientes!inner(user_id))")
+            .eq("id", investimento_id)
+            .eq("objetivos.clientes.user_id", user_id)
+            .execute()
+        )
+        return bool(check.data)
+
+    async def ids_do_usuario(self, ids: List[str], user_id: str) -> set:
+        return {row["id"] for row in await self.obter_varios(ids, user_id, colunas="id")}
+
+    async def obter_varios(self, ids: List[str], user_id: str, colunas: Optional[str] = None) -> List[dict]:
+        response = await (
+            self.db.table("investimentos")
+            .select(f"{colunas or ','.join(self.COLUNAS_ESCRITA)}, objetivos!inner(clientes!inner(user_id))")
+            .in_("id", list(ids))
+            .eq("objetivos.clientes.user_id", user_id)
+            .execute()
+        )
+        for row in response.data:
+            row.pop("objetivos", None)
+        return response.data
+
+    async def criar(self, data: dict, user_id: str) -> Optional[dict]:
+        if self.token:
+            rows = await self._inserir_com_rls("investimentos", data)
+            return rows[0] if rows else None
+        if not await ObjetivosRepository(self.db).pertence_ao_usuario(data["objetivo_id"], user_id):
+            return None
+        response = await self.db.table("investimentos").insert(data).execute()
+        return response.data[0]
+
+    async def atualizar(self, investimento_id: str, user_id: str, data: dict) -> Optional[dict]:
+        if not self.token and not await self.pertence_ao_usuario(investimento_id, user_id):
+            return None
+        response = await self._escrita("investimentos").update(data).eq("id", investimento_id).execute()
+        return response.data[0] if response.data else None
+
+    async def deletar(self, investimento_id: str, user_id: str) -> Optional[dict]:
+        if not self.token and not await self.pertence_ao_usuario(investimento_id, user_id):
+            return None
+        response = await self._escrita("investimentos").delete().eq("id", investimento_id).execute()
+        return response.data[0] if response.data else None
+
+
+class ResumoRepository(Repository):
+    """Resumo por usuário (database_resumo.sql), mantido pelos triggers do banco."""
+
+    TABELA = "resumo_usuarios"
+
+    @coalescido("leituras")
+    async def obter(self, user_id: str) -> Optional[dict]:
+        response = await (
+            self.db.table("resumo_usuarios")
+            .select("*, resumo_alocacao(tipo, total, quantidade)")
+            .eq("user_id", user_id)
+            .execute()
+        )
+        return response.data[0] if response.data else None
+
+    async def reconstruir(self, user_id: str) -> None:
+        # Com a chave service_role: a função não é executável por anon nem pelo JWT do usuário
+        await self.db.rpc_servico("resumo_reconstruir", {"p_user_id": user_id}).execute()
+
+
+class HistoricoRepository(Repository):
+    """Histórico de valores dos investimentos (database_historico.sql)."""
+
+    TABELA = "investimentos_historico"
+
+    @coalescido("leituras")
+    async def valores(
+        self,
+        user_id: str,
+        inicio: datetime,
+        fim: datetime,
+        intervalo: str,
+        investimento_id: Optional[str] = None,
+        objetivo_id: Optional[str] = None,
+        cliente_id: Optional[str] = None,
+    ) -> List[dict]:
+        response = await self.db.rpc("historico_valores", {
+            "p_user_id": user_id,
+            "p_inicio": inicio.isoformat(),
+            "p_fim": fim.isoformat(),
+            "p_intervalo": intervalo,
+            "p_investimento_id": investimento_id,
+            "p_objetivo_id": objetivo_id,
+            "p_cliente_id": cliente_id,
+        }).execute()
+        return response.data
+
+    async def registrar(self, user_id: str, cotacoes: List[dict], data: Optional[datetime] = None) -> List[str]:
+        """Grava as cotações num único comando; retorna os ids de investimento gravados.
+
+        Com a chave service_role (a função não é executável por anon nem pelo JWT do
+        usuário); a posse vem do filtro por ``user_id`` dentro da função.
+        """
+        response = await self.db.rpc_servico("historico_registrar", {
+            "p_user_id": user_id,
+            "p_itens": cotacoes,
+            "p_registrado_em": data.isoformat() if data else None,
+        }).execute()
+        return response.data or []
+
+
+class SyncRepository(Repository):
+    """Alterações desde um cursor para a sincronização incremental (database_sync.sql)."""
+
+    TABELA = "sync_remocoes"
+
+    @coalescido("leituras")
+    async def alteracoes(
+        self,
+        user_id: str,
+        desde: Optional[datetime],
+        apos_tabela: str,
+        apos_id: str,
+        limite: int,
+    ) -> dict:
+        """``{"agora": ..., "itens": [...]}``: até ``limite`` itens depois da posição, em ordem."""
+        response = await self.db.rpc("sync_alteracoes", {
+            "p_user_id": user_id,
+            "p_desde": desde.isoformat() if desde else None,
+            "p_apos_tabela": apos_tabela,
+            "p_apos_id": apos_id,
+            "p_limite": limite,
+        }).execute()
+        return response.data
+
+
+def get_write_token(credentials: HTTPAuthorizationCredentials = Depends(security)) -> Optional[str]:
+    return credentials.credentials if settings.DB_RLS_WRITES else None
+
+
+def get_clientes_repository(db: Database = Depends(get_db), token: Optional[str] = Depends(get_write_token)) -> ClientesRepository:
+    return ClientesRepository(db, token)
+
+
+def get_objetivos_repository(db: Database = Depends(get_db), token: Optional[str] = Depends(get_write_token)) -> ObjetivosRepository:
+    return ObjetivosRepository(db, token)
+
+
+def get_investimentos_repository(db: Database = Depends(get_db), token: Optional[str] = Depends(get_write_token)) -> InvestimentosRepository:
+    return InvestimentosRepository(db, token)
+
+
+def get_resumo_repository(db: Database = Depends(get_db), token: Optional[str] = Depends(get_write_token)) -> ResumoRepository:
+    return ResumoRepository(db, token)
+
+
+def get_historico_repository(db: Database = Depends(get_db), token: Optional[str] = Depends(get_write_token)) -> HistoricoRepository:
+    return HistoricoRepository(db, token)
+
+
+def get_sync_repository(db: Database = Depends(get_db), token: Optional[str] = Depends(get_write_token)) -> SyncRepository:
+    return SyncRepository(db, token)
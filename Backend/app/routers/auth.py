@@ -1,51 +1,50 @@
 from fastapi import APIRouter, HTTPException, status, Depends
-from app.models import UserCreate, UserLogin, Token
-from app.database import supabase
-from app.auth import get_current_user
+from fastapi.security import HTTPAuthorizationCredentials
+from jose import jwt
+from app.admissao import indisponibilidade
+from app.models import UserCreate, UserLogin, Token, RefreshRequest
+from app.database import Database, get_db
+from app.auth import get_current_user, security
+from app.eventos import central
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
 
+def _resposta_sessao(session) -> dict:
+    return {
+        "access_token": session.access_token,
+        "refresh_token": session.refresh_token,
+        "expires_in": session.expires_in,
+        "user": {
+            "id": session.user.id,
+            "email": session.user.email
+        }
+    }
+
 @router.post("/register", response_model=Token)
-async def register(user: UserCreate):
+async def register(user: UserCreate, db: Database = Depends(get_db)):
     try:
-        # Registrar usuário no Supabase
-        auth_response = supabase.auth.sign_up({
+        # Registrar usuário no Supabase (cliente de Auth próprio desta requisição)
+        auth_response = await db.auth_sessao().sign_up({
             "email": user.email,
             "password": user.password
         })
         
         if auth_response.user:
-            # Se não houver sessão (email precisa ser confirmado), fazer login automaticamente
-            if not auth_response.session:
-                # Tentar fazer login com as credenciais fornecidas
-                login_response = supabase.auth.sign_in_with_password({
-                    "email": user.email,
-                    "password": user.password
-                })
-                
-                if login_response.session:
-                    return {
-                        "access_token": login_response.session.access_token,
-                        "user": {
-                            "id": login_response.user.id,
-                            "email": login_response.user.email
-                        }
-                    }
-                else:
-                    # Se ainda não conseguir fazer login, informar que precisa confirmar email
-                    raise HTTPException(
-                        status_code=status.HTTP_201_CREATED,
-                        detail="Usuário criado. Por favor, confirme seu email antes de fazer login."
-                    )
-            else:
-                # Se já houver sessão, retornar normalmente
-                return {
-                    "access_token": auth_response.session.access_token,
-                    "user": {
-                        "id": auth_response.user.id,
-                        "email": auth_response.user.email
-                    }
-                }
+            # Com sessão no sign_up, não há segunda chamada ao Supabase
+            if auth_response.session:
+                return _resposta_sessao(auth_response.session)
+            # Sem sessão: fazer login com as credenciais fornecidas
+            login_response = await db.auth_sessao().sign_in_with_password({
+                "email": user.email,
+                "password": user.password
+            })
+            if login_response.session:
+                return _resposta_sessao(login_response.session)
+            # Se ainda não conseguir fazer login, informar que precisa confirmar email
+            raise HTTPException(
+                status_code=status.HTTP_201_CREATED,
+                detail="Usuário criado. Por favor, confirme seu email antes de fazer login."
+            )
         else:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -54,53 +53,76 @@ async def register(user: UserCreate):
     except HTTPException:
         raise
     except Exception as e:
+        # Supabase Auth indisponível vira 503/504, não erro de cadastro
+        erro = indisponibilidade(e)
+        if erro:
+            raise erro
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
         )
 
 @router.post("/login", response_model=Token)
-async def login(user: UserLogin):
+async def login(user: UserLogin, db: Database = Depends(get_db)):
     try:
-        # Login no Supabase
-        auth_response = supabase.auth.sign_in_with_password({
+        # Login no Supabase; a sessão fica só no cliente desta requisição
+        auth_response = await db.auth_sessao().sign_in_with_password({
             "email": user.email,
             "password": user.password
         })
         
-        if auth_response.user:
-            return {
-                "access_token": auth_response.session.access_token,
-                "user": {
-                    "id": auth_response.user.id,
-                    "email": auth_response.user.email
-                }
-            }
+        if auth_response.session:
+            return _resposta_sessao(auth_response.session)
         else:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Email ou senha incorretos"
             )
     except Exception as e:
+        erro = indisponibilidade(e)
+        if erro:
+            raise erro
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Email ou senha incorretos"
         )
 
+@router.post("/refresh", response_model=Token)
+async def refresh(dados: RefreshRequest, db: Database = Depends(get_db)):
+    """Troca o refresh token por uma sessão nova (o refresh token usado deixa de valer)"""
+    try:
+        auth_response = await db.auth_sessao().refresh_session(dados.refresh_token)
+        return _resposta_sessao(auth_response.session)
+    except Exception as e:
+        erro = indisponibilidade(e)
+        if erro:
+            raise erro
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Refresh token inválido ou expirado"
+        )
+
 @router.get("/me")
 async def get_me(current_user = Depends(get_current_user)):
     """Retorna as informações do usuário autenticado"""
     return {
-        "id": current_user["id"],
-        "email": current_user["email"]
+        "id": current_user.id,
+        "email": current_user.email
     }
 
 @router.post("/logout")
-async def logout():
+async def logout(credentials: HTTPAuthorizationCredentials = Depends(security), db: Database = Depends(get_db)):
     try:
-        supabase.auth.sign_out()
+        # Revoga só a sessão deste token (o access token segue válido até expirar)
+        await db.auth_sessao().admin.sign_out(credentials.credentials, "local")
+        # O Supabase aceitou o token: fecha as conexões do feed abertas por esta sessão
+        claims = jwt.get_unverified_claims(credentials.credentials)
+        central.encerrar_sessao(claims.get("sub"), claims.get("session_id"))
         return {"message": "Logout realizado com sucesso"}
     except Exception as e:
+        erro = indisponibilidade(e)
+        if erro:
+            raise erro
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
@@ -1,63 +1,89 @@
-from fastapi import APIRouter, HTTPException, status, Depends
-from typing import List
-from app.models import Objetivo, ObjetivoCreate, ObjetivoUpdate, Investimento, InvestimentoCreate, InvestimentoUpdate, ClienteCarteira
-from app.database import supabase
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from fastapi import APIRouter, HTTPException, Query, status, Depends
+from typing import List, Optional
+from app.models import (
+    Objetivo, ObjetivoCreate, ObjetivoUpdate, Investimento, InvestimentoCreate, InvestimentoUpdate, ClienteCarteira,
+    ProjecaoParametros, ProjecaoCliente, ResumoCarteiras, HistoricoValores, CotacoesLote, ResultadoCotacoes,
+)
+from app import projecao
+from app.config import settings
+from app.repositories import (
+    ClientesRepository, ObjetivosRepository, InvestimentosRepository, ResumoRepository, HistoricoRepository,
+    get_clientes_repository, get_objetivos_repository, get_investimentos_repository, get_resumo_repository,
+    get_historico_repository,
+)
 from app.auth import get_current_user
+from app.pagination import Paginacao, paginacao_params, cabecalhos_paginacao
+from app.http_cache import LeituraEmCache, leitura_em_cache, invalidar_leituras
+from app.eventos import central
+from app.serializacao import resposta_json
 
 router = APIRouter(prefix="/carteiras", tags=["carteiras"])
 
 # Endpoints para Objetivos
 @router.get("/cliente/{cliente_id}/objetivos", response_model=List[Objetivo])
-async def listar_objetivos(cliente_id: str, current_user = Depends(get_current_user)):
+async def listar_objetivos(
+    cliente_id: str,
+    nome: Optional[str] = None,
+    valor_meta_min: Optional[float] = None,
+    valor_meta_max: Optional[float] = None,
+    pagina: Paginacao = Depends(paginacao_params),
+    current_user = Depends(get_current_user),
+    clientes: ClientesRepository = Depends(get_clientes_repository),
+    objetivos: ObjetivosRepository = Depends(get_objetivos_repository),
+    cache: LeituraEmCache = Depends(leitura_em_cache),
+):
     try:
+        em_cache = await cache.buscar()
+        if em_cache:
+            return em_cache
         # Verificar se o cliente pertence ao usuário
-        cliente = supabase.table("clientes").select("id").eq("id", cliente_id).eq("user_id", current_user.id).execute()
-        if not cliente.data:
+        if not await clientes.pertence_ao_usuario(cliente_id, current_user.id):
             raise HTTPException(status_code=404, detail="Cliente não encontrado")
-        
-        response = supabase.table("objetivos").select("*").eq("cliente_id", cliente_id).execute()
-        
-        # Converter Decimal para float em valor_meta se necessário
-        objetivos = response.data
-        for obj in objetivos:
-            if 'valor_meta' in obj and obj['valor_meta'] is not None:
-                obj['valor_meta'] = float(obj['valor_meta'])
-        
-        return objetivos
+
+        objetivos_data, next_cursor = await objetivos.listar_por_cliente(
+            cliente_id, pagina, nome=nome, valor_meta_min=valor_meta_min, valor_meta_max=valor_meta_max
+        )
+        modelo = None if pagina.fields else List[Objetivo]
+        return await cache.guardar(objetivos_data, modelo, cabecalhos_paginacao(next_cursor))
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.post("/objetivos", response_model=Objetivo)
-async def criar_objetivo(objetivo: ObjetivoCreate, current_user = Depends(get_current_user)):
+async def criar_objetivo(
+    objetivo: ObjetivoCreate,
+    current_user = Depends(get_current_user),
+    objetivos: ObjetivosRepository = Depends(get_objetivos_repository),
+):
     try:
-        # Verificar se o cliente pertence ao usuário
-        cliente = supabase.table("clientes").select("id").eq("id", objetivo.cliente_id).eq("user_id", current_user.id).execute()
-        if not cliente.data:
+        # O cliente precisa pertencer ao usuário
+        objetivo_data = await objetivos.criar(objetivo.dict(), current_user.id)
+        if not objetivo_data:
             raise HTTPException(status_code=404, detail="Cliente não encontrado")
-        
-        response = supabase.table("objetivos").insert(objetivo.dict()).execute()
-        
-        # Converter Decimal para float em valor_meta se necessário
-        objetivo_data = response.data[0]
-        if 'valor_meta' in objetivo_data and objetivo_data['valor_meta'] is not None:
-            objetivo_data['valor_meta'] = float(objetivo_data['valor_meta'])
-        
-        return objetivo_data
+
+        await invalidar_leituras(current_user.id)
+        central.publicar(current_user.id, "objetivos", "insert", objetivo_data)
+        return resposta_json(objetivo_data, Objetivo)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.put("/objetivos/{objetivo_id}", response_model=Objetivo)
-async def atualizar_objetivo(objetivo_id: str, objetivo: ObjetivoUpdate, current_user = Depends(get_current_user)):
+async def atualizar_objetivo(
+    objetivo_id: str,
+    objetivo: ObjetivoUpdate,
+    current_user = Depends(get_current_user),
+    objetivos: ObjetivosRepository = Depends(get_objetivos_repository),
+):
     try:
-        # Verificar se o objetivo pertence a um cliente do usuário
-        check = supabase.table("objetivos").select("*, clientes!inner(user_id)").eq("id", objetivo_id).execute()
-        if not check.data or check.data[0]["clientes"]["user_id"] != current_user.id:
-            raise HTTPException(status_code=404, detail="Objetivo não encontrado")
-        
         # Incluir explicitamente campos que podem ser None/null (como valor_meta)
         update_data = {}
         objetivo_dict = objetivo.dict()
-        
+
         for k, v in objetivo_dict.items():
             if k == 'valor_meta':
                 # Para valor_meta, incluir sempre (mesmo se None/null para remover)
@@ -65,131 +91,403 @@ async def atualizar_objetivo(objetivo_id: str, objetivo: ObjetivoUpdate, current
             elif v is not None:
                 # Para outros campos, só incluir se não for None
                 update_data[k] = v
-        
-        response = supabase.table("objetivos").update(update_data).eq("id", objetivo_id).execute()
-        
-        # Converter Decimal para float em valor_meta se necessário
-        objetivo_data = response.data[0]
-        if 'valor_meta' in objetivo_data and objetivo_data['valor_meta'] is not None:
-            objetivo_data['valor_meta'] = float(objetivo_data['valor_meta'])
-        
-        return objetivo_data
+
+        # Zero linhas alteradas: o objetivo não existe ou não pertence ao usuário
+        objetivo_data = await objetivos.atualizar(objetivo_id, current_user.id, update_data)
+        if not objetivo_data:
+            raise HTTPException(status_code=404, detail="Objetivo não encontrado")
+
+        await invalidar_leituras(current_user.id)
+        central.publicar(current_user.id, "objetivos", "update", objetivo_data, [*update_data, "updated_at"])
+        return resposta_json(objetivo_data, Objetivo)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.delete("/objetivos/{objetivo_id}")
-async def deletar_objetivo(objetivo_id: str, current_user = Depends(get_current_user)):
+async def deletar_objetivo(
+    objetivo_id: str,
+    current_user = Depends(get_current_user),
+    objetivos: ObjetivosRepository = Depends(get_objetivos_repository),
+):
     try:
-        # Verificar se o objetivo pertence a um cliente do usuário
-        check = supabase.table("objetivos").select("*, clientes!inner(user_id)").eq("id", objetivo_id).execute()
-        if not check.data or check.data[0]["clientes"]["user_id"] != current_user.id:
+        removido = await objetivos.deletar(objetivo_id, current_user.id)
+        if not removido:
             raise HTTPException(status_code=404, detail="Objetivo não encontrado")
-        
-        response = supabase.table("objetivos").delete().eq("id", objetivo_id).execute()
+        await invalidar_leituras(current_user.id)
+        central.publicar(current_user.id, "objetivos", "delete", removido)
         return {"message": "Objetivo deletado com sucesso"}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 # Endpoints para Investimentos
 @router.get("/objetivo/{objetivo_id}/investimentos", response_model=List[Investimento])
-async def listar_investimentos(objetivo_id: str, current_user = Depends(get_current_user)):
+async def listar_investimentos(
+    objetivo_id: str,
+    nome: Optional[str] = None,
+    tipo: Optional[str] = None,
+    valor_min: Optional[float] = None,
+    valor_max: Optional[float] = None,
+    pagina: Paginacao = Depends(paginacao_params),
+    current_user = Depends(get_current_user),
+    objetivos: ObjetivosRepository = Depends(get_objetivos_repository),
+    investimentos: InvestimentosRepository = Depends(get_investimentos_repository),
+    cache: LeituraEmCache = Depends(leitura_em_cache),
+):
     try:
+        em_cache = await cache.buscar()
+        if em_cache:
+            return em_cache
         # Verificar se o objetivo pertence a um cliente do usuário
-        check = supabase.table("objetivos").select("*, clientes!inner(user_id)").eq("id", objetivo_id).execute()
-        if not check.data or check.data[0]["clientes"]["user_id"] != current_user.id:
+        if not await objetivos.pertence_ao_usuario(objetivo_id, current_user.id):
             raise HTTPException(status_code=404, detail="Objetivo não encontrado")
-        
-        response = supabase.table("investimentos").select("*").eq("objetivo_id", objetivo_id).execute()
-        # Converter Decimal para float em todos os investimentos
-        investimentos = response.data
-        for inv in investimentos:
-            if 'valor' in inv and inv['valor'] is not None:
-                inv['valor'] = float(inv['valor'])
-        return investimentos
+
+        investimentos_data, next_cursor = await investimentos.listar_por_objetivo(
+            objetivo_id, pagina, nome=nome, tipo=tipo, valor_min=valor_min, valor_max=valor_max
+        )
+        modelo = None if pagina.fields else List[Investimento]
+        return await cache.guardar(investimentos_data, modelo, cabecalhos_paginacao(next_cursor))
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.post("/investimentos", response_model=Investimento)
-async def criar_investimento(investimento: InvestimentoCreate, current_user = Depends(get_current_user)):
+async def criar_investimento(
+    investimento: InvestimentoCreate,
+    current_user = Depends(get_current_user),
+    investimentos: InvestimentosRepository = Depends(get_investimentos_repository),
+):
     try:
-        # Verificar se o objetivo pertence a um cliente do usuário
-        check = supabase.table("objetivos").select("*, clientes!inner(user_id)").eq("id", investimento.objetivo_id).execute()
-        if not check.data or check.data[0]["clientes"]["user_id"] != current_user.id:
+        # O objetivo precisa pertencer a um cliente do usuário
+        investimento_data = await investimentos.criar(investimento.dict(), current_user.id)
+        if not investimento_data:
             raise HTTPException(status_code=404, detail="Objetivo não encontrado")
-        
-        response = supabase.table("investimentos").insert(investimento.dict()).execute()
-        # Converter Decimal para float se necessário
-        investimento_data = response.data[0]
-        if 'valor' in investimento_data and investimento_data['valor'] is not None:
-            investimento_data['valor'] = float(investimento_data['valor'])
-        return investimento_data
+        await invalidar_leituras(current_user.id)
+        central.publicar(current_user.id, "investimentos", "insert", investimento_data)
+        return resposta_json(investimento_data, Investimento)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.put("/investimentos/{investimento_id}", response_model=Investimento)
-async def atualizar_investimento(investimento_id: str, investimento: InvestimentoUpdate, current_user = Depends(get_current_user)):
+async def atualizar_investimento(
+    investimento_id: str,
+    investimento: InvestimentoUpdate,
+    current_user = Depends(get_current_user),
+    investimentos: InvestimentosRepository = Depends(get_investimentos_repository),
+):
     try:
-        # Verificar se o investimento pertence a um objetivo de um cliente do usuário
-        check = supabase.table("investimentos").select("*, objetivos!inner(*, clientes!inner(user_id))").eq("id", investimento_id).execute()
-        if not check.data or check.data[0]["objetivos"]["clientes"]["user_id"] != current_user.id:
-            raise HTTPException(status_code=404, detail="Investimento não encontrado")
-        
         update_data = {k: v for k, v in investimento.dict().items() if v is not None}
-        response = supabase.table("investimentos").update(update_data).eq("id", investimento_id).execute()
-        # Converter Decimal para float se necessário
-        investimento_data = response.data[0]
-        if 'valor' in investimento_data and investimento_data['valor'] is not None:
-            investimento_data['valor'] = float(investimento_data['valor'])
-        return investimento_data
+        # Zero linhas alteradas: o investimento não existe ou não pertence ao usuário
+        investimento_data = await investimentos.atualizar(investimento_id, current_user.id, update_data)
+        if not investimento_data:
+            raise HTTPException(status_code=404, detail="Investimento não encontrado")
+        await invalidar_leituras(current_user.id)
+        central.publicar(current_user.id, "investimentos", "update", investimento_data, [*update_data, "updated_at"])
+        return resposta_json(investimento_data, Investimento)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.delete("/investimentos/{investimento_id}")
-async def deletar_investimento(investimento_id: str, current_user = Depends(get_current_user)):
+async def deletar_investimento(
+    investimento_id: str,
+    current_user = Depends(get_current_user),
+    investimentos: InvestimentosRepository = Depends(get_investimentos_repository),
+):
     try:
-        # Verificar se o investimento pertence a um objetivo de um cliente do usuário
-        check = supabase.table("investimentos").select("*, objetivos!inner(*, clientes!inner(user_id))").eq("id", investimento_id).execute()
-        if not check.data or check.data[0]["objetivos"]["clientes"]["user_id"] != current_user.id:
+        removido = await investimentos.deletar(investimento_id, current_user.id)
+        if not removido:
             raise HTTPException(status_code=404, detail="Investimento não encontrado")
-        
-        response = supabase.table("investimentos").delete().eq("id", investimento_id).execute()
+        await invalidar_leituras(current_user.id)
+        central.publicar(current_user.id, "investimentos", "delete", removido)
         return {"message": "Investimento deletado com sucesso"}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+def calcular_totais(objetivo: dict, investimentos_data: List[dict]) -> dict:
+    total_investido = sum(inv['valor'] or 0 for inv in investimentos_data)
+    valor_meta = objetivo.get('valor_meta')
+    if not valor_meta:
+        return {"total_investido": total_investido, "valor_meta": valor_meta}
+    return {
+        "total_investido": total_investido,
+        "valor_meta": valor_meta,
+        "progresso": min(total_investido / valor_meta * 100, 100),
+        "atingida": total_investido >= valor_meta,
+    }
+
 # Endpoint para obter carteira completa
 @router.get("/cliente/{cliente_id}/completa", response_model=ClienteCarteira)
-async def obter_carteira_completa(cliente_id: str, current_user = Depends(get_current_user)):
+async def obter_carteira_completa(
+    cliente_id: str,
+    totais: bool = False,
+    current_user = Depends(get_current_user),
+    clientes: ClientesRepository = Depends(get_clientes_repository),
+    cache: LeituraEmCache = Depends(leitura_em_cache),
+):
     try:
-        # Verificar se o cliente pertence ao usuário
-        cliente = supabase.table("clientes").select("id").eq("id", cliente_id).eq("user_id", current_user.id).execute()
-        if not cliente.data:
+        em_cache = await cache.buscar()
+        if em_cache:
+            return em_cache
+        # Cliente, objetivos e investimentos em uma única consulta, já filtrada pelo dono
+        carteira = await clientes.obter_carteira(cliente_id, current_user.id)
+        if not carteira:
             raise HTTPException(status_code=404, detail="Cliente não encontrado")
-        
-        # Buscar objetivos
-        objetivos = supabase.table("objetivos").select("*").eq("cliente_id", cliente_id).execute()
-        
-        # Converter Decimal para float em valor_meta para todos os objetivos
-        objetivos_data = objetivos.data
-        for obj in objetivos_data:
-            if 'valor_meta' in obj and obj['valor_meta'] is not None:
-                obj['valor_meta'] = float(obj['valor_meta'])
-        
-        # Buscar investimentos para cada objetivo
+
+        objetivos_data = []
         investimentos_por_objetivo = {}
-        for objetivo in objetivos_data:
-            investimentos = supabase.table("investimentos").select("*").eq("objetivo_id", objetivo["id"]).execute()
-            # Converter Decimal para float em todos os investimentos
-            investimentos_data = investimentos.data
-            for inv in investimentos_data:
-                if 'valor' in inv and inv['valor'] is not None:
-                    inv['valor'] = float(inv['valor'])
+        totais_por_objetivo = {} if totais else None
+        for objetivo in carteira["objetivos"]:
+            investimentos_data = objetivo.get("investimentos") or []
+            objetivos_data.append({k: v for k, v in objetivo.items() if k != "investimentos"})
             investimentos_por_objetivo[objetivo["id"]] = investimentos_data
-        
-        return {
+            if totais:
+                totais_por_objetivo[objetivo["id"]] = calcular_totais(objetivo, investimentos_data)
+
+        return await cache.guardar({
             "cliente_id": cliente_id,
             "objetivos": objetivos_data,
-            "investimentos_por_objetivo": investimentos_por_objetivo
-        }
+            "investimentos_por_objetivo": investimentos_por_objetivo,
+            "totais_por_objetivo": totais_por_objetivo,
+        }, ClienteCarteira)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+# Projeção dos objetivos (Monte Carlo)
+@router.post("/cliente/{cliente_id}/projecao", response_model=ProjecaoCliente)
+async def projetar_objetivos(
+    cliente_id: str,
+    parametros: Optional[ProjecaoParametros] = None,
+    current_user = Depends(get_current_user),
+    clientes: ClientesRepository = Depends(get_clientes_repository),
+):
+    """Trajetórias por percentil e probabilidade de atingir a meta de cada objetivo do cliente"""
+    parametros = parametros or ProjecaoParametros()
+    if parametros.simulacoes > settings.PROJECTION_MAX_SIMULATIONS:
+        raise HTTPException(status_code=422, detail=f"Máximo de {settings.PROJECTION_MAX_SIMULATIONS} simulações")
+    if len(parametros.premissas or {}) > projecao.MAX_PREMISSAS:
+        raise HTTPException(status_code=422, detail=f"Máximo de {projecao.MAX_PREMISSAS} premissas")
+    try:
+        carteira = await clientes.obter_carteira(cliente_id, current_user.id)
+        if not carteira:
+            raise HTTPException(status_code=404, detail="Cliente não encontrado")
+        premissas = {t: p.dict() for t, p in (parametros.premissas or {}).items()}
+        resultado = await projecao.projetar(
+            cliente_id, carteira["objetivos"], premissas,
+            parametros.anos, parametros.simulacoes, parametros.aporte_mensal,
+        )
+        return resposta_json(resultado, ProjecaoCliente)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def montar_resumo(resumo: Optional[dict]) -> dict:
+    if not resumo:
+        return {}
+    total = float(resumo["total_investido"] or 0)
+    soma_metas = float(resumo["soma_metas"] or 0)
+    alocacao = sorted(resumo.get("resumo_alocacao") or [], key=lambda a: -float(a["total"] or 0))
+    return {
+        **{k: v for k, v in resumo.items() if k != "resumo_alocacao"},
+        "cobertura_metas": float(resumo["meta_coberta"] or 0) / soma_metas * 100 if soma_metas else None,
+        # Tipos que ficaram sem investimentos continuam na tabela com quantidade 0
+        "alocacao": [
+            {
+                "tipo": a["tipo"] or None,
+                "total": a["total"],
+                "quantidade": a["quantidade"],
+                "percentual": float(a["total"] or 0) / total * 100 if total else None,
+            }
+            for a in alocacao if a["quantidade"]
+        ],
+    }
+
+# Resumo de todas as carteiras do usuário (dashboard)
+@router.get("/resumo", response_model=ResumoCarteiras)
+async def obter_resumo(
+    current_user = Depends(get_current_user),
+    resumo: ResumoRepository = Depends(get_resumo_repository),
+    cache: LeituraEmCache = Depends(leitura_em_cache),
+):
+    """Patrimônio total, alocação por tipo e cobertura das metas, lidos do resumo mantido pelo banco"""
+    try:
+        em_cache = await cache.buscar()
+        if em_cache:
+            return em_cache
+        return await cache.guardar(montar_resumo(await resumo.obter(current_user.id)), ResumoCarteiras)
+    except HTTPException:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/resumo/reconstruir", response_model=ResumoCarteiras)
+async def reconstruir_resumo(
+    current_user = Depends(get_current_user),
+    resumo: ResumoRepository = Depends(get_resumo_repository),
+):
+    """Recalcula o resumo a partir das tabelas (reconciliação)"""
+    try:
+        await resumo.reconstruir(current_user.id)
+        await invalidar_leituras(current_user.id)
+        return resposta_json(montar_resumo(await resumo.obter(current_user.id)), ResumoCarteiras)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+# Histórico de valores
+# Intervalo da API -> unidade do Postgres e duração aproximada em dias (para contar pontos)
+INTERVALOS = {"dia": ("day", 1), "semana": ("week", 7), "mes": ("month", 28)}
+
+@dataclass
+class PeriodoHistorico:
+    inicio: datetime
+    fim: datetime
+    intervalo: str
+
+def periodo_historico(
+    inicio: Optional[datetime] = Query(None, description="Padrão: HISTORY_DEFAULT_DAYS antes de fim"),
+    fim: Optional[datetime] = Query(None, description="Padrão: agora"),
+    intervalo: Optional[str] = Query(None, pattern="^(dia|semana|mes)$", description="Padrão: o menor que caiba em HISTORY_MAX_POINTS"),
+) -> PeriodoHistorico:
+    fim = fim or datetime.now(timezone.utc)
+    inicio = inicio or fim - timedelta(days=settings.HISTORY_DEFAULT_DAYS)
+    # Datas sem fuso são tratadas como UTC
+    fim = fim if fim.tzinfo else fim.replace(tzinfo=timezone.utc)
+    inicio = inicio if inicio.tzinfo else inicio.replace(tzinfo=timezone.utc)
+    if inicio >= fim:
+        raise HTTPException(status_code=422, detail="inicio deve ser anterior a fim")
+    dias = (fim - inicio).total_seconds() / 86400
+    cabem = [nome for nome, (_, duracao) in INTERVALOS.items() if dias / duracao + 1 <= settings.HISTORY_MAX_POINTS]
+    if not cabem or (intervalo and intervalo not in cabem):
+        raise HTTPException(
+            status_code=422,
+            detail=f"Mais de {settings.HISTORY_MAX_POINTS} pontos; use um intervalo maior ou um período menor",
+        )
+    return PeriodoHistorico(inicio, fim, intervalo or cabem[0])
+
+async def consultar_historico(
+    periodo: PeriodoHistorico, historico: HistoricoRepository, cache: LeituraEmCache, user_id: str, **alvo
+):
+    pontos = await historico.valores(
+        user_id, periodo.inicio, periodo.fim, INTERVALOS[periodo.intervalo][0], **alvo
+    )
+    return await cache.guardar({
+        "intervalo": periodo.intervalo,
+        "inicio": periodo.inicio,
+        "fim": periodo.fim,
+        "pontos": pontos,
+    }, HistoricoValores)
+
+@router.get("/investimentos/{investimento_id}/historico", response_model=HistoricoValores)
+async def historico_investimento(
+    investimento_id: str,
+    periodo: PeriodoHistorico = Depends(periodo_historico),
+    current_user = Depends(get_current_user),
+    investimentos: InvestimentosRepository = Depends(get_investimentos_repository),
+    historico: HistoricoRepository = Depends(get_historico_repository),
+    cache: LeituraEmCache = Depends(leitura_em_cache),
+):
+    """Valor do investimento ao fim de cada dia, semana ou mês"""
+    try:
+        em_cache = await cache.buscar()
+        if em_cache:
+            return em_cache
+        if not await investimentos.pertence_ao_usuario(investimento_id, current_user.id):
+            raise HTTPException(status_code=404, detail="Investimento não encontrado")
+        return await consultar_historico(periodo, historico, cache, current_user.id, investimento_id=investimento_id)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/objetivos/{objetivo_id}/historico", response_model=HistoricoValores)
+async def historico_objetivo(
+    objetivo_id: str,
+    periodo: PeriodoHistorico = Depends(periodo_historico),
+    current_user = Depends(get_current_user),
+    objetivos: ObjetivosRepository = Depends(get_objetivos_repository),
+    historico: HistoricoRepository = Depends(get_historico_repository),
+    cache: LeituraEmCache = Depends(leitura_em_cache),
+):
+    """Soma dos investimentos do objetivo ao fim de cada dia, semana ou mês"""
+    try:
+        em_cache = await cache.buscar()
+        if em_cache:
+            return em_cache
+        if not await objetivos.pertence_ao_usuario(objetivo_id, current_user.id):
+            raise HTTPException(status_code=404, detail="Objetivo não encontrado")
+        return await consultar_historico(periodo, historico, cache, current_user.id, objetivo_id=objetivo_id)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/cliente/{cliente_id}/historico", response_model=HistoricoValores)
+async def historico_cliente(
+    cliente_id: str,
+    periodo: PeriodoHistorico = Depends(periodo_historico),
+    current_user = Depends(get_current_user),
+    clientes: ClientesRepository = Depends(get_clientes_repository),
+    historico: HistoricoRepository = Depends(get_historico_repository),
+    cache: LeituraEmCache = Depends(leitura_em_cache),
+):
+    """Patrimônio do cliente (todos os investimentos) ao fim de cada dia, semana ou mês"""
+    try:
+        em_cache = await cache.buscar()
+        if em_cache:
+            return em_cache
+        if not await clientes.pertence_ao_usuario(cliente_id, current_user.id):
+            raise HTTPException(status_code=404, detail="Cliente não encontrado")
+        return await consultar_historico(periodo, historico, cache, current_user.id, cliente_id=cliente_id)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/investimentos/cotacoes", response_model=ResultadoCotacoes)
+async def registrar_cotacoes(
+    lote: CotacoesLote,
+    current_user = Depends(get_current_user),
+    investimentos: InvestimentosRepository = Depends(get_investimentos_repository),
+    historico: HistoricoRepository = Depends(get_historico_repository),
+):
+    """Cotações de vários investimentos em um único comando (atualização diária de preços)"""
+    if not lote.itens:
+        raise HTTPException(status_code=400, detail="Lote vazio")
+    if len(lote.itens) > settings.BULK_MAX_ITENS:
+        raise HTTPException(status_code=413, detail=f"Máximo de {settings.BULK_MAX_ITENS} itens por lote")
+    try:
+        # Um investimento repetido no lote fica com a última cotação
+        cotacoes = {item.investimento_id: item.valor for item in lote.itens}
+        registrados = set(await historico.registrar(
+            current_user.id,
+            [{"investimento_id": i, "valor": v} for i, v in cotacoes.items()],
+            lote.data,
+        ))
+        if registrados:
+            await invalidar_leituras(current_user.id)
+        if registrados and lote.data is None:
+            # Cotação atual muda o valor: o feed precisa do objetivo de cada investimento
+            alterados = await investimentos.obter_varios(list(registrados), current_user.id, colunas="id,objetivo_id,valor")
+            central.publicar_varios(current_user.id, "investimentos", "update", alterados, ["valor"])
+        return resposta_json({
+            "registrados": len(registrados),
+            "nao_encontrados": [i for i in cotacoes if i not in registrados],
+        }, ResultadoCotacoes)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
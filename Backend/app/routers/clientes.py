@@ -1,65 +1,121 @@
-from fastapi import APIRouter, HTTPException, status, Depends
-from typing import List
-from app.models import Cliente, ClienteCreate, ClienteUpdate
-from app.database import supabase
+from fastapi import APIRouter, HTTPException, Query, status, Depends
+from typing import List, Optional
+from app.models import Cliente, ClienteBusca, ClienteCreate, ClienteUpdate
+from app.pagination import Paginacao, paginacao_params, cabecalhos_paginacao
+from app.repositories import ClientesRepository, get_clientes_repository
 from app.auth import get_current_user
+from app.http_cache import LeituraEmCache, leitura_em_cache, invalidar_leituras
+from app.eventos import central
+from app.serializacao import resposta_json
 
 router = APIRouter(prefix="/clientes", tags=["clientes"])
 
 @router.get("/", response_model=List[Cliente])
-async def listar_clientes(current_user = Depends(get_current_user)):
+async def listar_clientes(
+    nome: Optional[str] = None,
+    email: Optional[str] = None,
+    pagina: Paginacao = Depends(paginacao_params),
+    current_user = Depends(get_current_user),
+    clientes: ClientesRepository = Depends(get_clientes_repository),
+    cache: LeituraEmCache = Depends(leitura_em_cache),
+):
     try:
-        response = supabase.table("clientes").select("*").eq("user_id", current_user.id).execute()
-        return response.data
+        em_cache = await cache.buscar()
+        if em_cache:
+            return em_cache
+        # nome e email filtram por prefixo
+        rows, next_cursor = await clientes.listar(current_user.id, pagina, nome=nome, email=email)
+        # Projeção parcial não passa pelo response_model (que exige todos os campos)
+        modelo = None if pagina.fields else List[Cliente]
+        return await cache.guardar(rows, modelo, cabecalhos_paginacao(next_cursor))
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/search", response_model=List[ClienteBusca])
+async def buscar_clientes(
+    q: str = Query(..., min_length=1, max_length=100, description="Trecho de nome, email ou telefone"),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Valor de X-Next-Cursor da página anterior"),
+    current_user = Depends(get_current_user),
+    clientes: ClientesRepository = Depends(get_clientes_repository),
+    cache: LeituraEmCache = Depends(leitura_em_cache),
+):
+    """Busca por prefixo, sem acentos e tolerante a erros de digitação, do mais relevante ao menos"""
+    try:
+        em_cache = await cache.buscar()
+        if em_cache:
+            return em_cache
+        pagina = Paginacao(limit=limit, cursor=cursor, ordem="relevancia", desc=True)
+        rows, next_cursor = await clientes.buscar(current_user.id, q, pagina)
+        return await cache.guardar(rows, List[ClienteBusca], cabecalhos_paginacao(next_cursor))
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/{cliente_id}", response_model=Cliente)
-async def obter_cliente(cliente_id: str, current_user = Depends(get_current_user)):
+async def obter_cliente(
+    cliente_id: str,
+    current_user = Depends(get_current_user),
+    clientes: ClientesRepository = Depends(get_clientes_repository),
+    cache: LeituraEmCache = Depends(leitura_em_cache),
+):
     try:
-        response = supabase.table("clientes").select("*").eq("id", cliente_id).eq("user_id", current_user.id).execute()
-        if not response.data:
+        em_cache = await cache.buscar()
+        if em_cache:
+            return em_cache
+        cliente = await clientes.obter(cliente_id, current_user.id)
+        if not cliente:
             raise HTTPException(status_code=404, detail="Cliente não encontrado")
-        return response.data[0]
+        return await cache.guardar(cliente, Cliente)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.post("/", response_model=Cliente)
-async def criar_cliente(cliente: ClienteCreate, current_user = Depends(get_current_user)):
+async def criar_cliente(cliente: ClienteCreate, current_user = Depends(get_current_user), clientes: ClientesRepository = Depends(get_clientes_repository)):
     try:
         data = {
             **cliente.dict(),
             "user_id": current_user.id
         }
-        response = supabase.table("clientes").insert(data).execute()
-        return response.data[0]
+        cliente_data = await clientes.criar(data)
+        await invalidar_leituras(current_user.id)
+        central.publicar(current_user.id, "clientes", "insert", cliente_data)
+        return resposta_json(cliente_data, Cliente)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.put("/{cliente_id}", response_model=Cliente)
-async def atualizar_cliente(cliente_id: str, cliente: ClienteUpdate, current_user = Depends(get_current_user)):
+async def atualizar_cliente(cliente_id: str, cliente: ClienteUpdate, current_user = Depends(get_current_user), clientes: ClientesRepository = Depends(get_clientes_repository)):
     try:
-        # Verificar se o cliente pertence ao usuário
-        check = supabase.table("clientes").select("id").eq("id", cliente_id).eq("user_id", current_user.id).execute()
-        if not check.data:
-            raise HTTPException(status_code=404, detail="Cliente não encontrado")
-        
-        # Atualizar apenas campos não nulos
+        # Atualizar apenas campos não nulos; o filtro por user_id garante a posse
         update_data = {k: v for k, v in cliente.dict().items() if v is not None}
-        response = supabase.table("clientes").update(update_data).eq("id", cliente_id).execute()
-        return response.data[0]
+        cliente_data = await clientes.atualizar(cliente_id, current_user.id, update_data)
+        if not cliente_data:
+            raise HTTPException(status_code=404, detail="Cliente não encontrado")
+        await invalidar_leituras(current_user.id)
+        central.publicar(current_user.id, "clientes", "update", cliente_data, [*update_data, "updated_at"])
+        return resposta_json(cliente_data, Cliente)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.delete("/{cliente_id}")
-async def deletar_cliente(cliente_id: str, current_user = Depends(get_current_user)):
+async def deletar_cliente(cliente_id: str, current_user = Depends(get_current_user), clientes: ClientesRepository = Depends(get_clientes_repository)):
     try:
-        # Verificar se o cliente pertence ao usuário
-        check = supabase.table("clientes").select("id").eq("id", cliente_id).eq("user_id", current_user.id).execute()
-        if not check.data:
+        if not await clientes.deletar(cliente_id, current_user.id):
             raise HTTPException(status_code=404, detail="Cliente não encontrado")
-        
-        response = supabase.table("clientes").delete().eq("id", cliente_id).execute()
+        await invalidar_leituras(current_user.id)
+        central.publicar(current_user.id, "clientes", "delete", {"id": cliente_id})
         return {"message": "Cliente deletado com sucesso"}
+    except HTTPException:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=400, detail=str(e))
@@ -0,0 +1,190 @@
+import asyncio
+import json
+import time
+from typing import Optional, Tuple
+from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.security import HTTPAuthorizationCredentials
+from gotrue.types import User
+from jose import jwt
+from app.auth import verify_token
+from app.config import settings
+from app.database import get_db
+from app.eventos import Assinatura, central
+from app.repositories import ClientesRepository, ObjetivosRepository
+
+router = APIRouter(tags=["feed"])
+
+# Códigos de fechamento do feed (4000-4999 são livres para a aplicação)
+FECHAMENTO_NAO_AUTENTICADO = 4401
+FECHAMENTO_NAO_ENCONTRADO = 4404
+FECHAMENTO_CANAL_INVALIDO = 4400
+FECHAMENTO_ATRASADO = 4008
+FECHAMENTO_INDISPONIVEL = 1013
+
+
+def _token_da_mensagem(mensagem: dict) -> Optional[str]:
+    """Token de ``{"tipo": "autenticar", "token": ...}``; outras mensagens são ignoradas."""
+    try:
+        dados = json.loads(mensagem.get("text") or mensagem.get("bytes") or "")
+    except ValueError:
+        return None
+    if isinstance(dados, dict) and dados.get("tipo") == "autenticar" and isinstance(dados.get("token"), str):
+        return dados["token"]
+    return None
+
+
+async def _token_inicial(websocket: WebSocket) -> str:
+    """Token do header Authorization ou, nos navegadores, da primeira mensagem.
+
+    Nunca da URL: query strings vão para os logs de acesso do servidor e dos proxies.
+    """
+    token = websocket.headers.get("authorization", "").removeprefix("Bearer ").strip()
+    if token:
+        return token
+    try:
+        mensagem = await asyncio.wait_for(websocket.receive(), settings.FEED_AUTH_TIMEOUT)
+    except asyncio.TimeoutError:
+        return ""
+    if mensagem["type"] == "websocket.disconnect":
+        raise WebSocketDisconnect(mensagem.get("code", 1000))
+    return _token_da_mensagem(mensagem) or ""
+
+
+async def _autenticar(websocket: WebSocket, token: str) -> Optional[Tuple[User, dict]]:
+    """Usuário e claims do token, ou None depois de fechar a conexão."""
+    try:
+        user = (await verify_token(HTTPAuthorizationCredentials(scheme="Bearer", credentials=token))).user
+    except HTTPException as e:
+        await websocket.close(
+            code=FECHAMENTO_NAO_AUTENTICADO if e.status_code == 401 else FECHAMENTO_INDISPONIVEL,
+            reason=str(e.detail),
+        )
+        return None
+    # Assinatura já conferida por verify_token; daqui só saem exp e session_id
+    return user, jwt.get_unverified_claims(token)
+
+
+async def _vigiar_sessao(websocket: WebSocket, assinatura: Assinatura) -> None:
+    """Fecha a conexão quando o token expira sem ser renovado ou a sessão sai no logout."""
+    while True:
+        if assinatura.encerrada:
+            motivo = "Sessão encerrada"
+            break
+        restante = None if assinatura.expira_em is None else assinatura.expira_em - time.time()
+        if restante is not None and restante <= 0:
+            motivo = "Token expirado"
+            break
+        assinatura.sessao_alterada.clear()
+        try:
+            await asyncio.wait_for(assinatura.sessao_alterada.wait(), restante)
+        except asyncio.TimeoutError:
+            pass
+    await websocket.close(code=FECHAMENTO_NAO_AUTENTICADO, reason=motivo)
+
+
+async def _enviar(websocket: WebSocket, assinatura: Assinatura) -> None:
+    while True:
+        evento = await assinatura.fila.get()
+        if evento is None:
+            # A fila encheu: o cliente reconecta com o cursor do último evento recebido
+            await websocket.send_json({"tipo": "atrasado"})
+            await websocket.close(code=FECHAMENTO_ATRASADO)
+            return
+        await websocket.send_json(evento)
+
+
+async def _receber(websocket: WebSocket, assinatura: Assinatura) -> None:
+    # O cliente só envia o token renovado, antes de o atual expirar
+    while True:
+        mensagem = await websocket.receive()
+        if mensagem["type"] == "websocket.disconnect":
+            return
+        token = _token_da_mensagem(mensagem)
+        if token is None:
+            continue
+        autenticado = await _autenticar(websocket, token)
+        if autenticado is None:
+            return
+        user, claims = autenticado
+        if user.id != assinatura.user_id:
+            await websocket.close(code=FECHAMENTO_NAO_AUTENTICADO, reason="Token de outro usuário")
+            return
+        assinatura.renovar(claims.get("exp"), claims.get("session_id"))
+
+
+@router.websocket("/feed")
+async def feed(
+    websocket: WebSocket,
+    canal: str = "clientes",
+    cursor: Optional[str] = None,
+):
+    """Alterações em tempo real: ``canal=clientes`` ou ``canal=carteira:<cliente_id>``.
+
+    O token vai no header Authorization ou, como navegadores não enviam headers no
+    WebSocket, na primeira mensagem: ``{"tipo": "autenticar", "token": ...}``. A mesma
+    mensagem renova o token com a conexão aberta; ao expirar sem renovação, ou no
+    logout da sessão, a conexão é fechada com 4401. Com ``cursor`` (o do último evento
+    recebido), os eventos perdidos durante a desconexão são reenviados antes dos novos.
+    """
+    await websocket.accept()
+    if "token" in websocket.query_params:
+        await websocket.close(code=FECHAMENTO_NAO_AUTENTICADO, reason="Envie o token na primeira mensagem, não na URL")
+        return
+    try:
+        autenticado = await _autenticar(websocket, await _token_inicial(websocket))
+    except WebSocketDisconnect:
+        return
+    if autenticado is None:
+        return
+    user, claims = autenticado
+
+    cliente_id, objetivos = None, []
+    # Cursor do usuário antes de ler os objetivos: o que mudar depois é aplicado na assinatura
+    base = central.cursor(user.id)
+    if canal.startswith("carteira:"):
+        cliente_id = canal.removeprefix("carteira:")
+        db = get_db()
+        try:
+            if not await ClientesRepository(db).pertence_ao_usuario(cliente_id, user.id):
+                await websocket.close(code=FECHAMENTO_NAO_ENCONTRADO, reason="Cliente não encontrado")
+                return
+            objetivos = await ObjetivosRepository(db).ids_do_cliente(cliente_id)
+        except HTTPException as e:
+            await websocket.close(code=FECHAMENTO_INDISPONIVEL, reason=str(e.detail))
+            return
+    elif canal != "clientes":
+        await websocket.close(code=FECHAMENTO_CANAL_INVALIDO, reason="Canal inválido")
+        return
+
+    assinatura, pendentes = central.assinar(
+        user.id, cliente_id, objetivos, base, cursor, claims.get("exp"), claims.get("session_id")
+    )
+    # Eventos posteriores a este cursor já estão na fila da assinatura
+    atual = central.cursor(user.id)
+    try:
+        if pendentes is None:
+            # Cursor de outra execução ou antigo demais: o cliente recarrega os dados
+            await websocket.send_json({"tipo": "recarregar", "cursor": atual})
+        else:
+            for evento in pendentes:
+                await websocket.send_json(evento)
+            await websocket.send_json({"tipo": "pronto", "cursor": atual})
+
+        tarefas = [
+            asyncio.create_task(_enviar(websocket, assinatura)),
+            asyncio.create_task(_receber(websocket, assinatura)),
+            asyncio.create_task(_vigiar_sessao(websocket, assinatura)),
+        ]
+        try:
+            concluidas, _ = await asyncio.wait(tarefas, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for tarefa in tarefas:
+                tarefa.cancel()
+        for tarefa in concluidas:
+            erro = tarefa.exception()
+            if erro is not None and not isinstance(erro, WebSocketDisconnect):
+                raise erro
+    except WebSocketDisconnect:
+        pass
+    finally:
+        central.cancelar(assinatura)
@@ -0,0 +1,284 @@
+import uuid
+from fastapi import APIRouter, HTTPException, Depends, Header
+from typing import Iterable, List, Optional
+from app.config import settings
+from app.models import (
+    ClienteCreate, ClienteUpdateLote, ObjetivoCreate, ObjetivoUpdateLote,
+    InvestimentoCreate, InvestimentoUpdateLote, RemocaoLote, ResultadoItemLote, ResultadoLote,
+)
+from app.repositories import (
+    Repository, ClientesRepository, ObjetivosRepository, InvestimentosRepository,
+    get_clientes_repository, get_objetivos_repository, get_investimentos_repository,
+)
+from app.auth import get_current_user
+from app.eventos import central
+from app.http_cache import invalidar_leituras
+
+router = APIRouter(prefix="/lote", tags=["lotes"])
+
+# Namespace dos ids derivados de Idempotency-Key
+IDEMPOTENCIA_NS = uuid.uuid5(uuid.NAMESPACE_URL, "wolf-planner/lotes")
+
+
+def _id_do_item(user_id: str, chave: Optional[str], tabela: str, indice: int) -> str:
+    # Com chave de idempotência, o mesmo item de um lote reenviado recebe o mesmo id
+    if chave:
+        return str(uuid.uuid5(IDEMPOTENCIA_NS, f"{user_id}:{chave}:{tabela}:{indice}"))
+    return str(uuid.uuid4())
+
+
+def _validar_tamanho(itens: list):
+    if not itens:
+        raise HTTPException(status_code=400, detail="Lote vazio")
+    if len(itens) > settings.BULK_MAX_ITENS:
+        raise HTTPException(status_code=413, detail=f"Máximo de {settings.BULK_MAX_ITENS} itens por lote")
+
+
+def _resultado(resultados: dict) -> dict:
+    itens = [resultados[i] for i in sorted(resultados)]
+    falhas = sum(1 for item in itens if item.status >= 400)
+    return {"sucesso": len(itens) - falhas, "falhas": falhas, "itens": itens}
+
+
+def _falhar_se_atomico(atomico: bool, falhas: dict):
+    # Tudo ou nada: nenhum item é gravado se algum for rejeitado
+    if atomico and falhas:
+        raise HTTPException(status_code=404, detail={
+            "message": "Lote rejeitado; nenhum item foi gravado",
+            "itens": [falhas[i].dict() for i in sorted(falhas)],
+        })
+
+
+async def criar_em_lote(
+    repo: Repository,
+    itens: List[dict],
+    user_id: str,
+    chave: Optional[str],
+    atomico: bool,
+    campo_pai: Optional[str] = None,
+    pais_validos: Iterable[str] = (),
+    erro_pai: str = "",
+) -> dict:
+    resultados, rows = {}, []
+    pais_validos = set(pais_validos)
+    for i, item in enumerate(itens):
+        row = {**item, "id": _id_do_item(user_id, chave, repo.TABELA, i)}
+        if campo_pai and row[campo_pai] not in pais_validos:
+            resultados[i] = ResultadoItemLote(indice=i, status=404, id=row["id"], erro=erro_pai)
+        else:
+            rows.append((i, row))
+    _falhar_se_atomico(atomico, resultados)
+
+    # Um único insert multi-linha; ids já existentes (reenvio) são ignorados
+    inseridos = {r["id"]: r for r in await repo.inserir_varios([row for _, row in rows])}
+    await invalidar_leituras(user_id)
+    central.publicar_varios(user_id, repo.TABELA, "insert", inseridos.values())
+    for i, row in rows:
+        if row["id"] in inseridos:
+            resultados[i] = ResultadoItemLote(indice=i, status=201, id=row["id"], dados=inseridos[row["id"]])
+        else:
+            resultados[i] = ResultadoItemLote(indice=i, status=200, id=row["id"], erro="Já criado com esta Idempotency-Key")
+    return _resultado(resultados)
+
+
+async def atualizar_em_lote(repo: Repository, itens: list, user_id: str, atomico: bool, erro: str) -> dict:
+    validos = await repo.ids_do_usuario([item.id for item in itens], user_id)
+    resultados, alteracoes, indices = {}, {}, []
+    for i, item in enumerate(itens):
+        if item.id not in validos:
+            resultados[i] = ResultadoItemLote(indice=i, status=404, id=item.id, erro=erro)
+            continue
+        # Só os campos enviados; null explícito é mantido apenas em valor_meta
+        campos = {k: v for k, v in item.dict(exclude={"id"}, exclude_unset=True).items() if v is not None or k == "valor_meta"}
+        # Itens repetidos do mesmo id se acumulam na ordem do lote
+        alteracoes[item.id] = {**alteracoes.get(item.id, {}), **campos}
+        indices.append((i, item.id))
+    _falhar_se_atomico(atomico, resultados)
+
+    # Um único UPDATE com os campos de cada item, filtrado pelo dono no banco
+    salvos = {r["id"]: r for r in await repo.atualizar_varios(user_id, alteracoes)}
+    await invalidar_leituras(user_id)
+    central.publicar_varios(
+        user_id, repo.TABELA, "update", salvos.values(), lambda row: [*alteracoes[row["id"]], "updated_at"]
+    )
+    for i, item_id in indices:
+        if item_id in salvos:
+            resultados[i] = ResultadoItemLote(indice=i, status=200, id=item_id, dados=salvos[item_id])
+        else:
+            # Removido entre a verificação e a escrita
+            resultados[i] = ResultadoItemLote(indice=i, status=404, id=item_id, erro=erro)
+    return _resultado(resultados)
+
+
+async def remover_em_lote(repo: Repository, ids: List[str], user_id: str, atomico: bool, erro: str) -> dict:
+    validos = await repo.ids_do_usuario(ids, user_id)
+    resultados = {
+        i: ResultadoItemLote(indice=i, status=404, id=item_id, erro=erro)
+        for i, item_id in enumerate(ids) if item_id not in validos
+    }
+    _falhar_se_atomico(atomico, resultados)
+
+    linhas = await repo.deletar_varios(list(validos))
+    removidos = {row["id"] for row in linhas}
+    await invalidar_leituras(user_id)
+    central.publicar_varios(user_id, repo.TABELA, "delete", linhas)
+    for i, item_id in enumerate(ids):
+        if i not in resultados:
+            status = 200 if item_id in removidos else 404
+            resultados[i] = ResultadoItemLote(indice=i, status=status, id=item_id, erro=None if status == 200 else erro)
+    return _resultado(resultados)
+
+
+# Clientes
+@router.post("/clientes", response_model=ResultadoLote)
+async def criar_clientes(
+    clientes_lote: List[ClienteCreate],
+    atomico: bool = True,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    current_user = Depends(get_current_user),
+    clientes: ClientesRepository = Depends(get_clientes_repository),
+):
+    _validar_tamanho(clientes_lote)
+    try:
+        itens = [{**c.dict(), "user_id": current_user.id} for c in clientes_lote]
+        return await criar_em_lote(clientes, itens, current_user.id, idempotency_key, atomico)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.put("/clientes", response_model=ResultadoLote)
+async def atualizar_clientes(
+    clientes_lote: List[ClienteUpdateLote],
+    atomico: bool = True,
+    current_user = Depends(get_current_user),
+    clientes: ClientesRepository = Depends(get_clientes_repository),
+):
+    _validar_tamanho(clientes_lote)
+    try:
+        return await atualizar_em_lote(clientes, clientes_lote, current_user.id, atomico, "Cliente não encontrado")
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/clientes/remover", response_model=ResultadoLote)
+async def remover_clientes(
+    remocao: RemocaoLote,
+    atomico: bool = True,
+    current_user = Depends(get_current_user),
+    clientes: ClientesRepository = Depends(get_clientes_repository),
+):
+    _validar_tamanho(remocao.ids)
+    try:
+        return await remover_em_lote(clientes, remocao.ids, current_user.id, atomico, "Cliente não encontrado")
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+# Objetivos
+@router.post("/objetivos", response_model=ResultadoLote)
+async def criar_objetivos(
+    objetivos_lote: List[ObjetivoCreate],
+    atomico: bool = True,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    current_user = Depends(get_current_user),
+    clientes: ClientesRepository = Depends(get_clientes_repository),
+    objetivos: ObjetivosRepository = Depends(get_objetivos_repository),
+):
+    _validar_tamanho(objetivos_lote)
+    try:
+        # Posse verificada uma única vez para cada cliente distinto
+        pais = await clientes.ids_do_usuario({o.cliente_id for o in objetivos_lote}, current_user.id)
+        return await criar_em_lote(
+            objetivos, [o.dict() for o in objetivos_lote], current_user.id, idempotency_key, atomico,
+            campo_pai="cliente_id", pais_validos=pais, erro_pai="Cliente não encontrado",
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.put("/objetivos", response_model=ResultadoLote)
+async def atualizar_objetivos(
+    objetivos_lote: List[ObjetivoUpdateLote],
+    atomico: bool = True,
+    current_user = Depends(get_current_user),
+    objetivos: ObjetivosRepository = Depends(get_objetivos_repository),
+):
+    _validar_tamanho(objetivos_lote)
+    try:
+        return await atualizar_em_lote(objetivos, objetivos_lote, current_user.id, atomico, "Objetivo não encontrado")
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/objetivos/remover", response_model=ResultadoLote)
+async def remover_objetivos(
+    remocao: RemocaoLote,
+    atomico: bool = True,
+    current_user = Depends(get_current_user),
+    objetivos: ObjetivosRepository = Depends(get_objetivos_repository),
+):
+    _validar_tamanho(remocao.ids)
+    try:
+        return await remover_em_lote(objetivos, remocao.ids, current_user.id, atomico, "Objetivo não encontrado")
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+# Investimentos
+@router.post("/investimentos", response_model=ResultadoLote)
+async def criar_investimentos(
+    investimentos_lote: List[InvestimentoCreate],
+    atomico: bool = True,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    current_user = Depends(get_current_user),
+    objetivos: ObjetivosRepository = Depends(get_objetivos_repository),
+    investimentos: InvestimentosRepository = Depends(get_investimentos_repository),
+):
+    _validar_tamanho(investimentos_lote)
+    try:
+        # Posse verificada uma única vez para cada objetivo distinto
+        pais = await objetivos.ids_do_usuario({i.objetivo_id for i in investimentos_lote}, current_user.id)
+        return await criar_em_lote(
+            investimentos, [i.dict() for i in investimentos_lote], current_user.id, idempotency_key, atomico,
+            campo_pai="objetivo_id", pais_validos=pais, erro_pai="Objetivo não encontrado",
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.put("/investimentos", response_model=ResultadoLote)
+async def atualizar_investimentos(
+    investimentos_lote: List[InvestimentoUpdateLote],
+    atomico: bool = True,
+    current_user = Depends(get_current_user),
+    investimentos: InvestimentosRepository = Depends(get_investimentos_repository),
+):
+    _validar_tamanho(investimentos_lote)
+    try:
+        return await atualizar_em_lote(investimentos, investimentos_lote, current_user.id, atomico, "Investimento não encontrado")
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/investimentos/remover", response_model=ResultadoLote)
+async def remover_investimentos(
+    remocao: RemocaoLote,
+    atomico: bool = True,
+    current_user = Depends(get_current_user),
+    investimentos: InvestimentosRepository = Depends(get_investimentos_repository),
+):
+    _validar_tamanho(remocao.ids)
+    try:
+        return await remover_em_lote(investimentos, remocao.ids, current_user.id, atomico, "Investimento não encontrado")
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
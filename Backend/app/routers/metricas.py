@@ -0,0 +1,39 @@
+import hmac
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Header, Request, status
+from fastapi.responses import PlainTextResponse
+from app.config import settings
+from app.database import get_db
+from app.eventos import central
+from app.metrics import exposicao
+
+router = APIRouter(prefix="/metrics", tags=["metricas"])
+
+
+def _verificar_acesso(authorization: Optional[str]):
+    if not settings.METRICS_TOKEN:
+        if settings.METRICS_PUBLIC:
+            return
+        # Sem token configurado as métricas ficam desligadas, em vez de abertas
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Métricas desligadas; defina METRICS_TOKEN")
+    if not hmac.compare_digest(authorization or "", f"Bearer {settings.METRICS_TOKEN}"):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token de métricas inválido")
+
+
+@router.get("", response_class=PlainTextResponse)
+async def metricas(authorization: Optional[str] = Header(None)):
+    """Métricas no formato do Prometheus (latência por rota, chamadas ao Supabase, admissão, single-flight, feed)."""
+    _verificar_acesso(authorization)
+    return PlainTextResponse(
+        exposicao(get_db().admissao.estado(), central.estado()), media_type="text/plain; version=0.0.4"
+    )
+
+
+@router.get("/perfil", response_class=PlainTextResponse)
+async def perfil(request: Request, limpar: bool = False, authorization: Optional[str] = Header(None)):
+    """Pilhas amostradas das rotas em PROFILE_ROUTES, no formato "collapsed" (flamegraph)."""
+    _verificar_acesso(authorization)
+    perfilador = request.app.state.perfilador
+    if perfilador is None:
+        raise HTTPException(status_code=404, detail="Perfil desligado; defina PROFILE_ROUTES")
+    return PlainTextResponse(perfilador.collapsed(limpar=limpar))
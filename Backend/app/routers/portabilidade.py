@@ -0,0 +1,340 @@
+import codecs
+import csv
+import io
+import json
+import logging
+import uuid
+from fastapi import APIRouter, HTTPException, Depends, Header, Request
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from python_multipart.multipart import MultipartParser, parse_options_header
+from typing import AsyncIterator, List, Optional
+from app.config import settings
+from app.models import ClienteCreate, ObjetivoCreate, InvestimentoCreate
+from app.repositories import (
+    ClientesRepository, ObjetivosRepository, InvestimentosRepository,
+    get_clientes_repository, get_objetivos_repository, get_investimentos_repository,
+)
+from app.auth import get_current_user
+from app.eventos import central
+from app.http_cache import invalidar_leituras
+
+router = APIRouter(prefix="/portabilidade", tags=["portabilidade"])
+
+logger = logging.getLogger(__name__)
+
+# Colunas do CSV: uma linha por registro, identificado pela coluna "registro"
+COLUNAS_CSV = [
+    "registro", "id", "cliente_id", "objetivo_id", "nome", "email", "telefone",
+    "descricao", "valor_meta", "valor", "tipo", "created_at", "updated_at",
+]
+FORMATOS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+# Namespace dos ids gerados na importação
+IMPORTACAO_NS = uuid.uuid5(uuid.NAMESPACE_URL, "wolf-planner/importacao")
+MAX_ERROS_REPORTADOS = 100
+
+
+async def _registros(clientes: ClientesRepository, user_id: str) -> AsyncIterator[dict]:
+    # Ordem pai → filhos, para que o mesmo arquivo possa ser importado em streaming
+    async for cliente in clientes.percorrer_carteiras(user_id, settings.EXPORT_CHUNK_SIZE):
+        yield {"registro": "cliente", **{k: v for k, v in cliente.items() if k != "objetivos"}}
+        for objetivo in cliente.get("objetivos") or []:
+            investimentos = objetivo.get("investimentos") or []
+            yield {"registro": "objetivo", **{k: v for k, v in objetivo.items() if k != "investimentos"}}
+            for investimento in investimentos:
+                yield {"registro": "investimento", **investimento}
+
+
+async def _exportar_ndjson(registros: AsyncIterator[dict]) -> AsyncIterator[str]:
+    async for registro in registros:
+        yield json.dumps(registro, ensure_ascii=False, default=str) + "\n"
+
+
+async def _exportar_csv(registros: AsyncIterator[dict]) -> AsyncIterator[str]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=COLUNAS_CSV, extrasaction="ignore")
+    writer.writeheader()
+    async for registro in registros:
+        writer.writerow(registro)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+@router.get("/exportar")
+async def exportar(
+    formato: str = "ndjson",
+    current_user = Depends(get_current_user),
+    clientes: ClientesRepository = Depends(get_clientes_repository),
+):
+    """Exporta clientes, objetivos e investimentos do usuário em NDJSON ou CSV (streaming)."""
+    if formato not in FORMATOS:
+        raise HTTPException(status_code=400, detail="Formato deve ser ndjson ou csv")
+    registros = _registros(clientes, current_user.id)
+    corpo = _exportar_ndjson(registros) if formato == "ndjson" else _exportar_csv(registros)
+    return StreamingResponse(
+        corpo,
+        media_type=FORMATOS[formato],
+        headers={"Content-Disposition": f'attachment; filename="carteira.{formato}"'},
+    )
+
+
+class UploadEmStreaming:
+    """Campo ``arquivo`` de um multipart/form-data lido direto de ``request.stream()``.
+
+    O corpo é analisado à medida que chega: as linhas do arquivo são entregues sem que o
+    upload inteiro seja gravado em disco ou em memória antes.
+    """
+
+    CAMPO = b"arquivo"
+
+    def __init__(self, request: Request):
+        tipo, opcoes = parse_options_header(request.headers.get("content-type", ""))
+        if tipo != b"multipart/form-data" or b"boundary" not in opcoes:
+            raise ValueError("Envie o arquivo no campo 'arquivo'")
+        self.filename: Optional[str] = None
+        self._corpo = request.stream().__aiter__()
+        self._cabecalho = b""
+        self._valor = b""
+        self._disposicao = {}
+        self._no_arquivo = False
+        self._fim = False
+        self._dados: List[bytes] = []
+        self._parser = MultipartParser(opcoes[b"boundary"], {
+            "on_part_begin": self._inicio_parte,
+            "on_header_field": self._campo_cabecalho,
+            "on_header_value": self._valor_cabecalho,
+            "on_header_end": self._fim_cabecalho,
+            "on_headers_finished": self._fim_cabecalhos,
+            "on_part_data": self._dados_parte,
+            "on_part_end": self._fim_parte,
+        })
+
+    def _inicio_parte(self):
+        self._disposicao = {}
+
+    def _campo_cabecalho(self, data: bytes, start: int, end: int):
+        self._cabecalho += data[start:end]
+
+    def _valor_cabecalho(self, data: bytes, start: int, end: int):
+        self._valor += data[start:end]
+
+    def _fim_cabecalho(self):
+        if self._cabecalho.lower() == b"content-disposition":
+            self._disposicao = parse_options_header(self._valor)[1]
+        self._cabecalho, self._valor = b"", b""
+
+    def _fim_cabecalhos(self):
+        # Só o primeiro arquivo enviado no campo é lido; os demais campos são ignorados
+        if self.filename is None and self._disposicao.get(b"name") == self.CAMPO and b"filename" in self._disposicao:
+            self.filename = self._disposicao[b"filename"].decode("utf-8", "replace")
+            self._no_arquivo = True
+
+    def _dados_parte(self, data: bytes, start: int, end: int):
+        if self._no_arquivo:
+            self._dados.append(data[start:end])
+
+    def _fim_parte(self):
+        if self._no_arquivo:
+            self._no_arquivo = False
+            self._fim = True
+
+    async def _alimentar(self) -> bool:
+        try:
+            pedaco = await self._corpo.__anext__()
+        except StopAsyncIteration:
+            self._parser.finalize()
+            return False
+        self._parser.write(pedaco)
+        return True
+
+    async def abrir(self) -> bool:
+        """Lê o corpo até o início do arquivo; ``False`` se o campo não foi enviado."""
+        while self.filename is None:
+            if not await self._alimentar():
+                return False
+        return True
+
+    async def linhas(self) -> AsyncIterator[str]:
+        decoder = codecs.getincrementaldecoder("utf-8-sig")()
+        resto = ""
+        while True:
+            fim = self._fim or not await self._alimentar()
+            pedaco, self._dados = b"".join(self._dados), []
+            *completas, resto = (resto + decoder.decode(pedaco, final=fim)).split("\n")
+            for linha in completas:
+                yield linha + "\n"
+            if fim:
+                break
+        if resto:
+            yield resto
+
+
+async def _ler_registros(linhas: AsyncIterator[str], formato: str) -> AsyncIterator:
+    if formato == "csv":
+        colunas = None
+        registro = ""
+        async for linha in linhas:
+            registro += linha
+            if registro.count('"') % 2:
+                # Aspas abertas: o campo continua na próxima linha
+                continue
+            campos, registro = next(csv.reader([registro])), ""
+            if not campos:
+                continue
+            if colunas is None:
+                colunas = campos
+                continue
+            # Células vazias do CSV equivalem a campos ausentes
+            yield {k: v for k, v in zip(colunas, campos) if k and v != ""}
+        return
+    async for linha in linhas:
+        if linha.strip():
+            try:
+                yield json.loads(linha)
+            except json.JSONDecodeError:
+                yield "JSON inválido"
+
+
+class RespostaImportacao(StreamingResponse):
+    """StreamingResponse sem a escuta de desconexão do Starlette.
+
+    O corpo da requisição ainda está sendo lido enquanto a resposta é enviada, e a
+    escuta consumiria as mensagens dele; uma queda do cliente durante o upload chega
+    como ``ClientDisconnect`` na própria leitura.
+    """
+
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+
+class Importacao:
+    """Valida registros e grava em lotes, na ordem clientes → objetivos → investimentos."""
+
+    def __init__(self, user_id: str, chave: str, clientes, objetivos, investimentos):
+        self.user_id = user_id
+        self.chave = chave
+        self.repos = {"cliente": clientes, "objetivo": objetivos, "investimento": investimentos}
+        self.pendentes = {"cliente": [], "objetivo": [], "investimento": []}
+        self.vistos = {"cliente": set(), "objetivo": set()}
+        self.gravados = {"cliente": 0, "objetivo": 0, "investimento": 0}
+        self.linhas = 0
+        self.total_erros = 0
+        self.erros = []
+
+    def _id(self, registro: str, id_original) -> str:
+        # Ids derivados do arquivo: reimportar com a mesma chave não duplica registros
+        return str(uuid.uuid5(IMPORTACAO_NS, f"{self.user_id}:{self.chave}:{registro}:{id_original}"))
+
+    def _erro(self, mensagem: str):
+        self.total_erros += 1
+        if len(self.erros) < MAX_ERROS_REPORTADOS:
+            self.erros.append({"linha": self.linhas, "erro": mensagem})
+
+    def adicionar(self, row):
+        self.linhas += 1
+        if not isinstance(row, dict):
+            return self._erro(row if isinstance(row, str) else "Linha inválida")
+        registro = row.pop("registro", None)
+        id_original = row.pop("id", None) or f"linha-{self.linhas}"
+        try:
+            if registro == "cliente":
+                dados = {**ClienteCreate(**row).dict(), "user_id": self.user_id}
+            elif registro == "objetivo":
+                dados = ObjetivoCreate(**{**row, "cliente_id": self._id("cliente", row.get("cliente_id"))}).dict()
+                if dados["cliente_id"] not in self.vistos["cliente"]:
+                    return self._erro("cliente_id não corresponde a nenhum cliente anterior do arquivo")
+            elif registro == "investimento":
+                dados = InvestimentoCreate(**{**row, "objetivo_id": self._id("objetivo", row.get("objetivo_id"))}).dict()
+                if dados["objetivo_id"] not in self.vistos["objetivo"]:
+                    return self._erro("objetivo_id não corresponde a nenhum objetivo anterior do arquivo")
+            else:
+                return self._erro(f"Registro desconhecido: {registro}")
+        except ValidationError as e:
+            return self._erro("; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors()))
+
+        dados["id"] = self._id(registro, id_original)
+        if registro in self.vistos:
+            self.vistos[registro].add(dados["id"])
+        self.pendentes[registro].append(dados)
+
+    @property
+    def cheio(self) -> bool:
+        return sum(len(p) for p in self.pendentes.values()) >= settings.IMPORT_BATCH_SIZE
+
+    async def gravar(self):
+        # Pais antes dos filhos, para respeitar as chaves estrangeiras
+        for registro in ("cliente", "objetivo", "investimento"):
+            rows, self.pendentes[registro] = self.pendentes[registro], []
+            repo = self.repos[registro]
+            for inicio in range(0, len(rows), settings.IMPORT_BATCH_SIZE):
+                inseridos = await repo.inserir_varios(rows[inicio:inicio + settings.IMPORT_BATCH_SIZE])
+                central.publicar_varios(self.user_id, repo.TABELA, "insert", inseridos)
+                # Ids já importados com a mesma chave são ignorados pelo upsert
+                self.gravados[registro] += len(inseridos)
+        await invalidar_leituras(self.user_id)
+
+    def progresso(self, **extra) -> str:
+        evento = {
+            "linhas": self.linhas,
+            "clientes": self.gravados["cliente"],
+            "objetivos": self.gravados["objetivo"],
+            "investimentos": self.gravados["investimento"],
+            "erros": self.total_erros,
+            **extra,
+        }
+        return json.dumps(evento, ensure_ascii=False) + "\n"
+
+
+@router.post(
+    "/importar",
+    openapi_extra={"requestBody": {"content": {"multipart/form-data": {"schema": {
+        "type": "object",
+        "properties": {"arquivo": {"type": "string", "format": "binary"}},
+        "required": ["arquivo"],
+    }}}}},
+)
+async def importar(
+    request: Request,
+    formato: Optional[str] = None,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    current_user = Depends(get_current_user),
+    clientes: ClientesRepository = Depends(get_clientes_repository),
+    objetivos: ObjetivosRepository = Depends(get_objetivos_repository),
+    investimentos: InvestimentosRepository = Depends(get_investimentos_repository),
+):
+    """Importa um arquivo NDJSON/CSV (mesmo formato da exportação) e devolve o progresso em NDJSON.
+
+    Cada linha da resposta é um evento de progresso emitido após cada lote gravado;
+    a última traz ``concluido`` e os primeiros erros de validação.
+    """
+    # O arquivo é lido do corpo da requisição à medida que as linhas são gravadas
+    try:
+        upload = UploadEmStreaming(request)
+        encontrado = await upload.abrir()
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not encontrado:
+        raise HTTPException(status_code=400, detail="Envie o arquivo no campo 'arquivo'")
+    formato = formato or ("csv" if upload.filename.lower().endswith(".csv") else "ndjson")
+    if formato not in FORMATOS:
+        raise HTTPException(status_code=400, detail="Formato deve ser ndjson ou csv")
+
+    importacao = Importacao(current_user.id, idempotency_key or uuid.uuid4().hex, clientes, objetivos, investimentos)
+
+    async def processar() -> AsyncIterator[str]:
+        try:
+            async for row in _ler_registros(upload.linhas(), formato):
+                importacao.adicionar(row)
+                if importacao.cheio:
+                    await importacao.gravar()
+                    yield importacao.progresso()
+            await importacao.gravar()
+            yield importacao.progresso(concluido=True, detalhes_erros=importacao.erros)
+        except Exception as e:
+            logger.exception("Falha na importação")
+            yield importacao.progresso(concluido=False, falha=str(e), detalhes_erros=importacao.erros)
+
+    return RespostaImportacao(processar(), media_type=FORMATOS["ndjson"])
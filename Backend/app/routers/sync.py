@@ -0,0 +1,104 @@
+import base64
+import json
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from app.auth import get_current_user
+from app.config import settings
+from app.models import AlteracoesSync
+from app.pagination import MAX_LIMIT
+from app.repositories import SyncRepository, get_sync_repository
+from app.serializacao import resposta_json
+
+router = APIRouter(prefix="/sync", tags=["sync"])
+
+ID_NULO = "00000000-0000-0000-0000-000000000000"
+
+
+@dataclass(frozen=True, order=True)
+class PosicaoSync:
+    """Posição na ordem (alterado_em, tabela, id) das alterações de database_sync.sql.
+
+    Sem ``tabela``/``id``, fica antes de todas as alterações do instante ``em``.
+    """
+
+    em: datetime
+    tabela: str = ""
+    id: str = ID_NULO
+
+
+def codificar_cursor(posicao: PosicaoSync) -> str:
+    payload = {"t": posicao.em.isoformat(), "tb": posicao.tabela, "id": posicao.id}
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode()).decode()
+
+
+def decodificar_cursor(cursor: str) -> PosicaoSync:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        em = datetime.fromisoformat(payload["t"])
+        posicao = PosicaoSync(em if em.tzinfo else em.replace(tzinfo=timezone.utc), payload["tb"], payload["id"])
+    except (ValueError, KeyError, TypeError):
+        raise ValueError("Cursor inválido")
+    return posicao
+
+
+@router.get("", response_model=AlteracoesSync)
+async def sincronizar(
+    since: Optional[str] = Query(None, description="Cursor da sincronização anterior (sem ele, carga completa)"),
+    limit: int = Query(500, ge=1, le=MAX_LIMIT, description="Máximo de alterações por resposta"),
+    current_user = Depends(get_current_user),
+    sync: SyncRepository = Depends(get_sync_repository),
+):
+    """Clientes, objetivos e investimentos criados, alterados ou removidos desde ``since``.
+
+    Guarde o ``cursor`` e envie-o no próximo ``since``; com ``tem_mais``, chame de novo
+    até acabar. Aplique as linhas como upsert por id: alterações recentes podem vir de
+    novo na resposta seguinte. Remover um cliente ou objetivo remove os filhos dele.
+    Cursor mais antigo que SYNC_TOMBSTONE_DAYS: 410, refaça a carga completa.
+    """
+    try:
+        desde = decodificar_cursor(since) if since else None
+        if desde and desde.em < datetime.now(timezone.utc) - timedelta(days=settings.SYNC_TOMBSTONE_DAYS):
+            raise HTTPException(status_code=410, detail="Cursor expirado; sincronize sem since")
+
+        resultado = await sync.alteracoes(
+            current_user.id,
+            desde.em if desde else None,
+            desde.tabela if desde else "",
+            desde.id if desde else ID_NULO,
+            limit + 1,
+        )
+        itens = resultado["itens"]
+        tem_mais = len(itens) > limit
+        itens = itens[:limit]
+
+        if tem_mais:
+            ultimo = itens[-1]
+            proximo = PosicaoSync(datetime.fromisoformat(ultimo["alterado_em"]), ultimo["tabela"], ultimo["id"])
+        else:
+            # Tudo até agora foi entregue, mas transações abertas ainda podem gravar um
+            # updated_at anterior: o cursor fica SYNC_OVERLAP_SECONDS atrás do banco
+            seguro = PosicaoSync(
+                datetime.fromisoformat(resultado["agora"]) - timedelta(seconds=settings.SYNC_OVERLAP_SECONDS)
+            )
+            proximo = max(desde, seguro) if desde else seguro
+
+        conteudo = {
+            "clientes": [],
+            "objetivos": [],
+            "investimentos": [],
+            "removidos": {"clientes": [], "objetivos": [], "investimentos": []},
+            "cursor": codificar_cursor(proximo),
+            "tem_mais": tem_mais,
+        }
+        for item in itens:
+            if item["removido"]:
+                conteudo["removidos"][item["tabela"]].append(item["id"])
+            else:
+                conteudo[item["tabela"]].append(item["dados"])
+        return resposta_json(conteudo, AlteracoesSync)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
@@ -0,0 +1,48 @@
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+import orjson
+from fastapi import Response
+from pydantic import TypeAdapter
+from app.models import Cliente, Objetivo, Investimento, ClienteCarteira
+
+_adapters: Dict[Any, TypeAdapter] = {}
+
+
+def adapter(modelo: Any) -> TypeAdapter:
+    """TypeAdapter do modelo, construído uma única vez por processo."""
+    if modelo not in _adapters:
+        _adapters[modelo] = TypeAdapter(modelo)
+    return _adapters[modelo]
+
+
+def _padrao(valor: Any):
+    if isinstance(valor, Decimal):
+        return float(valor)
+    raise TypeError(f"Tipo não serializável: {type(valor).__name__}")
+
+
+def serializar(conteudo: Any, modelo: Any = None) -> bytes:
+    """JSON da resposta em uma passada.
+
+    Com ``modelo``, o validador compilado do pydantic converte os numéricos
+    (``valor``, ``valor_meta``) e filtra os campos como o response_model faria;
+    sem modelo (projeção parcial), os dicts vão direto para o orjson.
+    """
+    if modelo is None:
+        return orjson.dumps(conteudo, default=_padrao)
+    tipo = adapter(modelo)
+    return tipo.dump_json(tipo.validate_python(conteudo))
+
+
+def resposta_json(
+    conteudo: Any,
+    modelo: Any = None,
+    status_code: int = 200,
+    headers: Optional[Dict[str, str]] = None,
+) -> Response:
+    return Response(serializar(conteudo, modelo), status_code=status_code, media_type="application/json", headers=headers)
+
+
+# Modelos de resposta compilados na importação, não na primeira requisição
+for _modelo in (Cliente, List[Cliente], Objetivo, List[Objetivo], Investimento, List[Investimento], ClienteCarteira):
+    adapter(_modelo)
@@ -0,0 +1,84 @@
+import asyncio
+import copy
+import functools
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """Agrupa chamadas concorrentes com a mesma chave em uma única execução.
+
+    O primeiro chamador dispara a operação; os demais aguardam o mesmo resultado
+    (ou a mesma exceção). A operação roda em uma task própria, então o
+    cancelamento de um chamador não afeta os outros. Um resultado compartilhado é
+    entregue como cópia a cada chamador, inclusive ao primeiro.
+    """
+
+    def __init__(self, nome: str):
+        self.nome = nome
+        self.chamadas = 0
+        self.deduplicadas = 0
+        self._em_voo: Dict[Hashable, asyncio.Task] = {}
+        # task -> chamadores que entraram depois do primeiro
+        self._esperas: Dict[asyncio.Task, int] = {}
+
+    async def executar(self, chave: Hashable, operacao: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._em_voo.get(chave)
+        if task is not None:
+            self.deduplicadas += 1
+            if task in self._esperas:
+                self._esperas[task] += 1
+            return copy.deepcopy(await asyncio.shield(task))
+
+        self.chamadas += 1
+        task = asyncio.ensure_future(operacao())
+        self._em_voo[chave] = task
+        self._esperas[task] = 0
+        task.add_done_callback(functools.partial(self._concluir, chave))
+        try:
+            resultado = await asyncio.shield(task)
+        finally:
+            esperas = self._esperas.pop(task)
+        # O primeiro chamador retoma antes dos demais: com outros esperando, também
+        # recebe uma cópia, para não alterar o resultado antes de eles copiarem. A
+        # chave sai de _em_voo ao fim da task, então ninguém mais entra depois daqui
+        return copy.deepcopy(resultado) if esperas else resultado
+
+    def _concluir(self, chave: Hashable, task: asyncio.Task):
+        if self._em_voo.get(chave) is task:
+            del self._em_voo[chave]
+        # Evita o aviso de exceção não lida quando todos os chamadores foram cancelados
+        if not task.cancelled():
+            task.exception()
+
+    def esquecer(self) -> None:
+        """Novos chamadores passam a disparar novas execuções (as em andamento seguem até o fim)."""
+        self._em_voo.clear()
+
+    def metricas(self) -> Dict[str, int]:
+        return {"chamadas": self.chamadas, "deduplicadas": self.deduplicadas, "em_voo": len(self._em_voo)}
+
+
+_grupos: Dict[str, SingleFlight] = {}
+
+
+def grupo(nome: str) -> SingleFlight:
+    if nome not in _grupos:
+        _grupos[nome] = SingleFlight(nome)
+    return _grupos[nome]
+
+
+def coalescido(nome: str):
+    """Decorator para métodos async: chamadas simultâneas com os mesmos argumentos são agrupadas."""
+    flight = grupo(nome)
+
+    def decorator(metodo):
+        @functools.wraps(metodo)
+        async def wrapper(self, *args, **kwargs):
+            chave = (metodo.__qualname__, getattr(self, "token", None), repr(args), repr(sorted(kwargs.items())))
+            return await flight.executar(chave, lambda: metodo(self, *args, **kwargs))
+        return wrapper
+    return decorator
+
+
+def metricas() -> Dict[str, Dict[str, int]]:
+    return {nome: g.metricas() for nome, g in _grupos.items()}
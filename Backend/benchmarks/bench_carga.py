@@ -0,0 +1,235 @@
+"""Teste de carga: cenários roteirizados contra o app real e um Supabase simulado.
+
+Cada cenário roda com ``--usuarios`` usuários virtuais em paralelo e informa
+latência p50/p95/p99 por requisição, vazão (req/s) e chamadas ao Supabase por
+requisição. Com ``--saida`` o resultado é gravado em JSON (com o commit atual);
+``--comparar`` mostra a variação em relação a um resultado anterior.
+
+    python -m benchmarks.bench_carga
+    python -m benchmarks.bench_carga --cenarios carteira --objetivos 100 --saida antes.json
+    python -m benchmarks.bench_carga --cenarios carteira --objetivos 100 --comparar antes.json
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import subprocess
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List
+
+os.environ.setdefault("SUPABASE_URL", "http://supabase.local")
+os.environ.setdefault("SUPABASE_ANON_KEY", "anon")
+os.environ.setdefault("SUPABASE_JWT_SECRET", "benchmark-secret")
+os.environ.setdefault("SUPABASE_SERVICE_KEY", "benchmark-service")
+
+import httpx
+
+import app.database as database
+from app.config import settings
+from benchmarks.fake_supabase import FakeSupabase
+
+SENHA = "senha-benchmark"
+
+
+def percentil(valores: List[float], p: float) -> float:
+    # Nearest-rank
+    ordenados = sorted(valores)
+    return ordenados[max(0, math.ceil(p / 100 * len(ordenados)) - 1)]
+
+
+class Medidor:
+    """Cliente HTTP que registra latência e status de cada requisição ao app."""
+
+    def __init__(self, client: httpx.AsyncClient):
+        self.client = client
+        self.tempos: List[float] = []
+        self.erros = 0
+
+    async def request(self, metodo: str, url: str, **kwargs) -> httpx.Response:
+        inicio = time.perf_counter()
+        response = await self.client.request(metodo, url, **kwargs)
+        self.tempos.append((time.perf_counter() - inicio) * 1000)
+        if response.status_code >= 400:
+            self.erros += 1
+        return response
+
+
+def _semear_carteiras(fake: FakeSupabase, user_id: str, clientes: int, objetivos: int, investimentos: int) -> List[str]:
+    ids = []
+    for c in range(clientes):
+        cliente = fake.inserir("clientes", user_id=user_id, nome=f"Cliente {c:04d}", email=f"cliente{c}@exemplo.com")
+        ids.append(cliente["id"])
+        for o in range(objetivos):
+            objetivo = fake.inserir("objetivos", cliente_id=cliente["id"], nome=f"Objetivo {o}", valor_meta=100000.0)
+            for i in range(investimentos):
+                fake.inserir("investimentos", objetivo_id=objetivo["id"], nome=f"Investimento {i}",
+                             valor=1000.0 + i, tipo="renda_fixa")
+    return ids
+
+
+def _cabecalho(fake: FakeSupabase, user: dict) -> Dict[str, str]:
+    return {"Authorization": f"Bearer {fake.emitir_token(user)}"}
+
+
+# Cenários: recebem o fake e os argumentos, semeiam dados e devolvem a rotina
+# de um usuário virtual (executada ``--repeticoes`` vezes)
+
+def cenario_dashboard(fake: FakeSupabase, args) -> Callable:
+    """Lista de clientes seguida das carteiras dos primeiros, em paralelo, como o frontend faz."""
+    usuarios = []
+    for u in range(args.usuarios):
+        user = fake.criar_usuario(f"dashboard{u}@exemplo.com", SENHA)
+        ids = _semear_carteiras(fake, user["id"], args.clientes, 3, 4)
+        usuarios.append((_cabecalho(fake, user), ids))
+
+    async def rotina(medidor: Medidor, u: int):
+        headers, ids = usuarios[u]
+        await medidor.request("GET", "/api/clientes/?limit=50", headers=headers)
+        await asyncio.gather(*[
+            medidor.request("GET", f"/api/carteiras/cliente/{cliente_id}/completa", headers=headers)
+            for cliente_id in ids[:5]
+        ])
+    return rotina
+
+
+def cenario_carteira(fake: FakeSupabase, args) -> Callable:
+    """Carteira completa (com totais) de um cliente com ``--objetivos`` objetivos."""
+    user = fake.criar_usuario("carteira@exemplo.com", SENHA)
+    (cliente_id,) = _semear_carteiras(fake, user["id"], 1, args.objetivos, args.investimentos)
+    headers = _cabecalho(fake, user)
+
+    async def rotina(medidor: Medidor, u: int):
+        await medidor.request("GET", f"/api/carteiras/cliente/{cliente_id}/completa?totais=true", headers=headers)
+    return rotina
+
+
+def cenario_lote(fake: FakeSupabase, args) -> Callable:
+    """Criação de ``--lote`` investimentos por requisição."""
+    usuarios = []
+    for u in range(args.usuarios):
+        user = fake.criar_usuario(f"lote{u}@exemplo.com", SENHA)
+        cliente = fake.inserir("clientes", user_id=user["id"], nome="Cliente", email="cliente@exemplo.com")
+        objetivo = fake.inserir("objetivos", cliente_id=cliente["id"], nome="Objetivo")
+        usuarios.append((_cabecalho(fake, user), objetivo["id"]))
+
+    async def rotina(medidor: Medidor, u: int):
+        headers, objetivo_id = usuarios[u]
+        itens = [{"nome": f"Investimento {i}", "valor": 100.0 + i, "objetivo_id": objetivo_id} for i in range(args.lote)]
+        await medidor.request("POST", "/api/lote/investimentos", json=itens, headers=headers)
+    return rotina
+
+
+def cenario_login(fake: FakeSupabase, args) -> Callable:
+    """Rajada de logins simultâneos, cada um seguido de /auth/me com o token novo."""
+    emails = [fake.criar_usuario(f"login{u}@exemplo.com", SENHA)["email"] for u in range(args.usuarios)]
+
+    async def rotina(medidor: Medidor, u: int):
+        response = await medidor.request("POST", "/api/auth/login", json={"email": emails[u], "password": SENHA})
+        if response.status_code == 200:
+            token = response.json()["access_token"]
+            await medidor.request("GET", "/api/auth/me", headers={"Authorization": f"Bearer {token}"})
+    return rotina
+
+
+CENARIOS = {
+    "dashboard": cenario_dashboard,
+    "carteira": cenario_carteira,
+    "lote": cenario_lote,
+    "login": cenario_login,
+}
+
+
+async def executar(nome: str, args) -> dict:
+    fake = FakeSupabase(settings.SUPABASE_JWT_SECRET, latencia=args.latencia, latencia_por_kb=args.latencia_por_kb,
+                        variacao=args.variacao, semente=args.semente, issuer=settings.SUPABASE_JWT_ISSUER,
+                        service_key=settings.SUPABASE_SERVICE_KEY)
+    database.db = database.Database(settings.SUPABASE_URL, settings.SUPABASE_ANON_KEY, transport=fake.transport,
+                                    service_key=settings.SUPABASE_SERVICE_KEY)
+    rotina = CENARIOS[nome](fake, args)
+
+    from main import app
+    from app import http_cache
+    http_cache.cache_respostas.ttl = settings.RESPONSE_CACHE_TTL if args.com_cache else 0
+    http_cache.cache_respostas.backend = http_cache.MemoryBackend(
+        maxsize=settings.RESPONSE_CACHE_MAX_ENTRIES, maxbytes=settings.RESPONSE_CACHE_MAX_BYTES
+    )
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://app", timeout=60) as client:
+        medidor = Medidor(client)
+        fake.chamadas = 0
+        inicio = time.perf_counter()
+        for _ in range(args.repeticoes):
+            await asyncio.gather(*[rotina(medidor, u) for u in range(args.usuarios)])
+        duracao = time.perf_counter() - inicio
+    await database.db.aclose()
+
+    total = len(medidor.tempos)
+    return {
+        "requisicoes": total,
+        "erros": medidor.erros,
+        "p50_ms": percentil(medidor.tempos, 50),
+        "p95_ms": percentil(medidor.tempos, 95),
+        "p99_ms": percentil(medidor.tempos, 99),
+        "req_s": total / duracao,
+        "upstream_por_req": fake.chamadas / total,
+    }
+
+
+def _commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "desconhecido"
+
+
+def _variacao(atual: float, anterior: float) -> str:
+    if not anterior:
+        return ""
+    return f" ({(atual - anterior) / anterior * 100:+.0f}%)"
+
+
+async def main(args) -> None:
+    resultados = {}
+    anteriores = {}
+    if args.comparar:
+        with open(args.comparar) as f:
+            anteriores = json.load(f)["cenarios"]
+
+    print(f"commit {_commit()}: {args.usuarios} usuários virtuais, {args.repeticoes} repetições, "
+          f"latência {args.latencia * 1000:.1f} ms + {args.latencia_por_kb * 1000:.2f} ms/KB")
+    print(f"{'cenário':<12}{'req':>7}{'erros':>7}{'p50 (ms)':>16}{'p95 (ms)':>16}{'p99 (ms)':>16}{'req/s':>16}{'upstream/req':>18}")
+    for nome in args.cenarios:
+        r = resultados[nome] = await executar(nome, args)
+        a = anteriores.get(nome, {})
+        colunas = [f"{r[k]:.2f}{_variacao(r[k], a.get(k))}" for k in ("p50_ms", "p95_ms", "p99_ms", "req_s", "upstream_por_req")]
+        print(f"{nome:<12}{r['requisicoes']:>7}{r['erros']:>7}" + "".join(f"{c:>16}" for c in colunas[:4]) + f"{colunas[4]:>18}")
+
+    if args.saida:
+        with open(args.saida, "w") as f:
+            json.dump({
+                "commit": _commit(),
+                "data": datetime.now(timezone.utc).isoformat(),
+                "parametros": {k: v for k, v in vars(args).items() if k not in ("saida", "comparar")},
+                "cenarios": resultados,
+            }, f, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cenarios", nargs="+", choices=list(CENARIOS), default=list(CENARIOS))
+    parser.add_argument("--usuarios", type=int, default=20, help="usuários virtuais simultâneos")
+    parser.add_argument("--repeticoes", type=int, default=10)
+    parser.add_argument("--clientes", type=int, default=20, help="clientes por usuário (dashboard)")
+    parser.add_argument("--objetivos", type=int, default=50, help="objetivos da carteira (carteira)")
+    parser.add_argument("--investimentos", type=int, default=5, help="investimentos por objetivo (carteira)")
+    parser.add_argument("--lote", type=int, default=100, help="itens por requisição (lote)")
+    parser.add_argument("--latencia", type=float, default=0.005, help="segundos por chamada ao Supabase")
+    parser.add_argument("--latencia-por-kb", type=float, default=0.0001, help="segundos por KB de resposta")
+    parser.add_argument("--variacao", type=float, default=0.2, help="variação relativa da latência (0–1)")
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--com-cache", action="store_true", help="mantém o cache de leituras ligado")
+    parser.add_argument("--saida", help="grava o resultado em JSON")
+    parser.add_argument("--comparar", help="JSON de uma execução anterior para comparação")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,113 @@
+"""Benchmark: listagem completa vs. paginação por cursor vs. projeção de campos.
+
+Roda o app FastAPI real contra um PostgREST simulado em memória (com latência
+proporcional ao tamanho da resposta) e mede bytes transferidos e latência.
+
+    python -m benchmarks.bench_paginacao --clientes 5000 --repeticoes 20
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+os.environ.setdefault("SUPABASE_URL", "http://supabase.local")
+os.environ.setdefault("SUPABASE_ANON_KEY", "anon")
+os.environ.setdefault("SUPABASE_JWT_SECRET", "benchmark-secret")
+# Mede a consulta, não o cache de leituras
+os.environ.setdefault("RESPONSE_CACHE_TTL", "0")
+
+import httpx
+from jose import jwt
+
+import app.database as database
+from app.config import settings
+
+USER_ID = str(uuid.uuid4())
+
+
+def gerar_clientes(n: int) -> list:
+    inicio = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    return [
+        {
+            "id": str(uuid.UUID(int=i + 1)),
+            "user_id": USER_ID,
+            "nome": f"Cliente {i:06d}",
+            "email": f"cliente{i}@exemplo.com",
+            "telefone": "+55 11 99999-0000",
+            "created_at": (inicio + timedelta(minutes=i)).isoformat(),
+            "updated_at": (inicio + timedelta(minutes=i)).isoformat(),
+        }
+        for i in range(n)
+    ]
+
+
+def fake_postgrest(rows: list, latencia_base: float, latencia_por_kb: float):
+    """Serve a tabela clientes respeitando select e limit (primeira página)."""
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        params = request.url.params
+        resultado = rows
+        if "limit" in params:
+            resultado = resultado[: int(params["limit"])]
+        select = params.get("select", "*")
+        if select != "*":
+            campos = select.split(",")
+            resultado = [{k: r[k] for k in campos} for r in resultado]
+        body = json.dumps(resultado).encode()
+        await asyncio.sleep(latencia_base + latencia_por_kb * len(body) / 1024)
+        return httpx.Response(200, content=body, headers={"Content-Type": "application/json"})
+
+    return handler
+
+
+def token() -> str:
+    now = int(time.time())
+    claims = {"sub": USER_ID, "aud": settings.SUPABASE_JWT_AUDIENCE, "iss": settings.SUPABASE_JWT_ISSUER,
+              "iat": now, "exp": now + 3600, "role": "authenticated"}
+    return jwt.encode(claims, settings.SUPABASE_JWT_SECRET, algorithm="HS256")
+
+
+async def medir(client: httpx.AsyncClient, url: str, repeticoes: int) -> dict:
+    headers = {"Authorization": f"Bearer {token()}"}
+    tempos, tamanho = [], 0
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        response = await client.get(url, headers=headers)
+        tempos.append((time.perf_counter() - inicio) * 1000)
+        response.raise_for_status()
+        tamanho = len(response.content)
+    return {"p50_ms": statistics.median(tempos), "max_ms": max(tempos), "bytes": tamanho}
+
+
+async def main(args) -> None:
+    rows = gerar_clientes(args.clientes)
+    transport = httpx.MockTransport(fake_postgrest(rows, args.latencia_base, args.latencia_por_kb))
+    database.db = database.Database(settings.SUPABASE_URL, settings.SUPABASE_ANON_KEY, transport=transport)
+
+    from main import app
+
+    cenarios = {
+        "completa": "/api/clientes/",
+        f"pagina limit={args.limit}": f"/api/clientes/?limit={args.limit}",
+        f"pagina limit={args.limit} fields=nome": f"/api/clientes/?limit={args.limit}&fields=nome",
+    }
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://app") as client:
+        print(f"{args.clientes} clientes, {args.repeticoes} repetições")
+        print(f"{'cenário':<32}{'p50 (ms)':>10}{'máx (ms)':>10}{'bytes':>12}")
+        for nome, url in cenarios.items():
+            r = await medir(client, url, args.repeticoes)
+            print(f"{nome:<32}{r['p50_ms']:>10.2f}{r['max_ms']:>10.2f}{r['bytes']:>12}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clientes", type=int, default=5000)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--repeticoes", type=int, default=20)
+    parser.add_argument("--latencia-base", type=float, default=0.005, help="segundos por chamada")
+    parser.add_argument("--latencia-por-kb", type=float, default=0.0001, help="segundos por KB transferido")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,116 @@
+"""Benchmark: serialização das respostas de carteiras, caminho antigo vs. novo.
+
+Antigo: laços Decimal→float nos handlers, validação pelo response_model do FastAPI,
+``jsonable_encoder`` e ``JSONResponse``. Novo: ``app.serializacao.serializar``
+(TypeAdapter pré-compilado + dump_json do pydantic-core).
+
+    python -m benchmarks.bench_serializacao --linhas 10000 --repeticoes 20
+"""
+import argparse
+import asyncio
+import copy
+import os
+import statistics
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import List
+
+os.environ.setdefault("SUPABASE_URL", "http://supabase.local")
+os.environ.setdefault("SUPABASE_ANON_KEY", "anon")
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from app.models import Investimento, ClienteCarteira
+from app.serializacao import serializar
+
+
+def gerar_investimentos(n: int, objetivos: int) -> list:
+    inicio = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    return [
+        {
+            "id": str(uuid.UUID(int=i + 1)),
+            "objetivo_id": str(uuid.UUID(int=10**9 + i % objetivos)),
+            "nome": f"Investimento {i:06d}",
+            "valor": Decimal(f"{1000 + i}.{i % 100:02d}"),
+            "tipo": "renda_fixa",
+            "created_at": (inicio + timedelta(minutes=i)).isoformat(),
+        }
+        for i in range(n)
+    ]
+
+
+def gerar_carteira(investimentos: list, objetivos: int) -> dict:
+    objetivos_data = [
+        {"id": str(uuid.UUID(int=10**9 + j)), "cliente_id": str(uuid.UUID(int=1)), "nome": f"Objetivo {j}",
+         "descricao": None, "valor_meta": Decimal("100000.00"), "created_at": "2024-01-01T00:00:00+00:00"}
+        for j in range(objetivos)
+    ]
+    por_objetivo = {o["id"]: [] for o in objetivos_data}
+    for inv in investimentos:
+        por_objetivo[inv["objetivo_id"]].append(inv)
+    return {"cliente_id": str(uuid.UUID(int=1)), "objetivos": objetivos_data,
+            "investimentos_por_objetivo": por_objetivo, "totais_por_objetivo": None}
+
+
+async def antigo_lista(rows: list, field) -> bytes:
+    for inv in rows:
+        if 'valor' in inv and inv['valor'] is not None:
+            inv['valor'] = float(inv['valor'])
+    conteudo = await serialize_response(field=field, response_content=rows)
+    return JSONResponse(conteudo).body
+
+
+async def antigo_carteira(carteira: dict, field) -> bytes:
+    for objetivo in carteira["objetivos"]:
+        if objetivo.get('valor_meta') is not None:
+            objetivo['valor_meta'] = float(objetivo['valor_meta'])
+    for investimentos in carteira["investimentos_por_objetivo"].values():
+        for inv in investimentos:
+            if 'valor' in inv and inv['valor'] is not None:
+                inv['valor'] = float(inv['valor'])
+    conteudo = await serialize_response(field=field, response_content=carteira)
+    return JSONResponse(conteudo).body
+
+
+async def medir(funcao, dados, repeticoes: int) -> dict:
+    tempos, tamanho = [], 0
+    for _ in range(repeticoes):
+        entrada = copy.deepcopy(dados)
+        inicio = time.perf_counter()
+        resultado = funcao(entrada)
+        if asyncio.iscoroutine(resultado):
+            resultado = await resultado
+        tempos.append((time.perf_counter() - inicio) * 1000)
+        tamanho = len(resultado)
+    return {"p50_ms": statistics.median(tempos), "max_ms": max(tempos), "bytes": tamanho}
+
+
+async def main(args) -> None:
+    investimentos = gerar_investimentos(args.linhas, args.objetivos)
+    carteira = gerar_carteira(investimentos, args.objetivos)
+    campo_lista = create_model_field(name="Response_lista", type_=List[Investimento], mode="serialization")
+    campo_carteira = create_model_field(name="Response_carteira", type_=ClienteCarteira, mode="serialization")
+
+    cenarios = {
+        "lista antigo": (lambda d: antigo_lista(d, campo_lista), investimentos),
+        "lista novo": (lambda d: serializar(d, List[Investimento]), investimentos),
+        "carteira antigo": (lambda d: antigo_carteira(d, campo_carteira), carteira),
+        "carteira novo": (lambda d: serializar(d, ClienteCarteira), carteira),
+    }
+    print(f"{args.linhas} investimentos em {args.objetivos} objetivos, {args.repeticoes} repetições")
+    print(f"{'cenário':<20}{'p50 (ms)':>10}{'máx (ms)':>10}{'bytes':>12}")
+    for nome, (funcao, dados) in cenarios.items():
+        r = await medir(funcao, dados, args.repeticoes)
+        print(f"{nome:<20}{r['p50_ms']:>10.2f}{r['max_ms']:>10.2f}{r['bytes']:>12}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--linhas", type=int, default=10000)
+    parser.add_argument("--objetivos", type=int, default=20)
+    parser.add_argument("--repeticoes", type=int, default=20)
+    asyncio.run(main(parser.parse_args()))
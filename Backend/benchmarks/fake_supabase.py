@@ -0,0 +1,654 @@
+"""Supabase simulado em memória (PostgREST + GoTrue) servido como transporte httpx.
+
+Cobre o que a API usa: token (password/refresh_token), signup, user e logout do
+Auth; select com embeds (inclusive ``!inner``), filtros eq/in/gt/gte/lt/lte/like/
+ilike/is/or, order, limit/offset, insert/upsert (ignore/merge), PATCH e DELETE em
+cascata do PostgREST, além das funções de database_resumo.sql, database_busca.sql,
+database_historico.sql, database_sync.sql e database_lotes.sql (resumo, busca,
+histórico, sincronização e atualização em lote).
+Requisições com o JWT de um usuário (modo ``DB_RLS_WRITES``) seguem as políticas RLS
+de database_setup.sql: só enxergam as linhas do dono e não gravam linhas de outro
+usuário (erro 42501). As funções sem EXECUTE para anon/authenticated
+(``FUNCOES_SERVICO``) só aceitam a chave ``service_key``.
+A latência injetada é
+``latencia + latencia_por_kb * KB`` da resposta, com variação pseudoaleatória
+reprodutível (``semente``).
+
+    fake = FakeSupabase(jwt_secret, latencia=0.005, service_key=service_key)
+    database.db = database.Database(url, key, transport=fake.transport, service_key=service_key)
+"""
+import asyncio
+import json
+import random
+import re
+import time
+import unicodedata
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+import httpx
+from jose import jwt
+
+# tabela -> {coluna estrangeira: tabela referenciada}
+RELACOES = {
+    "clientes": {},
+    "objetivos": {"cliente_id": "clientes"},
+    "investimentos": {"objetivo_id": "objetivos"},
+}
+# REVOKE EXECUTE ... FROM PUBLIC, anon, authenticated em database_resumo.sql e database_historico.sql
+FUNCOES_SERVICO = {"resumo_reconstruir", "historico_registrar"}
+RESERVADOS = {"select", "order", "limit", "offset", "on_conflict", "columns"}
+DEFAULTS = {
+    "clientes": {"telefone": None},
+    "objetivos": {"descricao": None, "valor_meta": None},
+    "investimentos": {"tipo": None},
+}
+
+
+def agora() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _split(texto: str, sep: str = ",") -> List[str]:
+    partes, nivel, atual, aspas = [], 0, "", False
+    for c in texto:
+        if c == '"':
+            aspas = not aspas
+        if not aspas and c == "(":
+            nivel += 1
+        elif not aspas and c == ")":
+            nivel -= 1
+        if c == sep and nivel == 0 and not aspas:
+            partes.append(atual)
+            atual = ""
+        else:
+            atual += c
+    if atual:
+        partes.append(atual)
+    return [p.strip() for p in partes]
+
+
+def parse_select(select: str) -> list:
+    itens = []
+    for parte in _split(select):
+        m = re.match(r"^([\w]+)(!inner)?\((.*)\)$", parte, re.S)
+        if m:
+            itens.append((m.group(1), bool(m.group(2)), parse_select(m.group(3))))
+        else:
+            itens.append(parte)
+    return itens
+
+
+def _unquote(v: str) -> str:
+    if len(v) >= 2 and v[0] == '"' and v[-1] == '"':
+        return v[1:-1].replace('\\"', '"').replace("\\\\", "\\")
+    return v
+
+
+def _coerce(valor, alvo):
+    if isinstance(alvo, (int, float)) and not isinstance(alvo, bool):
+        try:
+            return float(valor)
+        except (TypeError, ValueError):
+            return valor
+    return valor
+
+
+def _compara(op: str, atual, esperado: str) -> bool:
+    if op == "is":
+        return atual is None if esperado == "null" else str(atual).lower() == esperado
+    if op == "in":
+        valores = [_unquote(v) for v in _split(esperado.strip("()"))]
+        return str(atual) in valores
+    if op in ("like", "ilike"):
+        if atual is None:
+            return False
+        padrao = re.escape(esperado).replace(r"\*", ".*").replace("%", ".*")
+        padrao = padrao.replace(r"\\\\_", "_").replace(r"\\\\%", "%")
+        flags = re.I if op == "ilike" else 0
+        return re.fullmatch(padrao, str(atual), flags) is not None
+    if atual is None:
+        return False
+    esperado = _coerce(_unquote(esperado), atual)
+    if isinstance(atual, (int, float)) and not isinstance(esperado, (int, float)):
+        return False
+    return {
+        "eq": lambda a, b: a == b,
+        "neq": lambda a, b: a != b,
+        "gt": lambda a, b: a > b,
+        "gte": lambda a, b: a >= b,
+        "lt": lambda a, b: a < b,
+        "lte": lambda a, b: a <= b,
+    }[op](atual, esperado)
+
+
+def _avaliar_logico(expr: str, row: dict) -> bool:
+    m = re.match(r"^(and|or)\((.*)\)$", expr, re.S)
+    if m:
+        partes = [_avaliar_logico(p, row) for p in _split(m.group(2))]
+        return all(partes) if m.group(1) == "and" else any(partes)
+    coluna, op, valor = expr.split(".", 2)
+    if op == "not":
+        op, valor = valor.split(".", 1)
+        return not _compara(op, row.get(coluna), valor)
+    return _compara(op, row.get(coluna), valor)
+
+
+def _violacao_rls(tabela: str) -> httpx.Response:
+    return httpx.Response(403, json={"code": "42501", "message": f'new row violates row-level security policy for table "{tabela}"', "details": None, "hint": None})
+
+
+def _normalizar(texto: Optional[str]) -> str:
+    return "".join(c for c in unicodedata.normalize("NFKD", texto or "") if not unicodedata.combining(c)).lower()
+
+
+def _trigramas(palavra: str) -> set:
+    palavra = f"  {palavra} "
+    return {palavra[i:i + 3] for i in range(len(palavra) - 2)}
+
+
+def _similaridade_palavra(q: str, texto: str) -> float:
+    """Aproximação de word_similarity do pg_trgm: melhor palavra de ``texto``."""
+    alvo = set().union(*(_trigramas(p) for p in re.findall(r"\w+", q))) if q else set()
+    if not alvo:
+        return 0.0
+    return max((len(alvo & _trigramas(p)) / len(alvo) for p in re.findall(r"\w+", texto)), default=0.0)
+
+
+class FakeSupabase:
+    """Estado em memória + contadores de chamadas, servido por ``transport``."""
+
+    def __init__(
+        self,
+        jwt_secret: str,
+        latencia: float = 0.0,
+        latencia_por_kb: float = 0.0,
+        variacao: float = 0.0,
+        semente: int = 0,
+        issuer: str = "http://supabase.local/auth/v1",
+        service_key: Optional[str] = None,
+        sessao_no_signup: bool = True,
+    ):
+        self.jwt_secret = jwt_secret
+        self.latencia = latencia
+        self.latencia_por_kb = latencia_por_kb
+        self.variacao = variacao
+        self.issuer = issuer
+        self.service_key = service_key
+        # False: o signup devolve só o usuário, como em projetos que não emitem sessão nele
+        self.sessao_no_signup = sessao_no_signup
+        self.tabelas: Dict[str, Dict[str, dict]] = {t: {} for t in RELACOES}
+        self.usuarios: Dict[str, dict] = {}
+        self.refresh_tokens: Dict[str, str] = {}
+        # investimento_id -> {registrado_em: valor} (trigger de database_historico.sql)
+        self.historico: Dict[str, Dict[datetime, float]] = {}
+        # (tabela, id) -> {"user_id", "removido_em"} (tombstones de database_sync.sql)
+        self.remocoes: Dict[tuple, dict] = {}
+        # user_id -> linha de resumo_usuarios gravada pelo último resumo_reconstruir do usuário
+        self.resumos: Dict[str, dict] = {}
+        self.chamadas = 0
+        self.chamadas_por_rota: Counter = Counter()
+        self._random = random.Random(semente)
+        self.transport = httpx.MockTransport(self.handle)
+
+    def inserir(self, tabela: str, **campos) -> dict:
+        """Grava direto no estado, sem passar pelo transporte (para semear dados)."""
+        row = {**DEFAULTS[tabela], "id": str(uuid.uuid4()), "created_at": agora(), **campos}
+        row.setdefault("updated_at", row["created_at"])
+        self.tabelas[tabela][row["id"]] = row
+        self.remocoes.pop((tabela, row["id"]), None)
+        if tabela == "investimentos":
+            self._registrar_valor(row, datetime.fromisoformat(row["created_at"]))
+        return row
+
+    def _registrar_valor(self, row: dict, quando: Optional[datetime] = None) -> None:
+        self.historico.setdefault(row["id"], {})[quando or datetime.now(timezone.utc)] = row["valor"]
+
+    # ---- GoTrue ----
+    def criar_usuario(self, email: str, password: str = "senha123") -> dict:
+        user = {"id": str(uuid.uuid4()), "email": email, "password": password, "aud": "authenticated",
+                "role": "authenticated", "app_metadata": {}, "user_metadata": {}, "created_at": agora()}
+        self.usuarios[user["id"]] = user
+        return user
+
+    def emitir_token(self, user: dict, ttl: int = 3600, sessao: Optional[str] = None) -> str:
+        now = int(time.time())
+        return jwt.encode({"sub": user["id"], "email": user["email"], "aud": "authenticated", "role": "authenticated",
+                           "iss": self.issuer, "iat": now, "exp": now + ttl, "session_id": sessao or str(uuid.uuid4())},
+                          self.jwt_secret, algorithm="HS256")
+
+    def _sessao(self, user: dict) -> dict:
+        publico = {k: v for k, v in user.items() if k != "password"}
+        refresh_token = uuid.uuid4().hex
+        self.refresh_tokens[refresh_token] = user["id"]
+        return {"access_token": self.emitir_token(user), "token_type": "bearer", "expires_in": 3600,
+                "expires_at": int(time.time()) + 3600, "refresh_token": refresh_token, "user": publico}
+
+    def _usuario_do_token(self, request: httpx.Request) -> Optional[dict]:
+        auth = request.headers.get("authorization", "")
+        token = auth.removeprefix("Bearer ")
+        try:
+            claims = jwt.decode(token, self.jwt_secret, algorithms=["HS256"], audience="authenticated")
+        except Exception:
+            return None
+        return self.usuarios.get(claims.get("sub"))
+
+    def _servico(self, request: httpx.Request) -> bool:
+        return bool(self.service_key) and request.headers.get("authorization") == f"Bearer {self.service_key}"
+
+    def _auth(self, request: httpx.Request, path: str) -> httpx.Response:
+        body = json.loads(request.content or b"{}")
+        if path == "token":
+            if request.url.params.get("grant_type") == "password":
+                user = next((u for u in self.usuarios.values() if u["email"] == body.get("email")), None)
+                if not user or user["password"] != body.get("password"):
+                    return httpx.Response(400, json={"error": "invalid_grant", "error_description": "Invalid login credentials"})
+                return httpx.Response(200, json=self._sessao(user))
+            if request.url.params.get("grant_type") == "refresh_token":
+                user_id = self.refresh_tokens.pop(body.get("refresh_token"), None)
+                if user_id not in self.usuarios:
+                    return httpx.Response(400, json={"error": "invalid_grant", "error_description": "Invalid Refresh Token"})
+                return httpx.Response(200, json=self._sessao(self.usuarios[user_id]))
+        if path == "signup":
+            user = self.criar_usuario(body["email"], body["password"])
+            if not self.sessao_no_signup:
+                return httpx.Response(200, json={k: v for k, v in user.items() if k != "password"})
+            return httpx.Response(200, json=self._sessao(user))
+        if path == "user":
+            user = self._usuario_do_token(request)
+            if not user:
+                return httpx.Response(401, json={"msg": "invalid JWT"})
+            return httpx.Response(200, json={k: v for k, v in user.items() if k != "password"})
+        if path == "logout":
+            if not self._usuario_do_token(request):
+                return httpx.Response(401, json={"msg": "invalid JWT"})
+            return httpx.Response(204)
+        if path == ".well-known/jwks.json":
+            return httpx.Response(200, json={"keys": []})
+        if path == "health":
+            return httpx.Response(200, json={"name": "GoTrue", "description": "simulado"})
+        return httpx.Response(404, json={"msg": "not found"})
+
+    # ---- PostgREST ----
+    def _filhos(self, tabela: str, fk: str, memo: dict) -> Dict[str, List[dict]]:
+        # Índice pai -> filhos, montado uma vez por consulta
+        chave = (tabela, fk)
+        if chave not in memo:
+            indice: Dict[str, List[dict]] = {}
+            for r in self.tabelas[tabela].values():
+                indice.setdefault(r.get(fk), []).append(r)
+            memo[chave] = indice
+        return memo[chave]
+
+    def _embed(self, tabela: str, row: dict, item, memo: dict) -> Optional[object]:
+        nome, inner, sub = item
+        relacoes = RELACOES[tabela]
+        fk = next((c for c, t in relacoes.items() if t == nome), None)
+        if fk:  # muitos-para-um: objeto
+            pai = self.tabelas[nome].get(row.get(fk))
+            return self._projetar(nome, pai, sub, memo) if pai else None
+        fk_filho = next(c for c, t in RELACOES[nome].items() if t == tabela)
+        filhos = self._filhos(nome, fk_filho, memo).get(row["id"], [])
+        return [self._projetar(nome, f, sub, memo) for f in filhos]
+
+    def _projetar(self, tabela: str, row: dict, select: list, memo: dict) -> dict:
+        out = {}
+        for item in select:
+            if isinstance(item, tuple):
+                out[item[0]] = self._embed(tabela, row, item, memo)
+            elif item == "*":
+                out.update(row)
+            else:
+                out[item] = row.get(item)
+        return out
+
+    def _filtrar(self, rows: List[dict], params: httpx.QueryParams, select: list) -> List[dict]:
+        inner = {item[0] for item in select if isinstance(item, tuple) and item[1]}
+        for chave, valor in params.multi_items():
+            if chave in RESERVADOS:
+                continue
+            if chave == "or":
+                rows = [r for r in rows if _avaliar_logico(f"or{valor}", r)]
+                continue
+            op, esperado = valor.split(".", 1)
+            caminho = chave.split(".")
+            novos = []
+            for r in rows:
+                atual = r
+                for parte in caminho:
+                    atual = atual.get(parte) if isinstance(atual, dict) else None
+                if _compara(op, atual, esperado):
+                    novos.append(r)
+            rows = novos
+        # !inner: descarta linhas cujo embed ficou vazio
+        for nome in inner:
+            rows = [r for r in rows if r.get(nome)]
+        return rows
+
+    def _ler(self, tabela: str, params: httpx.QueryParams, dono: Optional[str] = None) -> List[dict]:
+        select = parse_select(params.get("select", "*"))
+        memo: dict = {}
+        # Filtros em colunas da própria tabela antes de montar os embeds
+        base = list(self.tabelas[tabela].values())
+        if dono:
+            base = [r for r in base if self._dono(tabela, r) == dono]
+        for chave, valor in params.multi_items():
+            if chave not in RESERVADOS and chave != "or" and "." not in chave:
+                op, esperado = valor.split(".", 1)
+                base = [r for r in base if _compara(op, r.get(chave), esperado)]
+        rows = [self._projetar(tabela, r, select + ["*"], memo) for r in base]
+        rows = self._filtrar(rows, params, select)
+        if "order" in params:
+            for termo in reversed(params["order"].split(",")):
+                coluna, *mods = termo.split(".")
+                rows.sort(key=lambda r: (r.get(coluna) is None, r.get(coluna) or 0 if isinstance(r.get(coluna), (int, float)) else str(r.get(coluna) or "")),
+                          reverse="desc" in mods)
+        if "offset" in params:
+            rows = rows[int(params["offset"]):]
+        if "limit" in params:
+            rows = rows[: int(params["limit"])]
+        return [self._recortar(tabela, r, select) for r in rows]
+
+    def _recortar(self, tabela: str, row: dict, select: list) -> dict:
+        # Linha já projetada (com embeds): mantém só o que o select pediu
+        out = {}
+        for item in select:
+            if isinstance(item, tuple):
+                out[item[0]] = row[item[0]]
+            elif item == "*":
+                out.update(self.tabelas[tabela][row["id"]])
+            else:
+                out[item] = row.get(item)
+        return out
+
+    def _gravar(self, tabela: str, request: httpx.Request, dono: Optional[str] = None) -> httpx.Response:
+        body = json.loads(request.content)
+        linhas = body if isinstance(body, list) else [body]
+        prefer = request.headers.get("prefer", "")
+        ignorar = "resolution=ignore-duplicates" in prefer
+        mesclar = "resolution=merge-duplicates" in prefer
+        if dono:
+            for linha in linhas:
+                existente = self.tabelas[tabela].get(linha.get("id"))
+                if self._dono(tabela, linha) != dono or (existente and mesclar and self._dono(tabela, existente) != dono):
+                    return _violacao_rls(tabela)
+        resultado = []
+        for linha in linhas:
+            linha = dict(linha)
+            existente = self.tabelas[tabela].get(linha.get("id"))
+            if existente:
+                if ignorar:
+                    continue
+                if not mesclar:
+                    return httpx.Response(409, json={"code": "23505", "message": "duplicate key value violates unique constraint", "details": None, "hint": None})
+                valor_anterior = existente.get("valor")
+                existente.update(linha)
+                existente["updated_at"] = agora()
+                if tabela == "investimentos" and existente["valor"] != valor_anterior:
+                    self._registrar_valor(existente)
+                resultado.append(dict(existente))
+                continue
+            for coluna, pai in RELACOES[tabela].items():
+                if linha.get(coluna) not in self.tabelas[pai]:
+                    return httpx.Response(409, json={"code": "23503", "message": "foreign key violation", "details": None, "hint": None})
+            resultado.append(dict(self.inserir(tabela, **linha)))
+        return httpx.Response(201, json=resultado)
+
+    def _dono(self, tabela: str, row: dict) -> Optional[str]:
+        if tabela == "investimentos":
+            objetivo = self.tabelas["objetivos"].get(row.get("objetivo_id"))
+            return self._dono("objetivos", objetivo) if objetivo else None
+        if tabela == "objetivos":
+            cliente = self.tabelas["clientes"].get(row.get("cliente_id"))
+            return cliente.get("user_id") if cliente else None
+        return row.get("user_id")
+
+    def _remover_cascata(self, tabela: str, row_id: str, cascata: bool = False) -> None:
+        row = self.tabelas[tabela].pop(row_id, None)
+        # Tombstone só do registro removido; os filhos vão na cascata do pai
+        if row is not None and not cascata:
+            self.remocoes[(tabela, row_id)] = {"user_id": self._dono(tabela, row), "removido_em": agora()}
+        if tabela == "investimentos":
+            self.historico.pop(row_id, None)
+        for filho, relacoes in RELACOES.items():
+            for coluna, pai in relacoes.items():
+                if pai == tabela:
+                    for f in [r for r in self.tabelas[filho].values() if r.get(coluna) == row_id]:
+                        self._remover_cascata(filho, f["id"], cascata=True)
+
+    def _resumo(self, params: httpx.QueryParams) -> List[dict]:
+        # Equivalente ao que os triggers de database_resumo.sql mantêm, calculado na hora
+        resumo = self._calcular_resumo(params.get("user_id", "").removeprefix("eq."))
+        return [resumo] if resumo else []
+
+    def _resumo_reconstruir(self, params: dict) -> None:
+        # Só a linha de p_user_id é recalculada; as dos outros usuários ficam como estão
+        user_id = params["p_user_id"]
+        resumo = self._calcular_resumo(user_id)
+        if resumo:
+            self.resumos[user_id] = resumo
+        else:
+            self.resumos.pop(user_id, None)
+
+    def _calcular_resumo(self, user_id: str) -> Optional[dict]:
+        clientes = {c["id"] for c in self.tabelas["clientes"].values() if c.get("user_id") == user_id}
+        if not clientes:
+            return None
+        objetivos = {o["id"]: o for o in self.tabelas["objetivos"].values() if o.get("cliente_id") in clientes}
+        investido: Counter = Counter()
+        alocacao: Dict[str, dict] = {}
+        for i in self.tabelas["investimentos"].values():
+            if i.get("objetivo_id") in objetivos:
+                investido[i["objetivo_id"]] += i.get("valor") or 0
+                tipo = alocacao.setdefault(i.get("tipo") or "", {"tipo": i.get("tipo") or "", "total": 0, "quantidade": 0})
+                tipo["total"] += i.get("valor") or 0
+                tipo["quantidade"] += 1
+        metas = {oid: o.get("valor_meta") or 0 for oid, o in objetivos.items()}
+        return {
+            "user_id": user_id,
+            "clientes": len(clientes),
+            "objetivos": len(objetivos),
+            "objetivos_com_meta": sum(1 for m in metas.values() if m > 0),
+            "total_investido": sum(investido.values()),
+            "soma_metas": sum(metas.values()),
+            "meta_coberta": sum(min(investido[oid], m) for oid, m in metas.items() if m > 0),
+            "atualizado_em": agora(),
+            "resumo_alocacao": list(alocacao.values()),
+        }
+
+    def _buscar_clientes(self, params: dict) -> List[dict]:
+        # Mesma regra de database_busca.sql; a similaridade aproxima a do pg_trgm
+        q = _normalizar(params["p_q"]).strip()
+        digitos = re.sub(r"\D", "", params["p_q"])
+        if not q:
+            return []
+        apos = (params.get("p_apos_relevancia"), params.get("p_apos_id"))
+        resultado = []
+        for c in self.tabelas["clientes"].values():
+            if c.get("user_id") != params["p_user_id"]:
+                continue
+            telefone = re.sub(r"\D", "", c.get("telefone") or "")
+            texto = f"{_normalizar(c['nome'])} {_normalizar(c['email'])} {telefone}"
+            similaridade = _similaridade_palavra(q, texto)
+            trecho = q in texto or (len(digitos) >= 3 and digitos in texto)
+            if not trecho and similaridade < 0.4:
+                continue
+            bonus = 3 if texto.startswith(q) else 2 if f" {q}" in texto else 1 if trecho else 0
+            relevancia = round(bonus + similaridade, 6)
+            if apos[1] is not None and (relevancia, c["id"]) >= apos:
+                continue
+            resultado.append({**c, "relevancia": relevancia})
+        resultado.sort(key=lambda r: (r["relevancia"], r["id"]), reverse=True)
+        return resultado[: params.get("p_limite", 20)]
+
+    def _investimentos_do_usuario(self, user_id: str) -> Dict[str, tuple]:
+        # investimento_id -> (objetivo_id, cliente_id)
+        clientes = {c["id"] for c in self.tabelas["clientes"].values() if c.get("user_id") == user_id}
+        objetivos = {o["id"]: o["cliente_id"] for o in self.tabelas["objetivos"].values() if o.get("cliente_id") in clientes}
+        return {
+            i["id"]: (i["objetivo_id"], objetivos[i["objetivo_id"]])
+            for i in self.tabelas["investimentos"].values() if i.get("objetivo_id") in objetivos
+        }
+
+    def _historico_registrar(self, params: dict) -> List[str]:
+        meus = self._investimentos_do_usuario(params["p_user_id"])
+        quando = params.get("p_registrado_em")
+        gravados = []
+        for item in params["p_itens"]:
+            if item["investimento_id"] not in meus:
+                continue
+            row = self.tabelas["investimentos"][item["investimento_id"]]
+            if quando:
+                self.historico.setdefault(row["id"], {})[datetime.fromisoformat(quando)] = item["valor"]
+            elif row["valor"] != item["valor"]:
+                row["valor"] = item["valor"]
+                row["updated_at"] = agora()
+                self._registrar_valor(row)
+            gravados.append(row["id"])
+        return gravados
+
+    def _historico_valores(self, params: dict) -> List[dict]:
+        unidade = params["p_intervalo"]
+        inicio, fim = datetime.fromisoformat(params["p_inicio"]), datetime.fromisoformat(params["p_fim"])
+        alvo = [
+            i for i, (objetivo_id, cliente_id) in self._investimentos_do_usuario(params["p_user_id"]).items()
+            if params.get("p_investimento_id") in (None, i)
+            and params.get("p_objetivo_id") in (None, objetivo_id)
+            and params.get("p_cliente_id") in (None, cliente_id)
+        ]
+        balde = inicio.replace(hour=0, minute=0, second=0, microsecond=0)
+        if unidade == "week":
+            balde -= timedelta(days=balde.weekday())
+        elif unidade == "month":
+            balde = balde.replace(day=1)
+        pontos = []
+        while balde <= fim:
+            if unidade == "month":
+                proximo = (balde + timedelta(days=32)).replace(day=1)
+            else:
+                proximo = balde + timedelta(days=7 if unidade == "week" else 1)
+            corte = min(proximo, fim)
+            # Fechamento: último valor registrado até o fim do balde, por investimento
+            valores = [
+                serie[max(t for t in serie if t <= corte)]
+                for serie in (self.historico.get(i, {}) for i in alvo)
+                if any(t <= corte for t in serie)
+            ]
+            if valores:
+                pontos.append({"data": balde.isoformat(), "valor": sum(valores), "investimentos": len(valores)})
+            balde = proximo
+        return pontos
+
+    def _lote_atualizar(self, tabela: str, params: dict) -> List[dict]:
+        atualizados = []
+        for item in params["p_itens"]:
+            row = self.tabelas[tabela].get(item["id"])
+            if row is None or self._dono(tabela, row) != params["p_user_id"]:
+                continue
+            valor_anterior = row.get("valor")
+            row.update(item["dados"])
+            row["updated_at"] = agora()
+            if tabela == "investimentos" and row["valor"] != valor_anterior:
+                self._registrar_valor(row)
+            atualizados.append(dict(row))
+        return atualizados
+
+    def _sync_alteracoes(self, params: dict) -> dict:
+        user_id, desde, limite = params["p_user_id"], params.get("p_desde"), params["p_limite"]
+        desde = datetime.fromisoformat(desde) if desde else None
+        posicao = (desde, params["p_apos_tabela"], params["p_apos_id"])
+        investimentos = self._investimentos_do_usuario(user_id)
+        objetivos = {objetivo_id for objetivo_id, _ in investimentos.values()} | {
+            o["id"] for o in self.tabelas["objetivos"].values() if self._dono("objetivos", o) == user_id
+        }
+        itens = [
+            (datetime.fromisoformat(row["updated_at"]), tabela, row["id"], False, dict(row))
+            for tabela, meus in (
+                ("clientes", {c["id"] for c in self.tabelas["clientes"].values() if c.get("user_id") == user_id}),
+                ("objetivos", objetivos),
+                ("investimentos", set(investimentos)),
+            )
+            for row in self.tabelas[tabela].values() if row["id"] in meus
+        ]
+        if desde is not None:
+            itens += [
+                (datetime.fromisoformat(r["removido_em"]), tabela, row_id, True, None)
+                for (tabela, row_id), r in self.remocoes.items() if r["user_id"] == user_id
+            ]
+            itens = [i for i in itens if i[:3] > posicao]
+        itens.sort(key=lambda i: i[:3])
+        return {
+            "agora": agora(),
+            "itens": [
+                {"tabela": t, "id": i, "alterado_em": em.isoformat(), "removido": r, "dados": d}
+                for em, t, i, r, d in itens[:limite]
+            ],
+        }
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        self.chamadas += 1
+        self.chamadas_por_rota[f"{request.method} {request.url.path}"] += 1
+        response = self._responder(request)
+        atraso = self.latencia + self.latencia_por_kb * len(response.content) / 1024
+        if self.variacao:
+            atraso *= 1 + self._random.uniform(-self.variacao, self.variacao)
+        if atraso > 0:
+            await asyncio.sleep(atraso)
+        return response
+
+    def _responder(self, request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        if path.startswith("/auth/v1/"):
+            return self._auth(request, path.removeprefix("/auth/v1/"))
+        tabela = path.removeprefix("/rest/v1/")
+        if tabela.removeprefix("rpc/") in FUNCOES_SERVICO and not self._servico(request):
+            return httpx.Response(403, json={"code": "42501", "message": f"permission denied for function {tabela.removeprefix('rpc/')}", "details": None, "hint": None})
+        if tabela == "resumo_usuarios" and request.method == "GET":
+            return httpx.Response(200, json=self._resumo(request.url.params))
+        if tabela == "rpc/resumo_reconstruir":
+            return httpx.Response(200, json=self._resumo_reconstruir(json.loads(request.content)))
+        if tabela == "rpc/buscar_clientes":
+            return httpx.Response(200, json=self._buscar_clientes(json.loads(request.content)))
+        if tabela == "rpc/historico_registrar":
+            return httpx.Response(200, json=self._historico_registrar(json.loads(request.content)))
+        if tabela == "rpc/historico_valores":
+            return httpx.Response(200, json=self._historico_valores(json.loads(request.content)))
+        if tabela.startswith("rpc/lote_atualizar_"):
+            alvo = tabela.removeprefix("rpc/lote_atualizar_")
+            return httpx.Response(200, json=self._lote_atualizar(alvo, json.loads(request.content)))
+        if tabela == "rpc/sync_alteracoes":
+            return httpx.Response(200, json=self._sync_alteracoes(json.loads(request.content)))
+        if tabela not in self.tabelas:
+            return httpx.Response(404, json={"code": "42P01", "message": f"relation {tabela} does not exist", "details": None, "hint": None})
+        params = request.url.params
+        # Com o JWT de um usuário (e não a service key), o RLS se aplica
+        usuario = self._usuario_do_token(request)
+        dono = usuario["id"] if usuario else None
+        if request.method == "GET":
+            return httpx.Response(200, json=self._ler(tabela, params, dono))
+        if request.method == "HEAD":
+            return httpx.Response(200)
+        if request.method == "POST":
+            return self._gravar(tabela, request, dono)
+        alvo = self._ler(tabela, httpx.QueryParams([(k, v) for k, v in params.multi_items() if k != "select"]), dono)
+        if request.method == "PATCH":
+            dados = json.loads(request.content)
+            if dono and any(self._dono(tabela, {**self.tabelas[tabela][r["id"]], **dados}) != dono for r in alvo):
+                return _violacao_rls(tabela)
+            atualizados = []
+            for r in alvo:
+                row = self.tabelas[tabela][r["id"]]
+                valor_anterior = row.get("valor")
+                row.update(dados)
+                if tabela == "investimentos" and row["valor"] != valor_anterior:
+                    self._registrar_valor(row)
+                row["updated_at"] = agora()
+                atualizados.append(dict(row))
+            return httpx.Response(200, json=atualizados)
+        if request.method == "DELETE":
+            for r in alvo:
+                self._remover_cascata(tabela, r["id"])
+            return httpx.Response(200, json=alvo)
+        return httpx.Response(405)
@@ -0,0 +1,82 @@
+-- Busca de clientes (GET /api/clientes/search): prefixo, sem acentos e tolerante a erros
+-- de digitação em nome, email e telefone, com índice trigram (pg_trgm).
+-- Execute este script no Supabase SQL Editor (depois de database_setup.sql).
+--
+-- O texto pesquisável é uma expressão indexada (não uma coluna), então não muda o que
+-- as outras rotas leem de clientes e acompanha toda escrita sem trigger.
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm WITH SCHEMA extensions;
+CREATE EXTENSION IF NOT EXISTS unaccent WITH SCHEMA extensions;
+
+-- unaccent não é IMMUTABLE (depende do dicionário); fixar o dicionário permite indexar
+CREATE OR REPLACE FUNCTION busca_normalizar(texto TEXT)
+RETURNS TEXT AS $$
+  SELECT lower(extensions.unaccent('extensions.unaccent'::regdictionary, COALESCE(texto, '')));
+$$ LANGUAGE sql IMMUTABLE PARALLEL SAFE;
+
+-- Texto pesquisável de um cliente: nome e email normalizados e só os dígitos do telefone
+CREATE OR REPLACE FUNCTION clientes_busca(nome TEXT, email TEXT, telefone TEXT)
+RETURNS TEXT AS $$
+  SELECT busca_normalizar(nome) || ' ' || busca_normalizar(email) || ' '
+    || regexp_replace(COALESCE(telefone, ''), '\D', '', 'g');
+$$ LANGUAGE sql IMMUTABLE PARALLEL SAFE;
+
+CREATE INDEX IF NOT EXISTS idx_clientes_busca_trgm ON clientes
+  USING gin (clientes_busca(nome, email, telefone) extensions.gin_trgm_ops);
+
+-- Clientes do usuário que casam com p_q, do mais para o menos relevante.
+-- Relevância: começo do texto (3) > começo de uma palavra (2) > trecho (1), somada à
+-- similaridade trigram com a palavra mais parecida (0..1), que cobre erros de digitação.
+-- Paginação por keyset em (relevancia, id): passe os valores do último item recebido.
+CREATE OR REPLACE FUNCTION buscar_clientes(
+  p_user_id UUID,
+  p_q TEXT,
+  p_limite INT DEFAULT 20,
+  p_apos_relevancia REAL DEFAULT NULL,
+  p_apos_id UUID DEFAULT NULL
+)
+RETURNS TABLE (
+  id UUID, user_id UUID, nome TEXT, email TEXT, telefone TEXT,
+  created_at TIMESTAMPTZ, updated_at TIMESTAMPTZ, relevancia REAL
+) AS $$
+DECLARE
+  v_q TEXT := btrim(busca_normalizar(p_q));
+  -- Curingas digitados pelo usuário são tratados como texto
+  v_like TEXT := replace(replace(replace(btrim(busca_normalizar(p_q)), '\', '\\'), '%', '\%'), '_', '\_');
+  v_digitos TEXT := regexp_replace(p_q, '\D', '', 'g');
+BEGIN
+  IF v_q = '' THEN
+    RETURN;
+  END IF;
+  RETURN QUERY
+  SELECT r.id, r.user_id, r.nome, r.email, r.telefone, r.created_at, r.updated_at, r.relevancia
+  FROM (
+    SELECT c.*, (
+      CASE
+        WHEN t.texto LIKE v_like || '%' THEN 3
+        WHEN t.texto LIKE '% ' || v_like || '%' THEN 2
+        WHEN t.texto LIKE '%' || v_like || '%'
+          OR (length(v_digitos) >= 3 AND t.texto LIKE '%' || v_digitos || '%') THEN 1
+        ELSE 0
+      END + word_similarity(v_q, t.texto)
+    )::REAL AS relevancia
+    FROM clientes c
+    CROSS JOIN LATERAL (SELECT clientes_busca(c.nome, c.email, c.telefone) AS texto) t
+    WHERE c.user_id = p_user_id
+      AND (
+        clientes_busca(c.nome, c.email, c.telefone) LIKE '%' || v_like || '%'
+        OR v_q <% clientes_busca(c.nome, c.email, c.telefone)
+        OR (length(v_digitos) >= 3 AND clientes_busca(c.nome, c.email, c.telefone) LIKE '%' || v_digitos || '%')
+      )
+  ) r
+  WHERE p_apos_id IS NULL OR (r.relevancia, r.id) < (p_apos_relevancia, p_apos_id)
+  ORDER BY r.relevancia DESC, r.id DESC
+  LIMIT p_limite;
+END;
+$$ LANGUAGE plpgsql STABLE
+  SET search_path = public, extensions
+  -- Limiar do operador <% (padrão 0.6): aceita um ou dois caracteres trocados em nomes curtos
+  SET pg_trgm.word_similarity_threshold = 0.4;
+
+-- Verificar o plano (deve usar idx_clientes_busca_trgm ou idx_clientes_user_id):
+-- EXPLAIN ANALYZE SELECT * FROM buscar_clientes('<user_id>', 'joao', 21);
@@ -0,0 +1,182 @@
+-- Histórico de valores dos investimentos (séries para gráficos de desempenho)
+-- Execute este script no Supabase SQL Editor (depois de database_setup.sql).
+--
+-- Toda mudança de investimentos.valor (criação, PUT, lotes, importação) grava um ponto
+-- pelo trigger; cotações em massa e cargas de datas passadas usam historico_registrar.
+-- As consultas agregam por dia/semana/mês no banco (historico_valores) e
+-- historico_compactar reduz os pontos antigos ao último de cada dia/semana/mês.
+
+-- Uma linha por (investimento, instante): sem id próprio, e a chave primária já é o
+-- índice das consultas por intervalo
+CREATE TABLE IF NOT EXISTS investimentos_historico (
+  investimento_id UUID NOT NULL REFERENCES investimentos(id) ON DELETE CASCADE,
+  registrado_em TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+  valor DECIMAL(15,2) NOT NULL,
+  PRIMARY KEY (investimento_id, registrado_em)
+) WITH (fillfactor = 100);
+
+ALTER TABLE investimentos_historico ENABLE ROW LEVEL SECURITY;
+
+-- Somente leitura para o dono; as escritas vêm do trigger e de historico_registrar
+DROP POLICY IF EXISTS "Usuarios leem historico de seus investimentos" ON investimentos_historico;
+CREATE POLICY "Usuarios leem historico de seus investimentos" ON investimentos_historico
+  FOR SELECT USING (
+    EXISTS (
+      SELECT 1 FROM investimentos i
+      JOIN objetivos o ON o.id = i.objetivo_id
+      JOIN clientes c ON c.id = o.cliente_id
+      WHERE i.id = investimentos_historico.investimento_id
+      AND c.user_id = auth.uid()
+    )
+  );
+
+-- Um ponto por mudança de valor (várias na mesma transação ficam com a última)
+CREATE OR REPLACE FUNCTION historico_investimentos_trigger()
+RETURNS TRIGGER AS $$
+BEGIN
+  IF TG_OP = 'UPDATE' AND NEW.valor IS NOT DISTINCT FROM OLD.valor THEN
+    RETURN NULL;
+  END IF;
+  INSERT INTO investimentos_historico (investimento_id, registrado_em, valor)
+  VALUES (NEW.id, NOW(), NEW.valor)
+  ON CONFLICT (investimento_id, registrado_em) DO UPDATE SET valor = EXCLUDED.valor;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+DROP TRIGGER IF EXISTS historico_investimentos ON investimentos;
+CREATE TRIGGER historico_investimentos AFTER INSERT OR UPDATE OF valor ON investimentos
+  FOR EACH ROW EXECUTE FUNCTION historico_investimentos_trigger();
+
+-- Cotações em massa de um usuário (p_itens: [{"investimento_id": ..., "valor": ...}]).
+-- Sem p_registrado_em, é a cotação atual: atualiza investimentos.valor e o trigger grava
+-- o ponto. Com data, é carga de histórico: só grava os pontos, sem mexer no valor atual.
+-- Retorna os investimentos gravados (os de outros usuários ou inexistentes ficam de fora).
+-- Sem EXECUTE para anon/authenticated (ver os REVOKE abaixo): só a API, com a service
+-- key e o p_user_id do token verificado, ou o SQL Editor.
+CREATE OR REPLACE FUNCTION historico_registrar(p_user_id UUID, p_itens JSONB, p_registrado_em TIMESTAMPTZ DEFAULT NULL)
+RETURNS SETOF UUID AS $$
+BEGIN
+  IF p_registrado_em IS NULL THEN
+    RETURN QUERY
+    WITH alterados AS (
+      UPDATE investimentos i SET valor = x.valor
+      FROM jsonb_to_recordset(p_itens) AS x(investimento_id UUID, valor DECIMAL), objetivos o, clientes c
+      WHERE i.id = x.investimento_id AND o.id = i.objetivo_id AND c.id = o.cliente_id
+        AND c.user_id = p_user_id
+      RETURNING i.id
+    )
+    SELECT id FROM alterados;
+  ELSE
+    RETURN QUERY
+    WITH gravados AS (
+      INSERT INTO investimentos_historico (investimento_id, registrado_em, valor)
+      SELECT i.id, p_registrado_em, x.valor
+      FROM jsonb_to_recordset(p_itens) AS x(investimento_id UUID, valor DECIMAL)
+      JOIN investimentos i ON i.id = x.investimento_id
+      JOIN objetivos o ON o.id = i.objetivo_id
+      JOIN clientes c ON c.id = o.cliente_id
+      WHERE c.user_id = p_user_id
+      ON CONFLICT (investimento_id, registrado_em) DO UPDATE SET valor = EXCLUDED.valor
+      RETURNING investimento_id
+    )
+    SELECT investimento_id FROM gravados;
+  END IF;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+-- Série de um investimento, objetivo ou cliente (informe um dos ids) em baldes de
+-- p_intervalo ('day', 'week' ou 'month'). O valor de cada balde é o fechamento: soma,
+-- entre os investimentos do alvo, do último valor registrado até o fim do balde (ou até
+-- p_fim, no último). Baldes em que nenhum investimento tinha valor não aparecem.
+-- Cada (balde, investimento) é uma busca na chave primária, então o custo depende do
+-- número de pontos pedidos, não de quantas linhas há no histórico.
+CREATE OR REPLACE FUNCTION historico_valores(
+  p_user_id UUID,
+  p_inicio TIMESTAMPTZ,
+  p_fim TIMESTAMPTZ,
+  p_intervalo TEXT,
+  p_investimento_id UUID DEFAULT NULL,
+  p_objetivo_id UUID DEFAULT NULL,
+  p_cliente_id UUID DEFAULT NULL
+)
+RETURNS TABLE (data TIMESTAMPTZ, valor DECIMAL, investimentos INT) AS $$
+  WITH alvo AS (
+    SELECT i.id
+    FROM investimentos i
+    JOIN objetivos o ON o.id = i.objetivo_id
+    JOIN clientes c ON c.id = o.cliente_id
+    WHERE c.user_id = p_user_id
+      AND (p_investimento_id IS NULL OR i.id = p_investimento_id)
+      AND (p_objetivo_id IS NULL OR o.id = p_objetivo_id)
+      AND (p_cliente_id IS NULL OR c.id = p_cliente_id)
+  ),
+  baldes AS (
+    SELECT b AS inicio, LEAST(b + ('1 ' || p_intervalo)::INTERVAL, p_fim) AS fim
+    FROM generate_series(date_trunc(p_intervalo, p_inicio), p_fim, ('1 ' || p_intervalo)::INTERVAL) AS b
+    -- Proteção para chamadas diretas à função (a API já limita os pontos)
+    LIMIT 5000
+  )
+  SELECT b.inicio, SUM(h.valor), COUNT(h.valor)::INT
+  FROM baldes b
+  CROSS JOIN alvo a
+  JOIN LATERAL (
+    SELECT ih.valor
+    FROM investimentos_historico ih
+    WHERE ih.investimento_id = a.id AND ih.registrado_em <= b.fim
+    ORDER BY ih.registrado_em DESC
+    LIMIT 1
+  ) h ON TRUE
+  GROUP BY b.inicio
+  ORDER BY b.inicio;
+$$ LANGUAGE sql STABLE SET search_path = public;
+
+-- Compactação: pontos anteriores a p_diario ficam só com o último de cada dia, anteriores
+-- a p_semanal com o último de cada semana e anteriores a p_mensal com o último de cada
+-- mês. Como o fechamento do balde é o último ponto, as séries agregadas nessas
+-- granularidades não mudam. Retorna quantas linhas foram removidas.
+CREATE OR REPLACE FUNCTION historico_compactar(
+  p_diario INTERVAL DEFAULT '90 days',
+  p_semanal INTERVAL DEFAULT '2 years',
+  p_mensal INTERVAL DEFAULT '5 years'
+)
+RETURNS BIGINT AS $$
+DECLARE
+  nivel RECORD;
+  removidas BIGINT := 0;
+  n BIGINT;
+BEGIN
+  FOR nivel IN
+    SELECT * FROM (VALUES ('day', p_diario), ('week', p_semanal), ('month', p_mensal)) AS v(unidade, idade)
+  LOOP
+    -- O corte é arredondado para o início do balde: nenhum balde fica compactado pela metade
+    DELETE FROM investimentos_historico h
+    USING (
+      SELECT ih.investimento_id, ih.registrado_em,
+        row_number() OVER (
+          PARTITION BY ih.investimento_id, date_trunc(nivel.unidade, ih.registrado_em)
+          ORDER BY ih.registrado_em DESC
+        ) AS posicao
+      FROM investimentos_historico ih
+      WHERE ih.registrado_em < date_trunc(nivel.unidade, NOW() - nivel.idade)
+    ) antigos
+    WHERE antigos.posicao > 1
+      AND h.investimento_id = antigos.investimento_id
+      AND h.registrado_em = antigos.registrado_em;
+    GET DIAGNOSTICS n = ROW_COUNT;
+    removidas := removidas + n;
+  END LOOP;
+  RETURN removidas;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+REVOKE EXECUTE ON FUNCTION historico_registrar(UUID, JSONB, TIMESTAMPTZ) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION historico_compactar(INTERVAL, INTERVAL, INTERVAL) FROM PUBLIC, anon, authenticated;
+
+-- Ponto inicial de cada investimento existente (o histórico anterior não é conhecido)
+INSERT INTO investimentos_historico (investimento_id, registrado_em, valor)
+SELECT id, COALESCE(created_at, NOW()), valor FROM investimentos
+ON CONFLICT DO NOTHING;
+
+-- Compactação diária com pg_cron (Database > Extensions > pg_cron):
+-- SELECT cron.schedule('historico_compactar', '30 3 * * *', 'SELECT historico_compactar()');
@@ -0,0 +1,42 @@
+-- Atualização em lote (PUT /api/lote/*): um único UPDATE por requisição, só com os
+-- campos enviados em cada item e com o filtro de dono no próprio comando.
+-- Execute este script no Supabase SQL Editor (depois de database_setup.sql e
+-- database_meta_update.sql).
+--
+-- p_itens: [{"id": ..., "dados": {"campo": valor, ...}}], no máximo um item por id (a API
+-- junta os repetidos). Campo ausente em "dados" mantém o valor atual; presente com null
+-- grava null. Linhas de outros usuários ou já removidas ficam de fora do retorno.
+-- SECURITY INVOKER: com o JWT do usuário (DB_RLS_WRITES), o RLS também se aplica.
+
+CREATE OR REPLACE FUNCTION lote_atualizar_clientes(p_user_id UUID, p_itens JSONB)
+RETURNS SETOF clientes AS $$
+  UPDATE clientes c SET
+    nome = CASE WHEN x.dados ? 'nome' THEN x.dados->>'nome' ELSE c.nome END,
+    email = CASE WHEN x.dados ? 'email' THEN x.dados->>'email' ELSE c.email END,
+    telefone = CASE WHEN x.dados ? 'telefone' THEN x.dados->>'telefone' ELSE c.telefone END
+  FROM jsonb_to_recordset(p_itens) AS x(id UUID, dados JSONB)
+  WHERE c.id = x.id AND c.user_id = p_user_id
+  RETURNING c.*;
+$$ LANGUAGE sql SET search_path = public;
+
+CREATE OR REPLACE FUNCTION lote_atualizar_objetivos(p_user_id UUID, p_itens JSONB)
+RETURNS SETOF objetivos AS $$
+  UPDATE objetivos o SET
+    nome = CASE WHEN x.dados ? 'nome' THEN x.dados->>'nome' ELSE o.nome END,
+    descricao = CASE WHEN x.dados ? 'descricao' THEN x.dados->>'descricao' ELSE o.descricao END,
+    valor_meta = CASE WHEN x.dados ? 'valor_meta' THEN (x.dados->>'valor_meta')::DECIMAL ELSE o.valor_meta END
+  FROM jsonb_to_recordset(p_itens) AS x(id UUID, dados JSONB), clientes c
+  WHERE o.id = x.id AND c.id = o.cliente_id AND c.user_id = p_user_id
+  RETURNING o.*;
+$$ LANGUAGE sql SET search_path = public;
+
+CREATE OR REPLACE FUNCTION lote_atualizar_investimentos(p_user_id UUID, p_itens JSONB)
+RETURNS SETOF investimentos AS $$
+  UPDATE investimentos i SET
+    nome = CASE WHEN x.dados ? 'nome' THEN x.dados->>'nome' ELSE i.nome END,
+    valor = CASE WHEN x.dados ? 'valor' THEN (x.dados->>'valor')::DECIMAL ELSE i.valor END,
+    tipo = CASE WHEN x.dados ? 'tipo' THEN x.dados->>'tipo' ELSE i.tipo END
+  FROM jsonb_to_recordset(p_itens) AS x(id UUID, dados JSONB), objetivos o, clientes c
+  WHERE i.id = x.id AND o.id = i.objetivo_id AND c.id = o.cliente_id AND c.user_id = p_user_id
+  RETURNING i.*;
+$$ LANGUAGE sql SET search_path = public;
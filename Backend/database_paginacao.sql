@@ -0,0 +1,18 @@
+-- Índices para paginação por cursor (keyset em created_at, id) e filtros das listagens
+-- Execute este script no Supabase SQL Editor
+
+-- Listagens ordenadas por created_at dentro do dono/pai
+CREATE INDEX IF NOT EXISTS idx_clientes_user_created ON clientes(user_id, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_objetivos_cliente_created ON objetivos(cliente_id, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_investimentos_objetivo_created ON investimentos(objetivo_id, created_at, id);
+
+-- Ordenação/filtro por nome (prefixo) e por tipo/valor
+CREATE INDEX IF NOT EXISTS idx_clientes_user_nome ON clientes(user_id, nome, id);
+CREATE INDEX IF NOT EXISTS idx_investimentos_objetivo_tipo ON investimentos(objetivo_id, tipo);
+CREATE INDEX IF NOT EXISTS idx_investimentos_objetivo_valor ON investimentos(objetivo_id, valor, id);
+
+-- Verificar os índices criados
+SELECT tablename, indexname
+FROM pg_indexes
+WHERE tablename IN ('clientes', 'objetivos', 'investimentos')
+ORDER BY tablename, indexname;
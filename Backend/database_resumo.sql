@@ -0,0 +1,321 @@
+-- Resumo por assessor (usuário) para o dashboard: patrimônio total, alocação por
+-- tipo e cobertura das metas, mantido de forma incremental por triggers.
+-- Execute este script no Supabase SQL Editor (depois de database_setup.sql e
+-- database_meta_update.sql). Ao final ele reconstrói o resumo a partir dos dados atuais.
+--
+-- Cada escrita em clientes/objetivos/investimentos aplica só a sua variação ao
+-- resumo. As escritas em lote (um único INSERT/UPSERT/UPDATE multi-linha) disparam
+-- um trigger por comando, que agrega as linhas alteradas antes de atualizar o resumo.
+-- Para reconciliar: SELECT resumo_reconstruir('<user_id>') ou
+-- SELECT resumo_reconstruir_todos().
+
+-- Totais por usuário
+CREATE TABLE IF NOT EXISTS resumo_usuarios (
+  user_id UUID PRIMARY KEY,
+  clientes INT NOT NULL DEFAULT 0,
+  objetivos INT NOT NULL DEFAULT 0,
+  objetivos_com_meta INT NOT NULL DEFAULT 0,
+  total_investido DECIMAL(17,2) NOT NULL DEFAULT 0,
+  -- Soma das metas e quanto delas está coberto (investido limitado à meta, por objetivo)
+  soma_metas DECIMAL(17,2) NOT NULL DEFAULT 0,
+  meta_coberta DECIMAL(17,2) NOT NULL DEFAULT 0,
+  atualizado_em TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+-- Alocação por tipo de investimento ('' = sem tipo)
+CREATE TABLE IF NOT EXISTS resumo_alocacao (
+  user_id UUID REFERENCES resumo_usuarios(user_id) ON DELETE CASCADE,
+  tipo TEXT NOT NULL,
+  total DECIMAL(17,2) NOT NULL DEFAULT 0,
+  quantidade INT NOT NULL DEFAULT 0,
+  PRIMARY KEY (user_id, tipo)
+);
+
+-- Total por objetivo (base para a cobertura da meta e dono do objetivo,
+-- necessário quando o objetivo já foi removido)
+CREATE TABLE IF NOT EXISTS resumo_objetivos (
+  objetivo_id UUID PRIMARY KEY,
+  user_id UUID NOT NULL,
+  valor_meta DECIMAL(15,2),
+  total_investido DECIMAL(17,2) NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_resumo_objetivos_user ON resumo_objetivos(user_id);
+
+ALTER TABLE resumo_usuarios ENABLE ROW LEVEL SECURITY;
+ALTER TABLE resumo_alocacao ENABLE ROW LEVEL SECURITY;
+ALTER TABLE resumo_objetivos ENABLE ROW LEVEL SECURITY;
+
+-- Somente leitura para o dono; as escritas vêm dos triggers (SECURITY DEFINER)
+DROP POLICY IF EXISTS "Usuarios leem seu resumo" ON resumo_usuarios;
+CREATE POLICY "Usuarios leem seu resumo" ON resumo_usuarios
+  FOR SELECT USING (auth.uid() = user_id);
+DROP POLICY IF EXISTS "Usuarios leem sua alocacao" ON resumo_alocacao;
+CREATE POLICY "Usuarios leem sua alocacao" ON resumo_alocacao
+  FOR SELECT USING (auth.uid() = user_id);
+DROP POLICY IF EXISTS "Usuarios leem resumo de seus objetivos" ON resumo_objetivos;
+CREATE POLICY "Usuarios leem resumo de seus objetivos" ON resumo_objetivos
+  FOR SELECT USING (auth.uid() = user_id);
+
+-- Cobertura de uma meta: investido limitado à meta (0 sem meta)
+CREATE OR REPLACE FUNCTION resumo_cobertura(total DECIMAL, meta DECIMAL)
+RETURNS DECIMAL AS $$
+  SELECT CASE WHEN meta > 0 THEN LEAST(total, meta) ELSE 0 END;
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Soma variações aos totais do usuário (cria a linha se preciso)
+CREATE OR REPLACE FUNCTION resumo_somar(
+  p_user_id UUID, d_clientes INT, d_objetivos INT, d_com_meta INT,
+  d_total DECIMAL, d_metas DECIMAL, d_coberta DECIMAL
+) RETURNS void AS $$
+  INSERT INTO resumo_usuarios AS r
+    (user_id, clientes, objetivos, objetivos_com_meta, total_investido, soma_metas, meta_coberta)
+  VALUES (p_user_id, d_clientes, d_objetivos, d_com_meta, d_total, d_metas, d_coberta)
+  ON CONFLICT (user_id) DO UPDATE SET
+    clientes = r.clientes + EXCLUDED.clientes,
+    objetivos = r.objetivos + EXCLUDED.objetivos,
+    objetivos_com_meta = r.objetivos_com_meta + EXCLUDED.objetivos_com_meta,
+    total_investido = r.total_investido + EXCLUDED.total_investido,
+    soma_metas = r.soma_metas + EXCLUDED.soma_metas,
+    meta_coberta = r.meta_coberta + EXCLUDED.meta_coberta,
+    atualizado_em = NOW();
+$$ LANGUAGE sql SECURITY DEFINER SET search_path = public;
+
+-- ---- Clientes ----
+CREATE OR REPLACE FUNCTION resumo_clientes_trigger()
+RETURNS TRIGGER AS $$
+BEGIN
+  IF TG_OP = 'INSERT' AND NEW.user_id IS NOT NULL THEN
+    PERFORM resumo_somar(NEW.user_id, 1, 0, 0, 0, 0, 0);
+  ELSIF TG_OP = 'DELETE' AND OLD.user_id IS NOT NULL THEN
+    PERFORM resumo_somar(OLD.user_id, -1, 0, 0, 0, 0, 0);
+  END IF;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+DROP TRIGGER IF EXISTS resumo_clientes ON clientes;
+CREATE TRIGGER resumo_clientes AFTER INSERT OR DELETE ON clientes
+  FOR EACH ROW EXECUTE FUNCTION resumo_clientes_trigger();
+
+-- ---- Objetivos ----
+CREATE OR REPLACE FUNCTION resumo_objetivos_inserido()
+RETURNS TRIGGER AS $$
+DECLARE
+  v_user_id UUID;
+BEGIN
+  SELECT user_id INTO v_user_id FROM clientes WHERE id = NEW.cliente_id;
+  IF v_user_id IS NULL THEN
+    RETURN NULL;
+  END IF;
+  INSERT INTO resumo_objetivos (objetivo_id, user_id, valor_meta) VALUES (NEW.id, v_user_id, NEW.valor_meta);
+  PERFORM resumo_somar(v_user_id, 0, 1, COALESCE((NEW.valor_meta > 0)::INT, 0), 0, COALESCE(NEW.valor_meta, 0), 0);
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+CREATE OR REPLACE FUNCTION resumo_objetivos_meta_alterada()
+RETURNS TRIGGER AS $$
+DECLARE
+  r resumo_objetivos;
+BEGIN
+  UPDATE resumo_objetivos SET valor_meta = NEW.valor_meta WHERE objetivo_id = NEW.id RETURNING * INTO r;
+  IF FOUND THEN
+    PERFORM resumo_somar(
+      r.user_id, 0, 0,
+      COALESCE((NEW.valor_meta > 0)::INT, 0) - COALESCE((OLD.valor_meta > 0)::INT, 0),
+      0,
+      COALESCE(NEW.valor_meta, 0) - COALESCE(OLD.valor_meta, 0),
+      resumo_cobertura(r.total_investido, NEW.valor_meta) - resumo_cobertura(r.total_investido, OLD.valor_meta)
+    );
+  END IF;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+-- BEFORE DELETE: os investimentos ainda existem, então o objetivo sai do resumo
+-- inteiro aqui; as remoções em cascata dos investimentos não encontram mais o
+-- objetivo em resumo_objetivos e são ignoradas (sem desconto em dobro)
+CREATE OR REPLACE FUNCTION resumo_objetivos_removido()
+RETURNS TRIGGER AS $$
+DECLARE
+  r resumo_objetivos;
+BEGIN
+  DELETE FROM resumo_objetivos WHERE objetivo_id = OLD.id RETURNING * INTO r;
+  IF FOUND THEN
+    PERFORM resumo_somar(
+      r.user_id, 0, -1, -COALESCE((r.valor_meta > 0)::INT, 0),
+      -r.total_investido, -COALESCE(r.valor_meta, 0), -resumo_cobertura(r.total_investido, r.valor_meta)
+    );
+    UPDATE resumo_alocacao a SET total = a.total - i.total, quantidade = a.quantidade - i.quantidade
+    FROM (
+      SELECT COALESCE(tipo, '') AS tipo, SUM(valor) AS total, COUNT(*) AS quantidade
+      FROM investimentos WHERE objetivo_id = OLD.id GROUP BY 1
+    ) i
+    WHERE a.user_id = r.user_id AND a.tipo = i.tipo;
+  END IF;
+  RETURN OLD;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+DROP TRIGGER IF EXISTS resumo_objetivos_insert ON objetivos;
+CREATE TRIGGER resumo_objetivos_insert AFTER INSERT ON objetivos
+  FOR EACH ROW EXECUTE FUNCTION resumo_objetivos_inserido();
+DROP TRIGGER IF EXISTS resumo_objetivos_update ON objetivos;
+CREATE TRIGGER resumo_objetivos_update AFTER UPDATE OF valor_meta ON objetivos
+  FOR EACH ROW WHEN (OLD.valor_meta IS DISTINCT FROM NEW.valor_meta)
+  EXECUTE FUNCTION resumo_objetivos_meta_alterada();
+DROP TRIGGER IF EXISTS resumo_objetivos_delete ON objetivos;
+CREATE TRIGGER resumo_objetivos_delete BEFORE DELETE ON objetivos
+  FOR EACH ROW EXECUTE FUNCTION resumo_objetivos_removido();
+
+-- ---- Investimentos (um trigger por comando, com as linhas alteradas) ----
+DO $$ BEGIN
+  CREATE TYPE resumo_variacao AS (objetivo_id UUID, tipo TEXT, valor DECIMAL, quantidade INT);
+EXCEPTION WHEN duplicate_object THEN NULL;
+END $$;
+
+-- Aplica as variações (+ linhas novas, - linhas antigas) de um comando
+CREATE OR REPLACE FUNCTION resumo_aplicar(variacoes resumo_variacao[])
+RETURNS void AS $$
+BEGIN
+  -- Alocação por tipo
+  INSERT INTO resumo_alocacao AS a (user_id, tipo, total, quantidade)
+  SELECT o.user_id, COALESCE(v.tipo, ''), SUM(v.valor), SUM(v.quantidade)
+  FROM unnest(variacoes) v JOIN resumo_objetivos o ON o.objetivo_id = v.objetivo_id
+  GROUP BY 1, 2
+  ON CONFLICT (user_id, tipo) DO UPDATE SET
+    total = a.total + EXCLUDED.total,
+    quantidade = a.quantidade + EXCLUDED.quantidade;
+
+  -- Total por objetivo e, a partir dele, total e cobertura por usuário
+  WITH delta AS (
+    SELECT objetivo_id, SUM(valor) AS valor FROM unnest(variacoes) GROUP BY objetivo_id
+  ), alterados AS (
+    UPDATE resumo_objetivos o SET total_investido = o.total_investido + d.valor
+    FROM delta d WHERE o.objetivo_id = d.objetivo_id
+    RETURNING o.user_id, d.valor,
+      resumo_cobertura(o.total_investido, o.valor_meta)
+        - resumo_cobertura(o.total_investido - d.valor, o.valor_meta) AS coberta
+  )
+  INSERT INTO resumo_usuarios AS r (user_id, total_investido, meta_coberta)
+  SELECT user_id, SUM(valor), SUM(coberta) FROM alterados GROUP BY user_id
+  ON CONFLICT (user_id) DO UPDATE SET
+    total_investido = r.total_investido + EXCLUDED.total_investido,
+    meta_coberta = r.meta_coberta + EXCLUDED.meta_coberta,
+    atualizado_em = NOW();
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+CREATE OR REPLACE FUNCTION resumo_investimentos_inseridos()
+RETURNS TRIGGER AS $$
+BEGIN
+  PERFORM resumo_aplicar(ARRAY(
+    SELECT ROW(objetivo_id, tipo, valor, 1)::resumo_variacao FROM novos
+  ));
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+CREATE OR REPLACE FUNCTION resumo_investimentos_alterados()
+RETURNS TRIGGER AS $$
+BEGIN
+  PERFORM resumo_aplicar(ARRAY(
+    SELECT ROW(objetivo_id, tipo, -valor, -1)::resumo_variacao FROM antigos
+    UNION ALL
+    SELECT ROW(objetivo_id, tipo, valor, 1)::resumo_variacao FROM novos
+  ));
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+CREATE OR REPLACE FUNCTION resumo_investimentos_removidos()
+RETURNS TRIGGER AS $$
+BEGIN
+  PERFORM resumo_aplicar(ARRAY(
+    SELECT ROW(objetivo_id, tipo, -valor, -1)::resumo_variacao FROM antigos
+  ));
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+DROP TRIGGER IF EXISTS resumo_investimentos_insert ON investimentos;
+CREATE TRIGGER resumo_investimentos_insert AFTER INSERT ON investimentos
+  REFERENCING NEW TABLE AS novos
+  FOR EACH STATEMENT EXECUTE FUNCTION resumo_investimentos_inseridos();
+DROP TRIGGER IF EXISTS resumo_investimentos_update ON investimentos;
+CREATE TRIGGER resumo_investimentos_update AFTER UPDATE ON investimentos
+  REFERENCING OLD TABLE AS antigos NEW TABLE AS novos
+  FOR EACH STATEMENT EXECUTE FUNCTION resumo_investimentos_alterados();
+DROP TRIGGER IF EXISTS resumo_investimentos_delete ON investimentos;
+CREATE TRIGGER resumo_investimentos_delete AFTER DELETE ON investimentos
+  REFERENCING OLD TABLE AS antigos
+  FOR EACH STATEMENT EXECUTE FUNCTION resumo_investimentos_removidos();
+
+-- ---- Reconstrução (reconciliação) ----
+-- Recalcula o resumo de um usuário a partir das tabelas. Chamado pela API
+-- (POST /api/carteiras/resumo/reconstruir, com a service key) ou no SQL Editor.
+-- Sem EXECUTE para anon/authenticated (ver os REVOKE abaixo): o recálculo segura a
+-- linha do usuário, e ninguém de fora deve poder dispará-lo para outro usuário.
+CREATE OR REPLACE FUNCTION resumo_reconstruir(p_user_id UUID)
+RETURNS void AS $$
+BEGIN
+  -- Espera as escritas em andamento do usuário (que seguram esta linha até o commit);
+  -- cada comando abaixo vê o que já foi confirmado
+  PERFORM 1 FROM resumo_usuarios WHERE user_id = p_user_id FOR UPDATE;
+
+  DELETE FROM resumo_objetivos WHERE user_id = p_user_id;
+  DELETE FROM resumo_usuarios WHERE user_id = p_user_id;
+
+  INSERT INTO resumo_objetivos (objetivo_id, user_id, valor_meta, total_investido)
+  SELECT o.id, c.user_id, o.valor_meta, COALESCE(SUM(i.valor), 0)
+  FROM clientes c
+  JOIN objetivos o ON o.cliente_id = c.id
+  LEFT JOIN investimentos i ON i.objetivo_id = o.id
+  WHERE c.user_id = p_user_id
+  GROUP BY o.id, c.user_id, o.valor_meta;
+
+  INSERT INTO resumo_usuarios
+    (user_id, clientes, objetivos, objetivos_com_meta, total_investido, soma_metas, meta_coberta)
+  SELECT
+    p_user_id,
+    (SELECT COUNT(*) FROM clientes WHERE user_id = p_user_id),
+    COUNT(r.objetivo_id),
+    COUNT(*) FILTER (WHERE r.valor_meta > 0),
+    COALESCE(SUM(r.total_investido), 0),
+    COALESCE(SUM(r.valor_meta), 0),
+    COALESCE(SUM(resumo_cobertura(r.total_investido, r.valor_meta)), 0)
+  FROM resumo_objetivos r
+  WHERE r.user_id = p_user_id;
+
+  INSERT INTO resumo_alocacao (user_id, tipo, total, quantidade)
+  SELECT p_user_id, COALESCE(i.tipo, ''), SUM(i.valor), COUNT(*)
+  FROM clientes c
+  JOIN objetivos o ON o.cliente_id = c.id
+  JOIN investimentos i ON i.objetivo_id = o.id
+  WHERE c.user_id = p_user_id
+  GROUP BY 2;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+-- Todos os usuários: apenas no SQL Editor / service role
+CREATE OR REPLACE FUNCTION resumo_reconstruir_todos()
+RETURNS INT AS $$
+DECLARE
+  u UUID;
+  n INT := 0;
+BEGIN
+  FOR u IN SELECT DISTINCT user_id FROM clientes WHERE user_id IS NOT NULL LOOP
+    PERFORM resumo_reconstruir(u);
+    n := n + 1;
+  END LOOP;
+  RETURN n;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+REVOKE EXECUTE ON FUNCTION resumo_reconstruir(UUID) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION resumo_reconstruir_todos() FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION resumo_somar(UUID, INT, INT, INT, DECIMAL, DECIMAL, DECIMAL) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION resumo_aplicar(resumo_variacao[]) FROM PUBLIC, anon, authenticated;
+
+-- Estado inicial
+SELECT resumo_reconstruir_todos();
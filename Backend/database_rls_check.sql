@@ -0,0 +1,103 @@
+-- Verificação das políticas RLS entre usuários (cross-tenant)
+-- Necessária antes de ativar DB_RLS_WRITES=true: nesse modo o backend não
+-- verifica a posse antes de escrever e depende apenas destas políticas.
+-- Execute no Supabase SQL Editor. Tudo roda em uma transação desfeita no final;
+-- qualquer falha interrompe o script com a mensagem correspondente.
+
+BEGIN;
+
+-- Dois usuários de teste: A é dono dos dados, B tenta acessá-los
+INSERT INTO auth.users (id, email) VALUES
+  ('00000000-0000-0000-0000-0000000000a1', 'rls-check-a@wolfplanner.local'),
+  ('00000000-0000-0000-0000-0000000000b1', 'rls-check-b@wolfplanner.local');
+
+INSERT INTO clientes (id, user_id, nome, email) VALUES
+  ('00000000-0000-0000-0000-0000000000c1', '00000000-0000-0000-0000-0000000000a1', 'Cliente A', 'cliente-a@wolfplanner.local');
+
+INSERT INTO objetivos (id, cliente_id, nome, valor_meta) VALUES
+  ('00000000-0000-0000-0000-0000000000d1', '00000000-0000-0000-0000-0000000000c1', 'Objetivo A', 1000);
+
+INSERT INTO investimentos (id, objetivo_id, nome, valor, tipo) VALUES
+  ('00000000-0000-0000-0000-0000000000e1', '00000000-0000-0000-0000-0000000000d1', 'Investimento A', 500, 'renda_fixa');
+
+-- Agir como o usuário B, do mesmo jeito que o PostgREST faz com o JWT
+SET LOCAL ROLE authenticated;
+SELECT set_config('request.jwt.claims', '{"sub": "00000000-0000-0000-0000-0000000000b1", "role": "authenticated"}', true);
+
+DO $$
+DECLARE
+  n INT;
+BEGIN
+  -- Leitura
+  SELECT count(*) INTO n FROM clientes WHERE id = '00000000-0000-0000-0000-0000000000c1';
+  IF n <> 0 THEN RAISE EXCEPTION 'B consegue ler cliente de A'; END IF;
+  SELECT count(*) INTO n FROM objetivos WHERE id = '00000000-0000-0000-0000-0000000000d1';
+  IF n <> 0 THEN RAISE EXCEPTION 'B consegue ler objetivo de A'; END IF;
+  SELECT count(*) INTO n FROM investimentos WHERE id = '00000000-0000-0000-0000-0000000000e1';
+  IF n <> 0 THEN RAISE EXCEPTION 'B consegue ler investimento de A'; END IF;
+
+  -- Atualização: zero linhas afetadas (o backend responde 404)
+  UPDATE clientes SET nome = 'invadido' WHERE id = '00000000-0000-0000-0000-0000000000c1';
+  GET DIAGNOSTICS n = ROW_COUNT;
+  IF n <> 0 THEN RAISE EXCEPTION 'B consegue alterar cliente de A'; END IF;
+  UPDATE objetivos SET nome = 'invadido' WHERE id = '00000000-0000-0000-0000-0000000000d1';
+  GET DIAGNOSTICS n = ROW_COUNT;
+  IF n <> 0 THEN RAISE EXCEPTION 'B consegue alterar objetivo de A'; END IF;
+  UPDATE investimentos SET valor = 0 WHERE id = '00000000-0000-0000-0000-0000000000e1';
+  GET DIAGNOSTICS n = ROW_COUNT;
+  IF n <> 0 THEN RAISE EXCEPTION 'B consegue alterar investimento de A'; END IF;
+
+  -- Remoção
+  DELETE FROM investimentos WHERE id = '00000000-0000-0000-0000-0000000000e1';
+  GET DIAGNOSTICS n = ROW_COUNT;
+  IF n <> 0 THEN RAISE EXCEPTION 'B consegue remover investimento de A'; END IF;
+  DELETE FROM objetivos WHERE id = '00000000-0000-0000-0000-0000000000d1';
+  GET DIAGNOSTICS n = ROW_COUNT;
+  IF n <> 0 THEN RAISE EXCEPTION 'B consegue remover objetivo de A'; END IF;
+  DELETE FROM clientes WHERE id = '00000000-0000-0000-0000-0000000000c1';
+  GET DIAGNOSTICS n = ROW_COUNT;
+  IF n <> 0 THEN RAISE EXCEPTION 'B consegue remover cliente de A'; END IF;
+
+  -- Inserção sob registros de A: deve violar a política (42501)
+  BEGIN
+    INSERT INTO objetivos (cliente_id, nome) VALUES ('00000000-0000-0000-0000-0000000000c1', 'invasor');
+    RAISE EXCEPTION 'B consegue criar objetivo em cliente de A';
+  EXCEPTION WHEN insufficient_privilege THEN NULL;
+  END;
+  BEGIN
+    INSERT INTO investimentos (objetivo_id, nome, valor) VALUES ('00000000-0000-0000-0000-0000000000d1', 'invasor', 1);
+    RAISE EXCEPTION 'B consegue criar investimento em objetivo de A';
+  EXCEPTION WHEN insufficient_privilege THEN NULL;
+  END;
+  BEGIN
+    INSERT INTO clientes (user_id, nome, email) VALUES ('00000000-0000-0000-0000-0000000000a1', 'invasor', 'invasor@wolfplanner.local');
+    RAISE EXCEPTION 'B consegue criar cliente em nome de A';
+  EXCEPTION WHEN insufficient_privilege THEN NULL;
+  END;
+
+  -- Mover um registro próprio para um cliente de A também deve falhar
+  INSERT INTO clientes (id, user_id, nome, email) VALUES
+    ('00000000-0000-0000-0000-0000000000c2', '00000000-0000-0000-0000-0000000000b1', 'Cliente B', 'cliente-b@wolfplanner.local');
+  INSERT INTO objetivos (id, cliente_id, nome) VALUES
+    ('00000000-0000-0000-0000-0000000000d2', '00000000-0000-0000-0000-0000000000c2', 'Objetivo B');
+  BEGIN
+    UPDATE objetivos SET cliente_id = '00000000-0000-0000-0000-0000000000c1' WHERE id = '00000000-0000-0000-0000-0000000000d2';
+    RAISE EXCEPTION 'B consegue mover objetivo para cliente de A';
+  EXCEPTION WHEN insufficient_privilege THEN NULL;
+  END;
+END $$;
+
+-- O dono continua com acesso normal
+SELECT set_config('request.jwt.claims', '{"sub": "00000000-0000-0000-0000-0000000000a1", "role": "authenticated"}', true);
+
+DO $$
+DECLARE
+  n INT;
+BEGIN
+  UPDATE investimentos SET valor = 600 WHERE id = '00000000-0000-0000-0000-0000000000e1';
+  GET DIAGNOSTICS n = ROW_COUNT;
+  IF n <> 1 THEN RAISE EXCEPTION 'A não consegue alterar o próprio investimento'; END IF;
+  RAISE NOTICE 'Políticas RLS OK: acesso entre usuários bloqueado';
+END $$;
+
+ROLLBACK;
@@ -0,0 +1,172 @@
+-- Sincronização incremental (GET /api/sync): clientes, objetivos e investimentos criados,
+-- alterados ou removidos desde um cursor, para o frontend manter uma cópia local.
+-- Execute este script no Supabase SQL Editor (depois de database_setup.sql).
+--
+-- Criações e alterações são lidas das próprias tabelas por updated_at; remoções ficam em
+-- sync_remocoes (tombstones). Remover um cliente ou objetivo remove os filhos em cascata:
+-- só a remoção do pai é registrada, e quem sincroniza descarta os filhos junto.
+
+-- updated_at em objetivos e investimentos (clientes já tem). As linhas existentes ficam
+-- com o horário da migração: a primeira sincronização é completa de qualquer forma.
+ALTER TABLE objetivos ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW();
+ALTER TABLE investimentos ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW();
+
+DROP TRIGGER IF EXISTS update_objetivos_updated_at ON objetivos;
+CREATE TRIGGER update_objetivos_updated_at BEFORE UPDATE ON objetivos
+  FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+
+DROP TRIGGER IF EXISTS update_investimentos_updated_at ON investimentos;
+CREATE TRIGGER update_investimentos_updated_at BEFORE UPDATE ON investimentos
+  FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+
+-- Alterações de cada dono/pai em ordem de updated_at (keyset em updated_at, id)
+CREATE INDEX IF NOT EXISTS idx_clientes_user_updated ON clientes(user_id, updated_at, id);
+CREATE INDEX IF NOT EXISTS idx_objetivos_cliente_updated ON objetivos(cliente_id, updated_at, id);
+CREATE INDEX IF NOT EXISTS idx_investimentos_objetivo_updated ON investimentos(objetivo_id, updated_at, id);
+
+-- Tombstones: uma linha por registro removido, com o dono gravado (o registro não existe mais)
+CREATE TABLE IF NOT EXISTS sync_remocoes (
+  tabela TEXT NOT NULL CHECK (tabela IN ('clientes', 'objetivos', 'investimentos')),
+  id UUID NOT NULL,
+  user_id UUID NOT NULL REFERENCES auth.users(id) ON DELETE CASCADE,
+  removido_em TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+  PRIMARY KEY (tabela, id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_sync_remocoes_user ON sync_remocoes(user_id, removido_em, tabela, id);
+
+ALTER TABLE sync_remocoes ENABLE ROW LEVEL SECURITY;
+
+-- Somente leitura para o dono; as escritas vêm do trigger
+DROP POLICY IF EXISTS "Usuarios leem suas remocoes" ON sync_remocoes;
+CREATE POLICY "Usuarios leem suas remocoes" ON sync_remocoes
+  FOR SELECT USING (auth.uid() = user_id);
+
+-- DELETE grava o tombstone; INSERT apaga o de um id reinserido (importação, lotes)
+CREATE OR REPLACE FUNCTION sync_remocoes_trigger()
+RETURNS TRIGGER AS $$
+DECLARE
+  v_user_id UUID;
+BEGIN
+  IF TG_OP = 'INSERT' THEN
+    DELETE FROM sync_remocoes WHERE tabela = TG_TABLE_NAME AND id = NEW.id;
+    RETURN NULL;
+  END IF;
+
+  IF TG_TABLE_NAME = 'clientes' THEN
+    v_user_id := OLD.user_id;
+  ELSIF TG_TABLE_NAME = 'objetivos' THEN
+    SELECT c.user_id INTO v_user_id FROM clientes c WHERE c.id = OLD.cliente_id;
+  ELSE
+    SELECT c.user_id INTO v_user_id
+    FROM objetivos o JOIN clientes c ON c.id = o.cliente_id
+    WHERE o.id = OLD.objetivo_id;
+  END IF;
+  -- Pai já removido: é a cascata, coberta pelo tombstone do pai
+  IF v_user_id IS NULL THEN
+    RETURN NULL;
+  END IF;
+
+  INSERT INTO sync_remocoes (tabela, id, user_id) VALUES (TG_TABLE_NAME, OLD.id, v_user_id)
+  ON CONFLICT (tabela, id) DO UPDATE SET user_id = EXCLUDED.user_id, removido_em = EXCLUDED.removido_em;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+DROP TRIGGER IF EXISTS sync_remocoes_clientes ON clientes;
+CREATE TRIGGER sync_remocoes_clientes AFTER INSERT OR DELETE ON clientes
+  FOR EACH ROW EXECUTE FUNCTION sync_remocoes_trigger();
+
+DROP TRIGGER IF EXISTS sync_remocoes_objetivos ON objetivos;
+CREATE TRIGGER sync_remocoes_objetivos AFTER INSERT OR DELETE ON objetivos
+  FOR EACH ROW EXECUTE FUNCTION sync_remocoes_trigger();
+
+DROP TRIGGER IF EXISTS sync_remocoes_investimentos ON investimentos;
+CREATE TRIGGER sync_remocoes_investimentos AFTER INSERT OR DELETE ON investimentos
+  FOR EACH ROW EXECUTE FUNCTION sync_remocoes_trigger();
+
+-- Alterações do usuário depois da posição (p_desde, p_apos_tabela, p_apos_id), na ordem
+-- (alterado_em, tabela, id), até p_limite itens. Sem p_desde, é a carga completa: todas
+-- as linhas atuais e nenhum tombstone. Retorna {"agora": ..., "itens": [...]}, com o
+-- horário do banco para a API calcular o próximo cursor.
+-- Cada ramo percorre os clientes/objetivos do usuário e, em cada um, só o intervalo
+-- alterado pelos índices *_updated, parando em p_limite: o custo acompanha o tamanho da
+-- carteira do usuário e o volume alterado, não o tamanho das tabelas.
+CREATE OR REPLACE FUNCTION sync_alteracoes(
+  p_user_id UUID,
+  p_desde TIMESTAMPTZ DEFAULT NULL,
+  p_apos_tabela TEXT DEFAULT '',
+  p_apos_id UUID DEFAULT '00000000-0000-0000-0000-000000000000',
+  p_limite INT DEFAULT 1000
+)
+RETURNS JSONB AS $$
+  WITH itens AS (
+    (SELECT 'clientes'::TEXT AS tabela, c.id, c.updated_at AS alterado_em, FALSE AS removido, to_jsonb(c) AS dados
+     FROM clientes c
+     WHERE c.user_id = p_user_id
+       AND (p_desde IS NULL OR c.updated_at > p_desde
+         OR (c.updated_at = p_desde AND ('clientes', c.id) > (p_apos_tabela, p_apos_id)))
+     ORDER BY c.updated_at, c.id
+     LIMIT p_limite)
+    UNION ALL
+    (SELECT 'objetivos', o.id, o.updated_at, FALSE, to_jsonb(o)
+     FROM objetivos o
+     JOIN clientes c ON c.id = o.cliente_id
+     WHERE c.user_id = p_user_id
+       AND (p_desde IS NULL OR o.updated_at > p_desde
+         OR (o.updated_at = p_desde AND ('objetivos', o.id) > (p_apos_tabela, p_apos_id)))
+     ORDER BY o.updated_at, o.id
+     LIMIT p_limite)
+    UNION ALL
+    (SELECT 'investimentos', i.id, i.updated_at, FALSE, to_jsonb(i)
+     FROM investimentos i
+     JOIN objetivos o ON o.id = i.objetivo_id
+     JOIN clientes c ON c.id = o.cliente_id
+     WHERE c.user_id = p_user_id
+       AND (p_desde IS NULL OR i.updated_at > p_desde
+         OR (i.updated_at = p_desde AND ('investimentos', i.id) > (p_apos_tabela, p_apos_id)))
+     ORDER BY i.updated_at, i.id
+     LIMIT p_limite)
+    UNION ALL
+    (SELECT r.tabela, r.id, r.removido_em, TRUE, NULL::JSONB
+     FROM sync_remocoes r
+     WHERE p_desde IS NOT NULL AND r.user_id = p_user_id
+       AND (r.removido_em, r.tabela, r.id) > (p_desde, p_apos_tabela, p_apos_id)
+     ORDER BY r.removido_em, r.tabela, r.id
+     LIMIT p_limite)
+  ),
+  pagina AS (
+    SELECT * FROM itens ORDER BY alterado_em, tabela, id LIMIT p_limite
+  )
+  SELECT jsonb_build_object(
+    'agora', NOW(),
+    'itens', COALESCE(
+      (SELECT jsonb_agg(
+        jsonb_build_object('tabela', tabela, 'id', id, 'alterado_em', alterado_em, 'removido', removido, 'dados', dados)
+        ORDER BY alterado_em, tabela, id
+      ) FROM pagina),
+      '[]'::JSONB
+    )
+  );
+$$ LANGUAGE sql STABLE SET search_path = public;
+
+-- Limpeza dos tombstones mais antigos que p_idade. Mantenha igual a SYNC_TOMBSTONE_DAYS:
+-- cursores mais antigos que isso recebem 410 e fazem a carga completa.
+CREATE OR REPLACE FUNCTION sync_limpar_remocoes(p_idade INTERVAL DEFAULT '30 days')
+RETURNS BIGINT AS $$
+DECLARE
+  removidas BIGINT;
+BEGIN
+  DELETE FROM sync_remocoes WHERE removido_em < NOW() - p_idade;
+  GET DIAGNOSTICS removidas = ROW_COUNT;
+  RETURN removidas;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+REVOKE EXECUTE ON FUNCTION sync_limpar_remocoes(INTERVAL) FROM PUBLIC, anon, authenticated;
+
+-- Limpeza diária com pg_cron (Database > Extensions > pg_cron):
+-- SELECT cron.schedule('sync_limpar_remocoes', '45 3 * * *', 'SELECT sync_limpar_remocoes()');
+
+-- Verificar o plano (deve usar os índices *_updated e idx_sync_remocoes_user):
+-- EXPLAIN ANALYZE SELECT sync_alteracoes('<user_id>', NOW() - INTERVAL '1 hour');
@@ -1,12 +1,41 @@
+import logging
 import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.routers import auth, clientes, carteiras
+from fastapi.responses import ORJSONResponse
+from app import database, prontidao
+from app.auth import precarregar_chaves
+from app.config import settings
+from app.metrics import MetricasMiddleware
+from app.perfil import Perfilador
+from app.routers import auth, clientes, carteiras, lotes, portabilidade, metricas, feed, sync
+
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Cliente do Supabase criado aqui (e não na importação); conexões e chaves
+    # aquecidas antes de o /ready liberar tráfego para a instância
+    db = database.get_db()
+    if settings.DB_WARMUP_CONNECTIONS > 0:
+        try:
+            await db.aquecer(settings.DB_WARMUP_CONNECTIONS)
+        except Exception as e:
+            logger.warning("Aquecimento das conexões com o Supabase falhou: %s", e)
+    await precarregar_chaves()
+    prontidao.marcar_aquecido()
+    yield
+    await database.encerrar()
+
 
 app = FastAPI(
     title="Wolf Planner API",
     description="API para gerenciamento de clientes e carteiras de investimento",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan,
 )
 
 # Configurar CORS para produção
@@ -28,12 +57,24 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
+# Perfil por amostragem só nas rotas listadas em PROFILE_ROUTES
+app.state.perfilador = Perfilador(
+    app, settings.PROFILE_ROUTES, settings.PROFILE_SAMPLE_RATE, settings.PROFILE_INTERVAL_MS / 1000
+) if settings.PROFILE_ROUTES else None
+app.add_middleware(MetricasMiddleware, perfilador=app.state.perfilador)
+
 # Incluir routers
 app.include_router(auth.router, prefix="/api")
 app.include_router(clientes.router, prefix="/api")
 app.include_router(carteiras.router, prefix="/api")
+app.include_router(lotes.router, prefix="/api")
+app.include_router(portabilidade.router, prefix="/api")
+app.include_router(feed.router, prefix="/api")
+app.include_router(sync.router, prefix="/api")
+app.include_router(metricas.router)
 
 @app.get("/")
 async def root():
@@ -41,4 +82,13 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy"}
\ No newline at end of file
+    return {"status": "healthy"}
+
+@app.get("/ready")
+async def ready_check():
+    """Pronto para tráfego: inicialização concluída e Supabase acessível."""
+    pronto, detalhes = await prontidao.verificar()
+    return ORJSONResponse(
+        {"status": "ready" if pronto else "not_ready", **detalhes},
+        status_code=200 if pronto else 503,
+    )
@@ -0,0 +1,55 @@
+import os
+
+os.environ.setdefault("SUPABASE_URL", "http://supabase.local")
+os.environ.setdefault("SUPABASE_ANON_KEY", "anon")
+os.environ.setdefault("SUPABASE_JWT_SECRET", "teste-secret")
+os.environ.setdefault("SUPABASE_SERVICE_KEY", "teste-service")
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app.database as database
+from app import http_cache
+from app.config import settings
+from benchmarks.fake_supabase import FakeSupabase
+
+
+@pytest.fixture
+def fake(monkeypatch):
+    """Supabase simulado no lugar do cliente global, com o cache de respostas desligado."""
+    monkeypatch.setattr(http_cache.cache_respostas, "ttl", 0)
+    fake = FakeSupabase(
+        settings.SUPABASE_JWT_SECRET, issuer=settings.SUPABASE_JWT_ISSUER, service_key=settings.SUPABASE_SERVICE_KEY
+    )
+    monkeypatch.setattr(database, "db", database.Database(
+        settings.SUPABASE_URL, settings.SUPABASE_ANON_KEY, transport=fake.transport,
+        service_key=settings.SUPABASE_SERVICE_KEY,
+    ))
+    return fake
+
+
+@pytest.fixture
+def client(fake):
+    from main import app
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def semear(fake):
+    """Cria um usuário com um cliente, um objetivo e um investimento."""
+
+    def semear(email: str, nome: str, valor: float, tipo: str = "CDB") -> dict:
+        user = fake.criar_usuario(email)
+        cliente = fake.inserir("clientes", user_id=user["id"], nome=nome, email=email)
+        objetivo = fake.inserir("objetivos", cliente_id=cliente["id"], nome=nome, valor_meta=valor * 2)
+        investimento = fake.inserir("investimentos", objetivo_id=objetivo["id"], nome=nome, valor=valor, tipo=tipo)
+        return {
+            "user": user,
+            "headers": {"Authorization": f"Bearer {fake.emitir_token(user)}"},
+            "cliente": cliente["id"],
+            "objetivo": objetivo["id"],
+            "investimento": investimento["id"],
+        }
+
+    return semear
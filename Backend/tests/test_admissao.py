@@ -0,0 +1,137 @@
+import asyncio
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+from app import admissao
+from app.admissao import Disjuntor, TransporteControlado, UpstreamIndisponivel
+
+
+class Relogio:
+    def __init__(self):
+        self.agora = 1000.0
+
+    def __call__(self) -> float:
+        return self.agora
+
+
+@pytest.fixture
+def relogio(monkeypatch):
+    relogio = Relogio()
+    # Só o relógio do módulo: o do asyncio continua o real
+    monkeypatch.setattr(admissao, "time", SimpleNamespace(monotonic=relogio))
+    return relogio
+
+
+def _aberto(relogio: Relogio) -> Disjuntor:
+    disjuntor = Disjuntor("rest", limiar=3, espera=10)
+    for _ in range(3):
+        disjuntor.permitir()
+        disjuntor.falha()
+    assert disjuntor.estado == Disjuntor.ABERTO
+    return disjuntor
+
+
+def test_abre_apos_limiar_de_falhas_seguidas(relogio):
+    disjuntor = Disjuntor("rest", limiar=3, espera=10)
+    disjuntor.falha()
+    disjuntor.falha()
+    disjuntor.sucesso()
+    disjuntor.falha()
+    disjuntor.falha()
+    assert disjuntor.estado == Disjuntor.FECHADO
+
+    disjuntor.falha()
+    assert disjuntor.estado == Disjuntor.ABERTO
+    assert disjuntor.aberturas == 1
+    with pytest.raises(UpstreamIndisponivel) as erro:
+        disjuntor.permitir()
+    assert erro.value.headers["Retry-After"] == "10"
+    assert disjuntor.rejeitadas == 1
+
+
+def test_sondagem_com_sucesso_fecha_o_circuito(relogio):
+    disjuntor = _aberto(relogio)
+    relogio.agora += 10
+    disjuntor.permitir()
+    assert disjuntor.estado == Disjuntor.MEIO_ABERTO
+
+    # Só a sondagem passa enquanto o circuito está meio aberto
+    with pytest.raises(UpstreamIndisponivel):
+        disjuntor.permitir()
+
+    disjuntor.sucesso()
+    assert disjuntor.estado == Disjuntor.FECHADO
+    assert disjuntor.falhas == 0
+    disjuntor.permitir()
+
+
+def test_sondagem_com_falha_reabre_com_nova_espera(relogio):
+    disjuntor = _aberto(relogio)
+    relogio.agora += 10
+    disjuntor.permitir()
+    disjuntor.falha()
+    assert disjuntor.estado == Disjuntor.ABERTO
+    assert disjuntor.aberturas == 1
+
+    relogio.agora += 9
+    with pytest.raises(UpstreamIndisponivel):
+        disjuntor.permitir()
+    relogio.agora += 1
+    disjuntor.permitir()
+    assert disjuntor.estado == Disjuntor.MEIO_ABERTO
+
+
+def test_sondagem_interrompida_reabre_com_nova_espera(relogio):
+    disjuntor = _aberto(relogio)
+    relogio.agora += 10
+    disjuntor.permitir()
+    disjuntor.interrompida()
+    assert disjuntor.estado == Disjuntor.ABERTO
+    assert disjuntor.aberto_em == relogio.agora
+
+    with pytest.raises(UpstreamIndisponivel):
+        disjuntor.permitir()
+    relogio.agora += 10
+    disjuntor.permitir()
+    assert disjuntor.estado == Disjuntor.MEIO_ABERTO
+
+
+def test_interrupcao_fora_da_sondagem_nao_muda_o_estado(relogio):
+    disjuntor = Disjuntor("rest", limiar=3, espera=10)
+    disjuntor.interrompida()
+    assert disjuntor.estado == Disjuntor.FECHADO
+
+    disjuntor = _aberto(relogio)
+    aberto_em = disjuntor.aberto_em
+    disjuntor.interrompida()
+    assert (disjuntor.estado, disjuntor.aberto_em) == (Disjuntor.ABERTO, aberto_em)
+
+
+class Lento(httpx.AsyncBaseTransport):
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(10)
+        return httpx.Response(200)
+
+
+def test_sondagem_cancelada_no_transporte_reabre_o_circuito(relogio):
+    transporte = TransporteControlado(
+        Lento(), limite=1, espera_fila=1, timeout=0, retentativas=0, backoff=0, limiar_falhas=1, espera_circuito=10
+    )
+    disjuntor = transporte.disjuntores["rest"]
+    disjuntor.falha()
+    relogio.agora += 10
+
+    async def sondar():
+        request = httpx.Request("GET", "http://supabase/rest/v1/clientes")
+        tarefa = asyncio.ensure_future(transporte.handle_async_request(request))
+        await asyncio.sleep(0.01)
+        assert disjuntor.estado == Disjuntor.MEIO_ABERTO
+        tarefa.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await tarefa
+
+    asyncio.run(sondar())
+    assert disjuntor.estado == Disjuntor.ABERTO
+    assert disjuntor.aberto_em == relogio.agora
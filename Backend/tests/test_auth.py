@@ -0,0 +1,14 @@
+import pytest
+
+
+@pytest.mark.parametrize("sessao_no_signup", [True, False], ids=["com-sessao", "sem-sessao"])
+def test_register_devolve_token(client, fake, sessao_no_signup):
+    fake.sessao_no_signup = sessao_no_signup
+    response = client.post("/api/auth/register", json={"email": "novo@exemplo.com", "password": "senha123"})
+    assert response.status_code == 200
+    corpo = response.json()
+    assert corpo["user"]["email"] == "novo@exemplo.com"
+    me = client.get("/api/auth/me", headers={"Authorization": f"Bearer {corpo['access_token']}"})
+    assert me.status_code == 200
+    # O login extra só acontece quando o sign_up não traz sessão
+    assert fake.chamadas_por_rota["POST /auth/v1/token"] == (0 if sessao_no_signup else 1)
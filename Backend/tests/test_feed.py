@@ -0,0 +1,88 @@
+import time
+
+import pytest
+from starlette.websockets import WebSocketDisconnect
+
+from app.config import settings
+from app.routers.feed import FECHAMENTO_NAO_AUTENTICADO
+
+
+def _token(dono: dict) -> str:
+    return dono["headers"]["Authorization"].removeprefix("Bearer ")
+
+
+def _fechamento(ws) -> int:
+    with pytest.raises(WebSocketDisconnect) as fechamento:
+        while True:
+            ws.receive_json()
+    return fechamento.value.code
+
+
+def test_token_na_primeira_mensagem(client, semear):
+    dono = semear("a@exemplo.com", "Carteira A", 1000.0)
+    with client.websocket_connect("/api/feed") as ws:
+        ws.send_json({"tipo": "autenticar", "token": _token(dono)})
+        assert ws.receive_json()["tipo"] == "pronto"
+        assert client.put(f"/api/clientes/{dono['cliente']}", json={"nome": "outro"}, headers=dono["headers"]).status_code == 200
+        assert ws.receive_json()["id"] == dono["cliente"]
+
+
+def test_token_na_url_e_recusado(client, semear):
+    dono = semear("a@exemplo.com", "Carteira A", 1000.0)
+    with client.websocket_connect(f"/api/feed?token={_token(dono)}") as ws:
+        assert _fechamento(ws) == FECHAMENTO_NAO_AUTENTICADO
+
+
+@pytest.mark.parametrize("mensagem", [None, {"tipo": "autenticar", "token": "invalido"}, {"tipo": "outro"}])
+def test_sem_token_valido_a_conexao_e_fechada(client, monkeypatch, mensagem):
+    monkeypatch.setattr(settings, "FEED_AUTH_TIMEOUT", 0.05)
+    with client.websocket_connect("/api/feed") as ws:
+        if mensagem is not None:
+            ws.send_json(mensagem)
+        assert _fechamento(ws) == FECHAMENTO_NAO_AUTENTICADO
+
+
+def test_conexao_fechada_quando_o_token_expira(client, fake, semear):
+    dono = semear("a@exemplo.com", "Carteira A", 1000.0)
+    token = fake.emitir_token(dono["user"], ttl=1)
+    with client.websocket_connect("/api/feed") as ws:
+        ws.send_json({"tipo": "autenticar", "token": token})
+        assert ws.receive_json()["tipo"] == "pronto"
+        inicio = time.monotonic()
+        assert _fechamento(ws) == FECHAMENTO_NAO_AUTENTICADO
+        assert time.monotonic() - inicio < 2
+
+
+def test_token_renovado_mantem_a_conexao(client, fake, semear):
+    dono = semear("a@exemplo.com", "Carteira A", 1000.0)
+    with client.websocket_connect("/api/feed") as ws:
+        ws.send_json({"tipo": "autenticar", "token": fake.emitir_token(dono["user"], ttl=1)})
+        assert ws.receive_json()["tipo"] == "pronto"
+        ws.send_json({"tipo": "autenticar", "token": fake.emitir_token(dono["user"])})
+        time.sleep(1.2)
+        # Passou a expiração do primeiro token e a conexão segue recebendo eventos
+        assert client.put(f"/api/clientes/{dono['cliente']}", json={"nome": "outro"}, headers=dono["headers"]).status_code == 200
+        assert ws.receive_json()["id"] == dono["cliente"]
+
+
+def test_renovacao_com_token_de_outro_usuario_fecha_a_conexao(client, semear):
+    a = semear("a@exemplo.com", "Carteira A", 1000.0)
+    b = semear("b@exemplo.com", "Carteira B", 1000.0)
+    with client.websocket_connect("/api/feed", headers=a["headers"]) as ws:
+        assert ws.receive_json()["tipo"] == "pronto"
+        ws.send_json({"tipo": "autenticar", "token": _token(b)})
+        assert _fechamento(ws) == FECHAMENTO_NAO_AUTENTICADO
+
+
+def test_logout_fecha_so_as_conexoes_da_sessao(client, fake, semear):
+    dono = semear("a@exemplo.com", "Carteira A", 1000.0)
+    outra_sessao = fake.emitir_token(dono["user"])
+    with client.websocket_connect("/api/feed", headers=dono["headers"]) as ws, \
+            client.websocket_connect("/api/feed", headers={"Authorization": f"Bearer {outra_sessao}"}) as outra:
+        assert ws.receive_json()["tipo"] == "pronto"
+        assert outra.receive_json()["tipo"] == "pronto"
+        assert client.post("/api/auth/logout", headers=dono["headers"]).status_code == 200
+        assert _fechamento(ws) == FECHAMENTO_NAO_AUTENTICADO
+
+        assert client.put(f"/api/clientes/{dono['cliente']}", json={"nome": "outro"}, headers=dono["headers"]).status_code == 200
+        assert outra.receive_json()["id"] == dono["cliente"]
@@ -0,0 +1,34 @@
+"""resumo_reconstruir e historico_registrar só executam com a chave service_role."""
+import pytest
+
+import app.database as database
+
+
+def _chamar(client, dono: dict):
+    reconstruir = client.post("/api/carteiras/resumo/reconstruir", headers=dono["headers"])
+    cotacoes = client.post(
+        "/api/carteiras/investimentos/cotacoes",
+        json={"itens": [{"investimento_id": dono["investimento"], "valor": 1500}]},
+        headers=dono["headers"],
+    )
+    return reconstruir, cotacoes
+
+
+def test_funcoes_restritas_usam_a_service_key(client, fake, semear):
+    dono = semear("a@exemplo.com", "Carteira A", 1000.0)
+    reconstruir, cotacoes = _chamar(client, dono)
+    assert reconstruir.status_code == 200
+    assert cotacoes.status_code == 200
+    assert cotacoes.json() == {"registrados": 1, "nao_encontrados": []}
+    assert fake.tabelas["investimentos"][dono["investimento"]]["valor"] == 1500
+
+
+@pytest.mark.parametrize("service_key", [None, "anon"], ids=["sem-chave", "chave-anon"])
+def test_sem_service_key_as_funcoes_restritas_falham(client, fake, semear, monkeypatch, service_key):
+    monkeypatch.setattr(database.db, "service_key", service_key)
+    dono = semear("a@exemplo.com", "Carteira A", 1000.0)
+    reconstruir, cotacoes = _chamar(client, dono)
+    assert reconstruir.status_code == 400
+    assert cotacoes.status_code == 400
+    assert fake.tabelas["investimentos"][dono["investimento"]]["valor"] == 1000
+
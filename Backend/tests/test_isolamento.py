@@ -0,0 +1,201 @@
+"""Isolamento entre usuários: A não lê nem altera as linhas de B por nenhum endpoint.
+
+Roda contra o Supabase simulado de benchmarks/fake_supabase.py, com a service key
+(posse verificada pela API) e com ``DB_RLS_WRITES`` (escritas com o JWT do usuário,
+posse garantida pelas políticas RLS emuladas no fake).
+
+    python -m pytest tests
+"""
+import copy
+
+import pytest
+from starlette.websockets import WebSocketDisconnect
+
+from app.config import settings
+from app.routers.feed import FECHAMENTO_NAO_ENCONTRADO
+from benchmarks.fake_supabase import FakeSupabase
+
+# Texto presente em todos os dados de B: não pode aparecer em nenhuma resposta para A
+SEGREDO = "segredo-de-b"
+VALOR_B = 987654.0
+
+
+@pytest.fixture(params=[False, True], ids=["service-key", "rls-writes"])
+def cenario(request, monkeypatch, fake, semear):
+    monkeypatch.setattr(settings, "DB_RLS_WRITES", request.param)
+    a = semear("a@exemplo.com", "Carteira A", 1000.0)
+    b = semear("b@exemplo.com", SEGREDO, VALOR_B)
+    client = request.getfixturevalue("client")
+    yield fake, client, a, b
+
+
+def _estado(fake: FakeSupabase, user_id: str) -> dict:
+    linhas = {
+        tabela: {i: r for i, r in rows.items() if fake._dono(tabela, r) == user_id}
+        for tabela, rows in fake.tabelas.items()
+    }
+    historico = {i: v for i, v in fake.historico.items() if i in linhas["investimentos"]}
+    return copy.deepcopy({"linhas": linhas, "historico": historico})
+
+
+def _sem_vazamento(response, b: dict):
+    for segredo in (SEGREDO, b["cliente"], b["objetivo"], b["investimento"], "987654"):
+        assert segredo not in response.text
+
+
+LEITURAS_404 = [
+    ("GET", "/api/clientes/{cliente}", None),
+    ("GET", "/api/carteiras/cliente/{cliente}/objetivos", None),
+    ("GET", "/api/carteiras/objetivo/{objetivo}/investimentos", None),
+    ("GET", "/api/carteiras/cliente/{cliente}/completa", None),
+    ("POST", "/api/carteiras/cliente/{cliente}/projecao", {"anos": 1, "simulacoes": 100}),
+    ("GET", "/api/carteiras/cliente/{cliente}/historico", None),
+    ("GET", "/api/carteiras/objetivos/{objetivo}/historico", None),
+    ("GET", "/api/carteiras/investimentos/{investimento}/historico", None),
+]
+
+LEITURAS_PROPRIAS = [
+    ("GET", "/api/clientes/", None),
+    ("GET", "/api/clientes/search?q=" + SEGREDO, None),
+    ("GET", "/api/carteiras/resumo", None),
+    ("GET", "/api/sync", None),
+    ("GET", "/api/portabilidade/exportar?formato=ndjson", None),
+    ("GET", "/api/portabilidade/exportar?formato=csv", None),
+]
+
+ESCRITAS_404 = [
+    ("PUT", "/api/clientes/{cliente}", {"nome": "invadido"}),
+    ("DELETE", "/api/clientes/{cliente}", None),
+    ("POST", "/api/carteiras/objetivos", {"cliente_id": "{cliente}", "nome": "invadido"}),
+    ("PUT", "/api/carteiras/objetivos/{objetivo}", {"nome": "invadido"}),
+    ("DELETE", "/api/carteiras/objetivos/{objetivo}", None),
+    ("POST", "/api/carteiras/investimentos", {"objetivo_id": "{objetivo}", "nome": "invadido", "valor": 1}),
+    ("PUT", "/api/carteiras/investimentos/{investimento}", {"valor": 1}),
+    ("DELETE", "/api/carteiras/investimentos/{investimento}", None),
+]
+
+# Lotes não atômicos: o item de B volta como 404 e os demais seguem
+ESCRITAS_LOTE = [
+    ("PUT", "/api/lote/clientes", [{"id": "{cliente}", "nome": "invadido"}]),
+    ("POST", "/api/lote/clientes/remover", {"ids": ["{cliente}"]}),
+    ("POST", "/api/lote/objetivos", [{"cliente_id": "{cliente}", "nome": "invadido"}]),
+    ("PUT", "/api/lote/objetivos", [{"id": "{objetivo}", "nome": "invadido"}]),
+    ("POST", "/api/lote/objetivos/remover", {"ids": ["{objetivo}"]}),
+    ("POST", "/api/lote/investimentos", [{"objetivo_id": "{objetivo}", "nome": "invadido", "valor": 1}]),
+    ("PUT", "/api/lote/investimentos", [{"id": "{investimento}", "valor": 1}]),
+    ("POST", "/api/lote/investimentos/remover", {"ids": ["{investimento}"]}),
+]
+
+
+def _preencher(valor, ids: dict):
+    if isinstance(valor, str):
+        return valor.format(**ids)
+    if isinstance(valor, list):
+        return [_preencher(v, ids) for v in valor]
+    if isinstance(valor, dict):
+        return {k: _preencher(v, ids) for k, v in valor.items()}
+    return valor
+
+
+def _requisitar(client, a: dict, b: dict, metodo: str, url: str, corpo, **params):
+    ids = {k: b[k] for k in ("cliente", "objetivo", "investimento")}
+    return client.request(
+        metodo, _preencher(url, ids), json=_preencher(corpo, ids), params=params or None, headers=a["headers"]
+    )
+
+
+@pytest.mark.parametrize("metodo,url,corpo", LEITURAS_404)
+def test_leitura_de_outro_usuario_retorna_404(cenario, metodo, url, corpo):
+    fake, client, a, b = cenario
+    response = _requisitar(client, a, b, metodo, url, corpo)
+    assert response.status_code == 404
+    _sem_vazamento(response, b)
+
+
+@pytest.mark.parametrize("metodo,url,corpo", LEITURAS_PROPRIAS)
+def test_listagens_trazem_so_as_linhas_do_usuario(cenario, metodo, url, corpo):
+    fake, client, a, b = cenario
+    response = _requisitar(client, a, b, metodo, url, corpo)
+    assert response.status_code == 200
+    _sem_vazamento(response, b)
+
+
+@pytest.mark.parametrize("metodo,url,corpo", ESCRITAS_404)
+def test_escrita_em_linhas_de_outro_usuario_retorna_404(cenario, metodo, url, corpo):
+    fake, client, a, b = cenario
+    antes = _estado(fake, b["user"]["id"])
+    response = _requisitar(client, a, b, metodo, url, corpo)
+    assert response.status_code == 404
+    _sem_vazamento(response, b)
+    assert _estado(fake, b["user"]["id"]) == antes
+
+
+@pytest.mark.parametrize("metodo,url,corpo", ESCRITAS_LOTE)
+def test_lote_com_linhas_de_outro_usuario(cenario, metodo, url, corpo):
+    fake, client, a, b = cenario
+    antes = _estado(fake, b["user"]["id"])
+    atomico = _requisitar(client, a, b, metodo, url, corpo)
+    assert atomico.status_code == 404
+    parcial = _requisitar(client, a, b, metodo, url, corpo, atomico="false")
+    assert parcial.status_code == 200
+    assert [item["status"] for item in parcial.json()["itens"]] == [404]
+    assert _estado(fake, b["user"]["id"]) == antes
+
+
+@pytest.mark.parametrize("data", [None, "2024-01-31T00:00:00Z"], ids=["atual", "historico"])
+def test_cotacoes_ignoram_investimentos_de_outro_usuario(cenario, data):
+    fake, client, a, b = cenario
+    antes = _estado(fake, b["user"]["id"])
+    response = client.post(
+        "/api/carteiras/investimentos/cotacoes",
+        json={"data": data, "itens": [{"investimento_id": b["investimento"], "valor": 1}]},
+        headers=a["headers"],
+    )
+    assert response.status_code == 200
+    assert response.json() == {"registrados": 0, "nao_encontrados": [b["investimento"]]}
+    assert _estado(fake, b["user"]["id"]) == antes
+
+
+def test_importacao_nao_alcanca_linhas_de_outro_usuario(cenario):
+    fake, client, a, b = cenario
+    antes = _estado(fake, b["user"]["id"])
+    arquivo = (
+        f'{{"registro": "objetivo", "id": "o", "cliente_id": "{b["cliente"]}", "nome": "invadido"}}\n'
+        f'{{"registro": "investimento", "id": "i", "objetivo_id": "{b["objetivo"]}", "nome": "invadido", "valor": 1}}\n'
+    )
+    response = client.post("/api/portabilidade/importar", files={"arquivo": ("a.ndjson", arquivo)}, headers=a["headers"])
+    assert response.status_code == 200
+    assert '"erros": 2' in response.text.splitlines()[-1]
+    assert _estado(fake, b["user"]["id"]) == antes
+
+
+def test_reconstruir_resumo_nao_altera_outro_usuario(cenario):
+    fake, client, a, b = cenario
+    assert client.post("/api/carteiras/resumo/reconstruir", headers=b["headers"]).status_code == 200
+    resumo_b = fake.resumos[b["user"]["id"]]
+    antes = _estado(fake, b["user"]["id"])
+
+    response = client.post("/api/carteiras/resumo/reconstruir", headers=a["headers"])
+    assert response.status_code == 200
+    _sem_vazamento(response, b)
+    assert fake.resumos[a["user"]["id"]]["total_investido"] == 1000.0
+    # A linha de B não foi recalculada (mesmo objeto, mesmo atualizado_em)
+    assert fake.resumos[b["user"]["id"]] is resumo_b
+    assert resumo_b["total_investido"] == VALOR_B
+    assert _estado(fake, b["user"]["id"]) == antes
+
+
+def test_feed_de_outro_usuario(cenario):
+    fake, client, a, b = cenario
+    with client.websocket_connect(f"/api/feed?canal=carteira:{b['cliente']}", headers=a["headers"]) as ws:
+        with pytest.raises(WebSocketDisconnect) as fechamento:
+            ws.receive_json()
+    assert fechamento.value.code == FECHAMENTO_NAO_ENCONTRADO
+
+    # No canal de clientes de A, a escrita de B não chega; a de A, sim
+    with client.websocket_connect("/api/feed?canal=clientes", headers=a["headers"]) as ws:
+        assert ws.receive_json()["tipo"] == "pronto"
+        assert client.put(f"/api/clientes/{b['cliente']}", json={"nome": "outro"}, headers=b["headers"]).status_code == 200
+        assert client.put(f"/api/clientes/{a['cliente']}", json={"nome": "outro"}, headers=a["headers"]).status_code == 200
+        evento = ws.receive_json()
+        assert evento["id"] == a["cliente"]
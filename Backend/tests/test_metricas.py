@@ -0,0 +1,32 @@
+import pytest
+
+from app.config import settings
+
+ROTAS = ["/metrics", "/metrics/perfil"]
+
+
+@pytest.mark.parametrize("rota", ROTAS)
+def test_sem_token_configurado_metricas_ficam_desligadas(client, monkeypatch, rota):
+    monkeypatch.setattr(settings, "METRICS_TOKEN", None)
+    assert client.get(rota).status_code == 404
+    assert client.get(rota, headers={"Authorization": "Bearer "}).status_code == 404
+
+
+@pytest.mark.parametrize("rota", ROTAS)
+def test_token_configurado_e_exigido(client, monkeypatch, rota):
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "segredo")
+    assert client.get(rota).status_code == 401
+    assert client.get(rota, headers={"Authorization": "Bearer errado"}).status_code == 401
+
+
+def test_metricas_com_token(client, monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "segredo")
+    response = client.get("/metrics", headers={"Authorization": "Bearer segredo"})
+    assert response.status_code == 200
+    assert "http_requests_total" in response.text
+
+
+def test_metricas_publicas_so_quando_liberadas(client, monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_TOKEN", None)
+    monkeypatch.setattr(settings, "METRICS_PUBLIC", True)
+    assert client.get("/metrics").status_code == 200
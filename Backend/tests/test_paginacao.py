@@ -0,0 +1,48 @@
+import pytest
+
+from app.pagination import NEXT_CURSOR_HEADER
+
+METAS = [None, 100.0, None, 50.0, 100.0, None, 10.0, 200.0, None, 50.0, 7.0]
+
+
+@pytest.fixture
+def objetivos(fake, semear):
+    dono = semear("a@exemplo.com", "Carteira A", 1000.0)
+    # O objetivo semeado tem valor_meta 2000.0; os demais repetem valores e têm vários NULL
+    for i, meta in enumerate(METAS):
+        fake.inserir("objetivos", cliente_id=dono["cliente"], nome=f"objetivo {i}", valor_meta=meta)
+    linhas = [o for o in fake.tabelas["objetivos"].values() if o["cliente_id"] == dono["cliente"]]
+    return dono, linhas
+
+
+def _esperado(linhas: list, desc: bool) -> list:
+    preenchidos = sorted((o for o in linhas if o["valor_meta"] is not None), key=lambda o: (o["valor_meta"], o["id"]))
+    nulos = sorted((o for o in linhas if o["valor_meta"] is None), key=lambda o: o["id"])
+    # NULL é o maior valor: por último no asc e primeiro no desc
+    ordem = preenchidos + nulos
+    return [o["id"] for o in (ordem[::-1] if desc else ordem)]
+
+
+@pytest.mark.parametrize("direcao", ["asc", "desc"])
+@pytest.mark.parametrize("limit", [1, 2, 3, 4, 12, 50])
+def test_paginas_com_nulos_trazem_cada_linha_uma_vez(client, objetivos, direcao, limit):
+    dono, linhas = objetivos
+    url = f"/api/carteiras/cliente/{dono['cliente']}/objetivos"
+    params = {"ordem": "valor_meta", "direcao": direcao, "limit": limit}
+
+    ids, paginas, cursor = [], 0, None
+    while True:
+        response = client.get(url, params={**params, **({"cursor": cursor} if cursor else {})}, headers=dono["headers"])
+        assert response.status_code == 200
+        pagina = response.json()
+        assert 0 < len(pagina) <= limit
+        ids += [o["id"] for o in pagina]
+        paginas += 1
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if cursor is None:
+            break
+
+    assert ids == _esperado(linhas, direcao == "desc")
+    assert len(set(ids)) == len(linhas) == len(METAS) + 1
+    # Sem página vazia no final, inclusive quando o total é múltiplo do limite
+    assert paginas == -(-len(linhas) // limit)
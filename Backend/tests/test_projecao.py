@@ -0,0 +1,48 @@
+import pytest
+
+from app.projecao import PREMISSAS_PADRAO, _tipo
+
+
+@pytest.mark.parametrize("tipo,esperado", [
+    ("acoes", "acoes"),
+    ("Ações", "acoes"),
+    ("  RENDA FIXA ", "renda_fixa"),
+    ("CDB", "renda_fixa"),
+    ("LCI Banco X 2027", "renda_fixa"),
+    ("Tesouro IPCA+ 2035", "tesouro"),
+    ("FII", "fundos_imobiliarios"),
+    ("Fundos Imobiliários", "fundos_imobiliarios"),
+    ("Bitcoin", "cripto"),
+    ("sem categoria", "padrao"),
+    (None, "padrao"),
+])
+def test_tipo_livre_e_normalizado(tipo, esperado):
+    assert _tipo({"tipo": tipo}, PREMISSAS_PADRAO) == esperado
+
+
+def test_premissa_com_o_nome_exato_vale_antes_do_apelido():
+    premissas = {**PREMISSAS_PADRAO, "cdb": {"retorno_anual": 0.2, "volatilidade_anual": 0.01}}
+    assert _tipo({"tipo": "CDB"}, premissas) == "cdb"
+
+
+def test_tipos_diferentes_produzem_distribuicoes_diferentes(client, fake, semear):
+    dono = semear("a@exemplo.com", "Carteira A", 10000.0, tipo="CDB")
+    objetivo = fake.inserir("objetivos", cliente_id=dono["cliente"], nome="Bolsa", valor_meta=20000.0)
+    fake.inserir("investimentos", objetivo_id=objetivo["id"], nome="Ações", valor=10000.0, tipo="Ações")
+
+    response = client.post(
+        f"/api/carteiras/cliente/{dono['cliente']}/projecao",
+        json={"anos": 5, "simulacoes": 500},
+        headers=dono["headers"],
+    )
+    assert response.status_code == 200
+    corpo = response.json()
+    assert set(corpo["premissas"]) == {"renda_fixa", "acoes", "padrao"}
+
+    def dispersao(objetivo_id):
+        projetado = next(o for o in corpo["objetivos"] if o["objetivo_id"] == objetivo_id)
+        fim = projetado["trajetoria"][-1]
+        return (fim["p90"] - fim["p10"]) / fim["p50"]
+
+    # Volatilidade de ações (25% a.a.) contra renda fixa (2% a.a.)
+    assert dispersao(objetivo["id"]) > 5 * dispersao(dono["objetivo"])
@@ -0,0 +1,109 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app import http_cache
+from app.singleflight import SingleFlight
+
+
+def _ler_em_paralelo(url: str, headers: dict, n: int) -> list:
+    from main import app
+
+    async def ler():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://app") as client:
+            return await asyncio.gather(*[client.get(url, headers=headers) for _ in range(n)])
+
+    return asyncio.run(ler())
+
+
+def test_leituras_simultaneas_recebem_o_mesmo_corpo(fake, semear, monkeypatch):
+    # Latência para que as leituras se sobreponham e sejam agrupadas; com o cache de
+    # respostas ligado, uma resposta corrompida também ficaria guardada
+    fake.latencia = 0.02
+    monkeypatch.setattr(http_cache.cache_respostas, "ttl", 30)
+    dono = semear("a@exemplo.com", "Carteira A", 1000.0)
+    url = f"/api/carteiras/cliente/{dono['cliente']}/completa"
+
+    respostas = _ler_em_paralelo(url, dono["headers"], 5)
+    respostas += _ler_em_paralelo(url, dono["headers"], 1)
+
+    assert {r.status_code for r in respostas} == {200}
+    assert len({r.content for r in respostas}) == 1
+    investimentos = respostas[0].json()["investimentos_por_objetivo"][dono["objetivo"]]
+    assert [i["id"] for i in investimentos] == [dono["investimento"]]
+
+
+def test_erro_chega_a_todos_os_chamadores_e_libera_a_chave():
+    flight = SingleFlight("teste")
+    execucoes = []
+
+    async def falhar():
+        execucoes.append(1)
+        await asyncio.sleep(0.01)
+        raise ValueError("falhou")
+
+    async def cenario():
+        resultados = await asyncio.gather(
+            *[flight.executar("chave", falhar) for _ in range(5)], return_exceptions=True
+        )
+        assert flight._em_voo == {}
+        assert flight._esperas == {}
+        # Depois do erro, a mesma chave dispara uma nova execução
+        with pytest.raises(ValueError):
+            await flight.executar("chave", falhar)
+        return resultados
+
+    resultados = asyncio.run(cenario())
+    assert all(isinstance(r, ValueError) and str(r) == "falhou" for r in resultados)
+    assert len(execucoes) == 2
+    assert flight.metricas() == {"chamadas": 2, "deduplicadas": 4, "em_voo": 0}
+
+
+def test_chamador_cancelado_nao_cancela_os_demais():
+    flight = SingleFlight("teste")
+
+    async def ler():
+        await asyncio.sleep(0.01)
+        return {"itens": [1]}
+
+    async def cenario():
+        primeiro = asyncio.ensure_future(flight.executar("chave", ler))
+        await asyncio.sleep(0)
+        segundo = asyncio.ensure_future(flight.executar("chave", ler))
+        await asyncio.sleep(0)
+        primeiro.cancel()
+        assert await segundo == {"itens": [1]}
+        assert primeiro.cancelled()
+        assert flight._em_voo == {}
+
+    asyncio.run(cenario())
+
+
+def test_esquecer_faz_novos_chamadores_dispararem_nova_execucao():
+    flight = SingleFlight("teste")
+    execucoes = []
+
+    async def ler():
+        execucoes.append(1)
+        execucao = len(execucoes)
+        await asyncio.sleep(0.02 * execucao)
+        return execucao
+
+    async def cenario():
+        antiga = asyncio.ensure_future(flight.executar("chave", ler))
+        await asyncio.sleep(0)
+        flight.esquecer()
+        nova = asyncio.ensure_future(flight.executar("chave", ler))
+        await asyncio.sleep(0)
+        agrupada = asyncio.ensure_future(flight.executar("chave", ler))
+        # A execução esquecida termina normalmente e não tira a nova de _em_voo
+        assert await antiga == 1
+        assert flight._em_voo
+        assert await nova == await agrupada == 2
+        assert flight._em_voo == {}
+
+    asyncio.run(cenario())
+    assert len(execucoes) == 2
+    assert flight.metricas() == {"chamadas": 2, "deduplicadas": 1, "em_voo": 0}